@@ -0,0 +1,59 @@
+"""
+Compares the full and the compact (pruned, categorical) loading of prepare_data.
+
+Each mode runs in a fresh interpreter so its peak RSS is measured in isolation.
+
+Usage:
+    python -m benchmarks.compact_loading [--log logs/employees_log.csv] [--delta_y frequency] [--delta_x rounded_time]
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+def run_child(args):
+    from process_roc.preprocessing import prepare_data
+
+    value_columns = [args.delta_y, args.delta_x] if args.child == 'compact' else None
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    start = time.perf_counter()
+    df = prepare_data(args.log, args.case_id_column, value_columns=value_columns)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        'seconds': seconds,
+        'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'rss_growth_mib': (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline_rss) / 1024,
+        'frame_mib': df.memory_usage(deep=True).sum() / 2**20,
+        'columns': len(df.columns),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact loading benchmark")
+    parser.add_argument('--log', default='logs/employees_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='frequency')
+    parser.add_argument('--delta_x', default='rounded_time')
+    parser.add_argument('--child', choices=['full', 'compact'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"{'mode':<10}{'load (s)':>10}{'peak RSS (MiB)':>16}{'RSS growth (MiB)':>18}{'frame (MiB)':>13}{'columns':>9}")
+    for mode in ('full', 'compact'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.compact_loading', '--log', args.log,
+             '--case_id_column', args.case_id_column, '--delta_y', args.delta_y,
+             '--delta_x', args.delta_x, '--child', mode],
+            check=True, capture_output=True, text=True).stdout
+        result = json.loads(output)
+        print(f"{mode:<10}{result['seconds']:>10.3f}{result['peak_rss_mib']:>16.1f}"
+              f"{result['rss_growth_mib']:>18.1f}{result['frame_mib']:>13.2f}{result['columns']:>9}")
+
+if __name__ == "__main__":
+    main()
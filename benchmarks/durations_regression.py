@@ -0,0 +1,65 @@
+"""
+Benchmarks the vectorized grouped durations against the per-group lambda versions
+they replaced on every log in logs/, reporting the time of both. It is run by hand,
+not by a test suite; it stops with an AssertionError when a result differs from the
+lambda version, and a full run confirms the two match on these logs.
+
+Usage:
+    python -m benchmarks.durations_regression
+"""
+import time
+import pandas as pd
+from metrics_roc.durations import duration_breakdown, span_hours_per_event
+from process_roc.preprocessing import minutes_since_case_start, prepare_data
+
+LOGS = ['logs/orders_log.csv', 'logs/customers_log.csv', 'logs/employees_log.csv', 'logs/packages_log.csv']
+CASE = 'case:concept:name'
+ACTIVITY = 'concept:name'
+
+def lambda_timestamp_minutes(df):
+    return df.groupby(CASE)['time:timestamp'].transform(lambda x: (x - x.min()).dt.total_seconds() / 60.0)
+
+def lambda_duration(df):
+    return df.groupby([CASE, ACTIVITY])['Timestamp'].transform(lambda x: (x.max() - x.min()).total_seconds() / 3600)
+
+def lambda_breakdown(df, by, count_name):
+    return df.groupby(by).agg(
+        TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
+        **{count_name: (ACTIVITY, 'count')}
+    )
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    print(f"{'log':<28}{'computation':<24}{'lambda (s)':>12}{'vectorized (s)':>16}")
+    for log_file in LOGS:
+        prepared, _ = timed(prepare_data, log_file, CASE)
+        event_log = pd.read_csv(log_file)
+        event_log['Timestamp'] = pd.to_datetime(event_log['time:timestamp'], errors='coerce')
+
+        checks = [
+            ('timestamp_minutes', (lambda_timestamp_minutes, prepared), (lambda df: minutes_since_case_start(df, CASE, 'time:timestamp'), prepared)),
+            ('idle Duration', (lambda_duration, event_log),
+             (lambda df: span_hours_per_event(df, [CASE, ACTIVITY]), event_log)),
+            ('activity breakdown', (lambda df: lambda_breakdown(df, ACTIVITY, 'Frequency'), event_log),
+             (lambda df: duration_breakdown(df, ACTIVITY, 'Frequency'), event_log)),
+            ('case breakdown', (lambda df: lambda_breakdown(df, CASE, 'ActivityCount'), event_log),
+             (lambda df: duration_breakdown(df, CASE, 'ActivityCount'), event_log)),
+        ]
+
+        for name, (old, old_input), (new, new_input) in checks:
+            expected, old_seconds = timed(old, old_input)
+            result, new_seconds = timed(new, new_input)
+            if isinstance(expected, pd.DataFrame):
+                pd.testing.assert_frame_equal(result, expected, check_exact=True)
+            else:
+                pd.testing.assert_series_equal(result, expected, check_exact=True, check_names=False)
+            print(f"{log_file:<28}{name:<24}{old_seconds:>12.4f}{new_seconds:>16.4f}")
+
+    print("All vectorized results match the lambda versions.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Replays a log in time order through IncrementalROC, saving and reloading the
+state between batches, checks the rows against a full recompute and reports
+the time per batch against a full recompute.
+
+Usage:
+    python -m benchmarks.incremental_roc [--log logs/orders_log.csv] [--batch_size 1000]
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from process_roc.calculator import calculate_roc_grouped
+from process_roc.incremental import IncrementalROC
+from process_roc.preprocessing import prepare_data
+from process_roc.timestamps import parse_timestamps
+from process_roc.utils import DiscardedEventsCollector
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental vs full ROC recompute")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='cumulative_cost')
+    parser.add_argument('--delta_x', default='timestamp_minutes')
+    parser.add_argument('--batch_size', type=int, default=1000)
+    args = parser.parse_args()
+
+    discarded_events = DiscardedEventsCollector("none")
+    start = time.perf_counter()
+    expected = calculate_roc_grouped(prepare_data(args.log, args.case_id_column), args.delta_y, args.delta_x,
+                                     args.case_id_column, discarded_events)
+    full_seconds = time.perf_counter() - start
+
+    events = pd.read_csv(args.log)
+    events = events.iloc[parse_timestamps(events['time:timestamp']).argsort(kind='mergesort')]
+
+    state_file, state_path = tempfile.mkstemp(suffix='.pkl')
+    os.close(state_file)
+    try:
+        IncrementalROC(args.delta_y, args.delta_x, args.case_id_column).save(state_path)
+        batches = []
+        start = time.perf_counter()
+        for first_row in range(0, len(events), args.batch_size):
+            calculator = IncrementalROC.load(state_path)
+            batches.append(calculator.update(events.iloc[first_row:first_row + args.batch_size], discarded_events))
+            calculator.save(state_path)
+        incremental_seconds = time.perf_counter() - start
+    finally:
+        os.remove(state_path)
+
+    result = pd.concat(batches, ignore_index=True).sort_values(by=args.case_id_column, kind='mergesort',
+                                                                ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected, check_exact=True, check_dtype=False)
+
+    print(f"full recompute:        {full_seconds:.3f} s")
+    print(f"incremental, {len(batches)} batches: {incremental_seconds:.3f} s "
+          f"({incremental_seconds / len(batches) * 1000:.1f} ms per batch, state saved and loaded each time)")
+    print("Incremental rows match the full recompute.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Checks that compute_metrics reproduces the daily series of the four metric
+scripts, computed as the scripts did before sharing their aggregates, and
+reports the time of both on every log in logs/.
+
+Usage:
+    python -m benchmarks.metrics_engine
+"""
+import time
+import pandas as pd
+from metrics_roc.durations import span_hours_per_event
+from metrics_roc.engine import compute_metrics, load_event_log
+
+LOGS = ['logs/orders_log.csv', 'logs/customers_log.csv', 'logs/employees_log.csv', 'logs/packages_log.csv']
+CASE = 'case:concept:name'
+ACTIVITY = 'concept:name'
+
+def case_times(event_log):
+    times = event_log.groupby(CASE)['Timestamp'].agg(StartTimestamp='min', EndTimestamp='max').reset_index()
+    times['hours'] = (times['EndTimestamp'] - times['StartTimestamp']).dt.total_seconds() / 3600
+    return times
+
+def script_cycle_time(event_log):
+    times = case_times(event_log)
+    times['Date'] = times['StartTimestamp'].dt.date
+    daily = times.groupby('Date')['hours'].mean().reset_index(name='AverageCycleTime')
+    daily['ROC'] = daily['AverageCycleTime'].diff() / 1
+    return daily
+
+def script_throughput_time(event_log):
+    times = case_times(event_log)
+    times['Date'] = times['EndTimestamp'].dt.date
+    daily = (times.groupby('Date')
+             .agg(TotalThroughputTime=('hours', 'sum'), NumberOfCases=('hours', 'count'))
+             .reset_index())
+    daily['AverageThroughputTime'] = daily['TotalThroughputTime'] / daily['NumberOfCases']
+    daily['ROC'] = daily['AverageThroughputTime'].diff()
+    return daily
+
+def script_idle_time(event_log):
+    times = case_times(event_log)
+    duration = span_hours_per_event(event_log, [CASE, ACTIVITY])
+    active = duration.groupby(event_log[CASE]).sum().reset_index(name='active')
+    times = times.merge(active, on=CASE)
+    times['idle'] = times['hours'] - times['active']
+    times['Date'] = times['StartTimestamp'].dt.date
+    daily = times.groupby('Date')['idle'].mean().reset_index(name='AverageIdleTime')
+    daily['ROC'] = daily['AverageIdleTime'].diff()
+    return daily
+
+def script_service_time(event_log):
+    spans = event_log.groupby([CASE, ACTIVITY])['Timestamp'].agg(start='min', end='max').reset_index()
+    spans['hours'] = (spans['end'] - spans['start']).dt.total_seconds() / 3600
+    service = spans.groupby(CASE)['hours'].sum().reset_index()
+    starts = event_log.groupby(CASE)['Timestamp'].min().reset_index(name='StartTimestamp')
+    service = service.merge(starts, on=CASE)
+    service['Date'] = service['StartTimestamp'].dt.date
+    daily = (service.groupby('Date')
+             .agg(AverageServiceTime=('hours', 'mean'), CaseCount=('hours', 'count'))
+             .reset_index())
+    daily['ROC'] = daily['AverageServiceTime'].diff()
+    return daily
+
+SCRIPTS = {
+    'cycle_time': script_cycle_time,
+    'throughput_time': script_throughput_time,
+    'idle_time': script_idle_time,
+    'service_time': script_service_time,
+}
+
+def main():
+    print(f"{'log':<28}{'scripts (s)':>14}{'engine (s)':>14}")
+    for log_file in LOGS:
+        event_log = load_event_log(log_file)
+
+        start = time.perf_counter()
+        expected = {name: script(event_log) for name, script in SCRIPTS.items()}
+        script_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = compute_metrics(event_log)
+        engine_seconds = time.perf_counter() - start
+
+        for name in SCRIPTS:
+            pd.testing.assert_frame_equal(metrics[name], expected[name], check_exact=True)
+        print(f"{log_file:<28}{script_seconds:>14.4f}{engine_seconds:>14.4f}")
+
+    print("All engine series match the script computations.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Measures how the parallel ROC engine scales with the number of worker processes.
+
+The log is prepared once and tiled with renamed cases to reach the requested size.
+
+Usage:
+    python -m benchmarks.parallel_scaling [--log logs/orders_log.csv] [--copies 100] [--workers 1 2 4 8]
+"""
+import argparse
+import time
+import pandas as pd
+from process_roc.calculator import calculate_roc_all_traces
+from process_roc.preprocessing import prepare_data
+from process_roc.utils import DiscardedEventsCollector
+
+def tile_log(df, case_id_column: str, copies: int):
+    """
+    Repeats a prepared log, giving every copy its own case IDs and keeping it sorted by case.
+    """
+    tiles = []
+    for copy in range(copies):
+        tile = df.copy()
+        tile[case_id_column] = tile[case_id_column].astype(str) + f"#{copy}"
+        tiles.append(tile)
+    return pd.concat(tiles, ignore_index=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel ROC scaling benchmark")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='cumulative_cost')
+    parser.add_argument('--delta_x', default='timestamp_minutes')
+    parser.add_argument('--copies', type=int, default=100)
+    parser.add_argument('--workers', type=int, nargs='*', default=[1, 2, 4, 8])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    df = tile_log(prepare_data(args.log, args.case_id_column), args.case_id_column, args.copies)
+    print(f"{len(df):,} events, {df[args.case_id_column].nunique():,} cases")
+
+    baseline = None
+    print(f"{'workers':>8}{'time (s)':>12}{'speed-up':>10}")
+    for workers in args.workers:
+        best = float('inf')
+        for _ in range(args.repeat):
+            with DiscardedEventsCollector('none') as discarded_events:
+                start = time.perf_counter()
+                calculate_roc_all_traces(df, args.delta_y, args.delta_x, args.case_id_column,
+                                         discarded_events=discarded_events, workers=workers)
+                best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        print(f"{workers:>8}{best:>12.3f}{baseline / best:>10.2f}")
+
+if __name__ == "__main__":
+    main()
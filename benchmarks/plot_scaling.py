@@ -0,0 +1,66 @@
+"""
+Times building the all-traces ROC figure as the number of cases grows, with the
+former one-Scatter-per-case loop and with every plot mode, and reports the
+number of points and the size of the figure JSON that a browser has to render.
+
+Cases are copies of the orders log, see tile_log. The former loop is skipped
+above --legacy_limit cases, as it grows quadratically.
+
+Usage:
+    python -m benchmarks.plot_scaling [--copies 1 5 20 80] [--max_points 100000]
+"""
+import argparse
+import time
+import plotly.graph_objects as go
+from benchmarks.parallel_scaling import tile_log
+from process_roc.calculator import calculate_roc_grouped
+from process_roc.plotter import build_traces_figure
+from process_roc.preprocessing import prepare_data
+from process_roc.utils import DiscardedEventsCollector
+
+def legacy_figure(df, x_col, y_col, case_id_column):
+    fig = go.Figure()
+    for case_id in df[case_id_column].unique():
+        trace_data = df[df[case_id_column] == case_id].dropna(subset=[y_col])
+        if trace_data.empty:
+            continue
+        fig.add_trace(go.Scatter(x=trace_data[x_col], y=trace_data[y_col], mode='lines+markers', name=f'Case {case_id}'))
+    return fig
+
+def figure_points(fig):
+    return sum(len(trace.x) * (len(trace.y) if trace.type == 'heatmap' else 1) if trace.x is not None else 0
+               for trace in fig.data)
+
+def main():
+    parser = argparse.ArgumentParser(description="All-traces plot scaling benchmark")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='cumulative_cost')
+    parser.add_argument('--delta_x', default='rounded_time')
+    parser.add_argument('--copies', type=int, nargs='*', default=[1, 5, 20, 80])
+    parser.add_argument('--max_points', type=int, default=100_000)
+    parser.add_argument('--legacy_limit', type=int, default=10_000)
+    args = parser.parse_args()
+
+    df = prepare_data(args.log, args.case_id_column, value_columns=[args.delta_y, args.delta_x])
+    roc = calculate_roc_grouped(df, args.delta_y, args.delta_x, args.case_id_column, DiscardedEventsCollector('none'))
+
+    print(f"{'cases':>8}{'rows':>10}  {'figure':<16}{'build (s)':>10}{'points':>10}{'JSON (MB)':>11}")
+    for copies in args.copies:
+        tiled = tile_log(roc, args.case_id_column, copies)
+        cases = tiled[args.case_id_column].nunique()
+        builders = [(mode, lambda mode=mode: build_traces_figure(tiled, args.delta_x, 'ROC', args.case_id_column, "ROC",
+                                                                 "ROC", mode, args.max_points))
+                    for mode in ('auto', 'traces', 'bands', 'density')]
+        if cases <= args.legacy_limit:
+            builders.insert(0, ('legacy loop', lambda: legacy_figure(tiled, args.delta_x, 'ROC', args.case_id_column)))
+
+        for name, build in builders:
+            start = time.perf_counter()
+            fig = build()
+            seconds = time.perf_counter() - start
+            size = len(fig.to_json()) / 1e6
+            print(f"{cases:>8,}{len(tiled):>10,}  {name:<16}{seconds:>10.3f}{figure_points(fig):>10,}{size:>11.1f}")
+
+if __name__ == "__main__":
+    main()
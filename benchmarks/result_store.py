@@ -0,0 +1,110 @@
+"""
+Compares follow-up questions answered from the ROC result store with recomputing the
+ROC from the log and with scanning one Parquet file holding the whole ROC table.
+
+The ROC of a synthetic log (see benchmarks.synthetic_log) is written to a temporary
+store --runs times, as separate runs, and to a single Parquet file. Two questions are
+asked of the last run: the ROC of --cases random cases, and the rows with a ROC of at
+least --min_roc in the first --months months of the log. Every approach must return the
+same number of rows. Finally, a run with an extra smoothed ROC column is read together
+with a plain run, and must come back with all its columns.
+
+Usage:
+    python -m benchmarks.result_store [--events 1e6] [--cases 2] [--min_roc 1] [--months 2] [--runs 3] [--repeat 5]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic_log import write_synthetic_log
+from process_roc.calculator import calculate_roc_all_traces
+from process_roc.preprocessing import prepare_data
+from process_roc.store import ROCStore
+from process_roc.utils import DiscardedEventsCollector
+
+CASE_ID_COLUMN = 'case:concept:name'
+DELTA_Y = 'cumulative_cost'
+DELTA_X = 'rounded_time'
+
+def compute_roc(log):
+    df = prepare_data(str(log), CASE_ID_COLUMN)
+    return calculate_roc_all_traces(df, DELTA_Y, DELTA_X, CASE_ID_COLUMN, discarded_events=DiscardedEventsCollector('none'))
+
+def best_time(function, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="ROC result store benchmark")
+    parser.add_argument('--events', type=lambda value: int(float(value)), default=1_000_000)
+    parser.add_argument('--log_dir', default=str(Path(__file__).resolve().parent / 'data'))
+    parser.add_argument('--cases', type=int, default=2, help='Cases of the case question')
+    parser.add_argument('--min_roc', type=float, default=1.0, help='ROC threshold of the date range question')
+    parser.add_argument('--months', type=int, default=2, help='Months of the date range question')
+    parser.add_argument('--buckets', type=int, default=16)
+    parser.add_argument('--runs', type=int, default=3, help='Runs appended to the store')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    log = Path(args.log_dir) / f"orders_{args.events}_geometric_3.3_0.01_0.csv"
+    if not log.exists():
+        print(f"Generating {log} ...")
+        write_synthetic_log(str(log), args.events)
+
+    recompute_seconds, roc = best_time(lambda: compute_roc(log), 1)
+    rng = np.random.default_rng(args.seed)
+    case_ids = list(rng.choice(roc[CASE_ID_COLUMN].unique(), args.cases, replace=False))
+    start = roc[DELTA_X].min().floor('1D')
+    end = start + pd.DateOffset(months=args.months) - pd.Timedelta(days=1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        store = ROCStore(folder, buckets=args.buckets)
+        write_seconds, runs = best_time(lambda: store.write(roc, CASE_ID_COLUMN, DELTA_Y, DELTA_X), 1)
+        runs = [runs] + [store.write(roc, CASE_ID_COLUMN, DELTA_Y, DELTA_X) for _ in range(args.runs - 1)]
+        single_file = Path(folder) / 'roc.parquet'
+        roc.to_parquet(single_file, index=False)
+
+        def scan(condition):
+            table = pd.read_parquet(single_file)
+            return table[condition(table)]
+
+        questions = [
+            (f"{args.cases} cases", {'case_ids': case_ids},
+             lambda table: table[CASE_ID_COLUMN].isin(case_ids)),
+            (f"ROC >= {args.min_roc:g} over {args.months} months", {'start': start, 'end': end, 'min_roc': args.min_roc},
+             lambda table: (table['ROC'] >= args.min_roc) & table[DELTA_X].between(start, end)),
+        ]
+
+        print(f"{len(roc):,} ROC rows; {args.runs} runs of {len(store.manifests(DELTA_Y, DELTA_X)[-1]['files'])} files "
+              f"in the store, first written in {write_seconds:.2f} s\n")
+        print(f"{'question':<30}{'approach':<28}{'best (s)':>10}{'files':>12}{'rows':>10}")
+        for name, query, condition in questions:
+            files, total = store.plan(DELTA_Y, DELTA_X, runs=runs[-1:], **query)
+            approaches = [
+                ('recompute from the log', recompute_seconds, roc[condition(roc)], '-'),
+                ('scan one Parquet file', *best_time(lambda: scan(condition), args.repeat), '1 of 1'),
+                ('result store', *best_time(lambda: store.read(DELTA_Y, DELTA_X, runs=runs[-1:], **query), args.repeat),
+                 f"{len(files)} of {total}"),
+            ]
+            counts = {len(rows) for _, _, rows, _ in approaches}
+            for approach, seconds, rows, scanned in approaches:
+                print(f"{name:<30}{approach:<28}{seconds:>10.3f}{scanned:>12}{len(rows):>10,}")
+            if len(counts) > 1:
+                raise AssertionError(f"{name}: the approaches return different row counts {sorted(counts)}")
+
+        smoothed_run = store.write(roc.assign(ROC_smoothed=roc['ROC']), CASE_ID_COLUMN, DELTA_Y, DELTA_X)
+        mixed = store.read(DELTA_Y, DELTA_X, runs=[runs[0], smoothed_run])
+        smoothed_rows = mixed['ROC_smoothed'].notna().sum() if 'ROC_smoothed' in mixed else 0
+        print(f"\nplain and smoothed runs read together: {len(mixed):,} rows, {smoothed_rows:,} with ROC_smoothed")
+        if smoothed_rows != roc['ROC'].notna().sum():
+            raise AssertionError("Columns of the smoothed run are missing when read with a plain run")
+
+if __name__ == "__main__":
+    main()
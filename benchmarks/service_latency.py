@@ -0,0 +1,92 @@
+"""
+Measures the latency of the ROC query service against the cost of a CLI run, which
+prepares the log again for every query.
+
+The service runs in a background thread on a free local port. The benchmark times
+the first query (the log is prepared), queries of new case sets on the prepared log,
+repeated (memoized) queries, and --clients clients sending new queries concurrently.
+
+Usage:
+    python -m benchmarks.service_latency [--log logs/orders_log.csv] [--queries 200] [--clients 8] [--cases 3]
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+import numpy as np
+from process_roc.cache import prepare_data_cached
+from process_roc.service import ROCService
+
+def start_service(service):
+    """
+    Serves service on a free local port in a daemon thread and returns its base URL.
+    """
+    ready = threading.Event()
+    address = {}
+
+    async def serve():
+        server = await asyncio.start_server(service.handle_connection, '127.0.0.1', 0)
+        address['port'] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+def query(base_url, args, case_ids):
+    params = {'log_file': args.log, 'case_id_column': args.case_id_column, 'delta_y': args.delta_y,
+              'delta_x': args.delta_x, 'case_ids': ','.join(case_ids)}
+    start = time.perf_counter()
+    with urllib.request.urlopen(f"{base_url}/roc?{urlencode(params)}") as response:
+        json.loads(response.read())
+    return (time.perf_counter() - start) * 1000
+
+def report(name, milliseconds):
+    milliseconds = np.asarray(milliseconds)
+    print(f"{name:<36}{len(milliseconds):>8}{np.percentile(milliseconds, 50):>10.2f}"
+          f"{np.percentile(milliseconds, 95):>10.2f}{milliseconds.max():>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="ROC query service latency benchmark")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='cumulative_cost')
+    parser.add_argument('--delta_x', default='rounded_time')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--clients', type=int, default=8)
+    parser.add_argument('--cases', type=int, default=3, help='Cases per query')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    df = prepare_data_cached(args.log, args.case_id_column, use_cache=False)
+    reload_ms = (time.perf_counter() - start) * 1000
+    rng = np.random.default_rng(args.seed)
+    cases = df[args.case_id_column].unique().astype(str)
+    case_sets = [list(rng.choice(cases, args.cases, replace=False)) for _ in range(args.queries * 2 + 1)]
+
+    base_url = start_service(ROCService(use_cache=False, workers=args.clients))
+    print(f"Preparing {args.log} (paid by every CLI run): {reload_ms:.1f} ms\n")
+    print(f"{'requests':<36}{'count':>8}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}")
+
+    report('first query (prepares the log)', [query(base_url, args, case_sets[0])])
+    fresh = case_sets[1:args.queries + 1]
+    report('new case sets', [query(base_url, args, case_ids) for case_ids in fresh])
+    report('repeated case sets (memoized)', [query(base_url, args, case_ids) for case_ids in fresh])
+
+    concurrent = case_sets[args.queries + 1:]
+    with ThreadPoolExecutor(args.clients) as clients:
+        start = time.perf_counter()
+        latencies = list(clients.map(lambda case_ids: query(base_url, args, case_ids), concurrent))
+        seconds = time.perf_counter() - start
+    report(f'{args.clients} concurrent clients, new sets', latencies)
+    print(f"\nConcurrent throughput: {len(concurrent) / seconds:.0f} queries/s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Measures the import time of the CLI and the metric scripts with python -X importtime,
+and fails when a run imports a plotting library it does not need or when the imports
+take much longer than pandas itself.
+
+Every command runs in a fresh interpreter --repeat times and the fastest run is kept.
+Import time is the sum of the top-level imports reported by -X importtime. The
+overhead of a command is its import time above that of `import pandas`, which every
+command needs. A command without figures fails when its overhead exceeds
+--max_overhead_ms or when it imports plotly or matplotlib; the headless figure run of
+a metric script fails when it imports a GUI toolkit. The exit status is 1 when a
+command fails.
+
+Usage:
+    python -m benchmarks.startup_time [--repeat 5] [--max_overhead_ms 150] [--log logs/orders_log.csv]
+"""
+import argparse
+import subprocess
+import sys
+import tempfile
+import time
+
+PLOTTING = ['plotly', 'matplotlib']
+GUI_TOOLKITS = ['tkinter', 'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'gi', 'wx']
+
+def import_times(stderr):
+    """
+    Parses the output of -X importtime.
+
+    Returns:
+        Tuple[float, Dict[str, float]]: Total import time in milliseconds, and the milliseconds
+            spent in every top-level package imported, its own modules only.
+    """
+    total, packages = 0.0, {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0.0) + int(own) / 1000
+        if not name.startswith('  '):
+            # Nested imports are indented below the module importing them.
+            total += int(cumulative) / 1000
+    return total, packages
+
+def measure(arguments, repeat):
+    """
+    Runs python -X importtime with arguments repeat times.
+
+    Returns:
+        dict: Import milliseconds, wall seconds and the import time of every package in the fastest run.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', *arguments], capture_output=True, text=True)
+        seconds = time.perf_counter() - start
+        if process.returncode != 0:
+            raise RuntimeError(f"{' '.join(arguments)} failed:\n{process.stderr[-2000:]}")
+        total, packages = import_times(process.stderr)
+        if best is None or total < best['import_ms']:
+            best = {'import_ms': total, 'seconds': seconds, 'packages': packages}
+    return best
+
+def commands(args, output_dir):
+    """
+    Returns the measured commands as (name, arguments, forbidden top-level packages,
+    whether the overhead is checked).
+    """
+    tables_only = ['--output-dir', output_dir, '--format', 'csv']
+    roc = ['-m', 'process_roc.main', '--log_file', args.log, '--case_id_column', 'case:concept:name',
+           '--delta_y', 'cumulative_cost', '--delta_x', 'rounded_time', '--discarded_format', 'none', '--no-cache']
+    return [
+        ('process_roc.main --help', ['-m', 'process_roc.main', '--help'], PLOTTING, True),
+        ('process_roc.main tables only', roc + tables_only, PLOTTING, True),
+        ('metrics_roc.cycleTime --help', ['-m', 'metrics_roc.cycleTime', '--help'], PLOTTING, True),
+        ('metrics_roc.cycleTime tables only', ['-m', 'metrics_roc.cycleTime', *tables_only], PLOTTING, True),
+        ('metrics_roc.cycleTime headless figure', ['-m', 'metrics_roc.cycleTime', '--output-dir', output_dir,
+                                                   '--format', 'png'], GUI_TOOLKITS, False),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI startup time benchmark")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max_overhead_ms', type=float, default=150.0,
+                        help='Largest import time allowed above that of pandas')
+    args = parser.parse_args()
+
+    floor = measure(['-c', 'import pandas'], args.repeat)['import_ms']
+    print(f"import pandas: {floor:.1f} ms\n")
+    print(f"{'command':<40}{'import (ms)':>12}{'overhead':>10}{'wall (s)':>10}  status")
+
+    failed = False
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, arguments, forbidden, check_overhead in commands(args, output_dir):
+            result = measure(arguments, args.repeat)
+            overhead = result['import_ms'] - floor
+            problems = [f"imports {package}" for package in forbidden if package in result['packages']]
+            if check_overhead and overhead > args.max_overhead_ms:
+                problems.append(f"overhead above {args.max_overhead_ms:g} ms")
+            failed = failed or bool(problems)
+
+            print(f"{name:<40}{result['import_ms']:>12.1f}{overhead:>10.1f}{result['seconds']:>10.2f}  "
+                  f"{'; '.join(problems) or 'ok'}")
+            slowest = sorted(result['packages'].items(), key=lambda item: -item[1])[:5]
+            print(f"{'':<4}slowest: " + ', '.join(f"{package} {ms:.0f} ms" for package, ms in slowest))
+
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
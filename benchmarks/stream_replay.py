@@ -0,0 +1,101 @@
+"""
+Replays a log into a CSV file in event-time order, at a chosen speed-up factor,
+while the streaming ROC reader tails it, and reports the sustained events/s,
+the end-to-end latency from the write of an event to the emission of its ROC
+row, and the number of cases kept in memory.
+
+Usage:
+    python -m benchmarks.stream_replay [--log logs/orders_log.csv] [--speedup 1000000] [--idle_timeout 10080]
+
+A speed-up of 0 writes the events as fast as possible, which measures the
+maximum sustained throughput.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+from process_roc.incremental import IncrementalROC
+from process_roc.streaming import iter_event_batches, stream_roc
+from process_roc.timestamps import parse_timestamps, to_epoch_ns
+from process_roc.utils import DiscardedEventsCollector
+
+def replay(lines, event_seconds, path, speedup, write_times):
+    """
+    Appends lines to path, sleeping so that event time runs speedup times faster than
+    wall time, and records the monotonic time at which each line was flushed.
+    """
+    with open(path, 'a', newline='') as feed:
+        start = time.monotonic()
+        for position, (line, due) in enumerate(zip(lines, event_seconds)):
+            if speedup:
+                delay = start + due / speedup - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            feed.write(line)
+            feed.flush()
+            write_times[position] = time.monotonic()
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming ROC replay benchmark")
+    parser.add_argument('--log', default='logs/orders_log.csv')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--delta_y', default='cumulative_cost')
+    parser.add_argument('--delta_x', default='timestamp_minutes')
+    parser.add_argument('--speedup', type=float, default=1_000_000,
+                        help='Event time / wall time ratio of the replay; 0 replays as fast as possible')
+    parser.add_argument('--batch_size', type=int, default=1000)
+    parser.add_argument('--max_wait', type=float, default=0.2)
+    parser.add_argument('--idle_timeout', type=float, default=None, help='Minutes of event time')
+    args = parser.parse_args()
+
+    with open(args.log, newline='') as log:
+        header = log.readline()
+        lines = log.readlines()
+    timestamps = parse_timestamps(pd.read_csv(args.log, usecols=['time:timestamp'])['time:timestamp'])
+    order = timestamps.argsort(kind='mergesort').to_numpy()
+    epoch_ns = to_epoch_ns(timestamps).to_numpy()[order]
+    lines = [lines[position] for position in order]
+    event_seconds = (epoch_ns - epoch_ns[0]) / 1e9
+
+    feed_file, feed_path = tempfile.mkstemp(suffix='.csv')
+    os.write(feed_file, header.encode())
+    os.close(feed_file)
+
+    write_times = np.full(len(lines), np.nan)
+    writer = threading.Thread(target=replay, args=(lines, event_seconds, feed_path, args.speedup, write_times))
+
+    calculator = IncrementalROC(args.delta_y, args.delta_x, args.case_id_column)
+    batches = iter_event_batches(feed_path, args.batch_size, args.max_wait, follow=True, poll_interval=0.01)
+    latencies = []
+    consumed = 0
+    peak_cases = 0
+
+    start = time.monotonic()
+    writer.start()
+    try:
+        for events, _ in stream_roc(batches, calculator, args.idle_timeout, DiscardedEventsCollector("none")):
+            emitted = time.monotonic()
+            latencies.append(emitted - write_times[consumed:consumed + len(events)])
+            consumed += len(events)
+            peak_cases = max(peak_cases, len(calculator.cases))
+            if consumed == len(lines):
+                break
+        elapsed = time.monotonic() - start
+    finally:
+        batches.close()
+        writer.join()
+        os.remove(feed_path)
+
+    latencies = np.concatenate(latencies) * 1000
+    print(f"events:              {consumed}")
+    print(f"replay speed-up:     {args.speedup:g}x ({'as fast as possible' if not args.speedup else 'event time'})")
+    print(f"sustained rate:      {consumed / elapsed:,.0f} events/s over {elapsed:.2f} s")
+    print(f"latency (ms):        p50 {np.percentile(latencies, 50):.1f}  p95 {np.percentile(latencies, 95):.1f}  "
+          f"p99 {np.percentile(latencies, 99):.1f}  max {latencies.max():.1f}")
+    print(f"cases in memory:     peak {peak_cases}, final {len(calculator.cases)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Times and memory-profiles every stage of the ROC pipeline on synthetic logs of
+growing size, and stores the results as JSON so that versions can be compared.
+
+The logs come from benchmarks.synthetic_log and are kept in --log_dir between
+runs. Every stage is timed over --repeat runs (best time kept), then run once
+more under tracemalloc for its peak of traced memory; worker processes of the
+parallel engine are not traced. Results go to --output, by default
+benchmarks/results/suite_<commit>.json; --compare prints the change of every
+stage against an earlier results file.
+
+Usage:
+    python -m benchmarks.suite [--events 1e4 1e5 1e6] [--stages prepare_data calculate_roc_grouped ...]
+        [--case_length geometric] [--duplicate_rate 0.01] [--compare benchmarks/results/suite_<commit>.json]
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic_log import CASE_LENGTHS, write_synthetic_log
+from metrics_roc.engine import compute_metrics, load_event_log
+from process_roc.calculator import (calculate_roc_all_traces, calculate_roc_batch, calculate_roc_grouped,
+                                    calculate_roc_parallel, calculate_roc_selected_traces, calculate_roc_single_trace)
+from process_roc.chunked import calculate_roc_out_of_core
+from process_roc.plotter import build_traces_figure
+from process_roc.preprocessing import prepare_data
+from process_roc.utils import DiscardedEventsCollector
+
+CASE_ID_COLUMN = 'case:concept:name'
+DELTA_Y = 'cumulative_cost'
+DELTA_X = 'timestamp_minutes'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+def stage_prepare_data(context):
+    context['df'], context['case_index'] = prepare_data(context['log'], CASE_ID_COLUMN, with_case_index=True,
+                                                        value_columns=[DELTA_Y, DELTA_X, 'rounded_time'])
+    return context['df']
+
+def stage_calculate_roc_grouped(context):
+    context['roc'] = calculate_roc_grouped(context['df'], DELTA_Y, DELTA_X, CASE_ID_COLUMN, _no_discards())
+    return context['roc']
+
+def stage_calculate_roc_per_trace(context):
+    if context['cases'] > context['args'].per_trace_limit:
+        return None
+    return calculate_roc_all_traces(context['df'], DELTA_Y, DELTA_X, CASE_ID_COLUMN, engine='per_trace',
+                                    case_index=context['case_index'], discarded_events=_no_discards())
+
+def stage_calculate_roc_parallel(context):
+    return calculate_roc_parallel(context['df'], DELTA_Y, DELTA_X, CASE_ID_COLUMN, context['args'].workers,
+                                  _no_discards())
+
+def stage_calculate_roc_batch(context):
+    return calculate_roc_batch(context['df'], [DELTA_Y, 'frequency'], [DELTA_X, 'rounded_time'], CASE_ID_COLUMN,
+                               discarded_events=_no_discards())
+
+def stage_calculate_roc_selected_traces(context):
+    return calculate_roc_selected_traces(context['df'], context['sample_cases'], DELTA_Y, DELTA_X, CASE_ID_COLUMN,
+                                         context['case_index'], _no_discards())
+
+def stage_calculate_roc_single_trace(context):
+    return calculate_roc_single_trace(context['df'], context['sample_cases'][0], DELTA_Y, DELTA_X, CASE_ID_COLUMN,
+                                      context['case_index'], _no_discards())
+
+def stage_calculate_roc_out_of_core(context):
+    return calculate_roc_out_of_core(context['log'], DELTA_Y, DELTA_X, CASE_ID_COLUMN,
+                                     partitions=context['args'].partitions, discarded_events=_no_discards())
+
+def stage_plot_traces(context):
+    return build_traces_figure(context['roc'], DELTA_X, 'ROC', CASE_ID_COLUMN, "ROC", "ROC").data
+
+def stage_load_event_log(context):
+    context['event_log'] = load_event_log(context['log'])
+    return context['event_log']
+
+def stage_compute_metrics(context):
+    return compute_metrics(context['event_log'])['cases']
+
+# Stages run in this order; REQUIRED_STAGES lists the earlier stages whose results they use.
+STAGES = {
+    'prepare_data': stage_prepare_data,
+    'calculate_roc_grouped': stage_calculate_roc_grouped,
+    'calculate_roc_per_trace': stage_calculate_roc_per_trace,
+    'calculate_roc_parallel': stage_calculate_roc_parallel,
+    'calculate_roc_batch': stage_calculate_roc_batch,
+    'calculate_roc_selected_traces': stage_calculate_roc_selected_traces,
+    'calculate_roc_single_trace': stage_calculate_roc_single_trace,
+    'calculate_roc_out_of_core': stage_calculate_roc_out_of_core,
+    'plot_traces': stage_plot_traces,
+    'load_event_log': stage_load_event_log,
+    'compute_metrics': stage_compute_metrics,
+}
+REQUIRED_STAGES = {
+    **{stage: ['prepare_data'] for stage in STAGES
+       if stage.startswith('calculate_roc') and stage != 'calculate_roc_out_of_core'},
+    'plot_traces': ['prepare_data', 'calculate_roc_grouped'],
+    'compute_metrics': ['load_event_log'],
+}
+
+def _no_discards():
+    return DiscardedEventsCollector('none')
+
+def run_stage(stage, context, repeat, memory):
+    """
+    Runs a stage repeat times and once more under tracemalloc.
+
+    Returns:
+        dict: Best time in seconds, peak traced memory in MiB (None without memory) and
+            output rows, or None when the stage skipped this log.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        output = STAGES[stage](context)
+        best = min(best, time.perf_counter() - start)
+        if output is None:
+            return None
+
+    peak_mib = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        STAGES[stage](context)
+        peak_mib = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    return {'seconds': best, 'peak_mib': peak_mib, 'rows': len(output)}
+
+def synthetic_log_path(log_dir, events, args):
+    name = (f"orders_{events}_{args.case_length}_{args.mean_case_length:g}"
+            f"_{args.duplicate_rate:g}_{args.seed}.csv")
+    path = Path(log_dir) / name
+    if not path.exists():
+        print(f"Generating {path} ...")
+        write_synthetic_log(str(path), events, args.case_length, args.mean_case_length,
+                            args.duplicate_rate, args.seed)
+    return path
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(baseline, current, tolerance=0.1):
+    """
+    Prints the time and peak memory of every stage against a baseline results file,
+    flagging stages more than tolerance slower.
+    """
+    previous = {(result['events'], result['stage']): result for result in baseline['results']}
+    print(f"\nCompared with {baseline.get('commit')} ({baseline.get('created')}):")
+    print(f"{'events':>12}  {'stage':<32}{'before (s)':>11}{'now (s)':>10}{'ratio':>8}"
+          f"{'before (MiB)':>14}{'now (MiB)':>11}")
+    for result in current['results']:
+        before = previous.get((result['events'], result['stage']))
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+        flag = '  slower' if ratio > 1 + tolerance else ''
+        print(f"{result['events']:>12,}  {result['stage']:<32}{before['seconds']:>11.3f}"
+              f"{result['seconds']:>10.3f}{ratio:>8.2f}{_mib(before['peak_mib']):>14}{_mib(result['peak_mib']):>11}{flag}")
+
+def _mib(value):
+    return f"{value:.1f}" if value is not None else '-'
+
+def main():
+    parser = argparse.ArgumentParser(description="ROC pipeline benchmark suite")
+    parser.add_argument('--events', type=lambda value: int(float(value)), nargs='+', default=[10**4, 10**5, 10**6])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--case_length', choices=CASE_LENGTHS, default='geometric')
+    parser.add_argument('--mean_case_length', type=float, default=3.3)
+    parser.add_argument('--duplicate_rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--log_dir', default=str(Path(__file__).resolve().parent / 'data'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no_memory', action='store_true', help='Skip the tracemalloc runs')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--partitions', type=int, default=4)
+    parser.add_argument('--per_trace_limit', type=int, default=5_000,
+                        help='Skip the per-trace engine on logs with more cases')
+    parser.add_argument('--selected_cases', type=int, default=100)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None, help='Earlier results file to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1)
+    args = parser.parse_args()
+
+    needed = set(args.stages).union(*(REQUIRED_STAGES.get(stage, []) for stage in args.stages))
+    stages = [stage for stage in STAGES if stage in needed]
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.platform(),
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'log_dir')},
+        'results': [],
+    }
+
+    print(f"{'events':>12}{'cases':>10}  {'stage':<32}{'time (s)':>10}{'peak (MiB)':>12}{'rows':>12}")
+    for events in args.events:
+        context = {'log': str(synthetic_log_path(args.log_dir, events, args)), 'args': args}
+        for stage in stages:
+            if stage not in args.stages:
+                STAGES[stage](context)
+                result = None
+            else:
+                result = run_stage(stage, context, args.repeat, not args.no_memory)
+
+            if stage == 'prepare_data':
+                cases = context['df'][CASE_ID_COLUMN].unique()
+                context['cases'] = len(cases)
+                context['sample_cases'] = list(pd.Series(cases).sample(min(args.selected_cases, len(cases)),
+                                                                       random_state=args.seed))
+            if stage not in args.stages:
+                continue
+            if result is None:
+                print(f"{events:>12,}{context.get('cases', 0):>10,}  {stage:<32}{'skipped':>10}")
+                continue
+
+            report['results'].append({'events': events, 'cases': context.get('cases'), 'stage': stage, **result})
+            print(f"{events:>12,}{context.get('cases', 0):>10,}  {stage:<32}{result['seconds']:>10.3f}"
+                  f"{_mib(result['peak_mib']):>12}{result['rows']:>12,}")
+
+    output = Path(args.output or RESULTS_DIR / f"suite_{commit or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare_results(json.loads(Path(args.compare).read_text()), report, args.tolerance)
+
+if __name__ == "__main__":
+    main()
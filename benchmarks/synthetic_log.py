@@ -0,0 +1,169 @@
+"""
+Generates synthetic event logs with the schema of logs/orders_log.csv at any size.
+
+Every case places an order, confirms it, receives payment reminders and pays;
+the number of events per case follows the chosen distribution. A share of the
+events is recorded twice (same activity, timestamp and cumulative cost), which
+the ROC calculators discard as duplicates. Logs are written in blocks of
+cases, so sizes up to 10^8 events never have to fit in memory; rows are in
+time order within each block.
+
+Usage:
+    python -m benchmarks.synthetic_log --events 1e6 --output benchmarks/data/orders_1e6.csv
+        [--case_length geometric] [--mean_case_length 3.3] [--duplicate_rate 0.01] [--seed 0]
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pathlib import Path
+
+ACTIVITIES = np.array(['place order', 'confirm order', 'payment reminder', 'pay order'], dtype=object)
+ACTIVITY_COSTS = np.array([0, 1, 2, 1])
+CASE_LENGTHS = ('fixed', 'geometric', 'lognormal', 'uniform')
+COLUMNS = ['ocel:eid', 'time:timestamp', 'concept:name', 'case:concept:name', 'case:role', 'case:weight',
+           'case:price', 'case:ocel:type', 'event_cost', 'cumulative_cost']
+START = pd.Timestamp('2023-04-01', tz='UTC')
+
+def case_lengths(rng: np.random.Generator, cases: int, distribution: str = 'geometric', mean: float = 3.3) -> np.ndarray:
+    """
+    Draws the number of events of every case, at least 1, with the given mean.
+
+    Raises:
+        ValueError: If the distribution is unknown.
+    """
+    extra = max(mean - 1, 0.0)
+    if distribution == 'fixed':
+        lengths = np.full(cases, round(extra))
+    elif distribution == 'geometric':
+        lengths = rng.geometric(1 / (extra + 1), size=cases) - 1
+    elif distribution == 'lognormal':
+        sigma = 1.0
+        lengths = np.rint(rng.lognormal(np.log(extra + 1) - sigma ** 2 / 2, sigma, size=cases)) - 1
+    elif distribution == 'uniform':
+        lengths = rng.integers(0, int(round(2 * extra)) + 1, size=cases)
+    else:
+        raise ValueError(f"Unknown case length distribution: {distribution}")
+    return np.maximum(lengths, 0).astype(np.int64) + 1
+
+def generate_cases(rng: np.random.Generator, first_case: int, lengths: np.ndarray, first_event: int = 0,
+                   duplicate_rate: float = 0.0, span_days: float = 450, mean_gap_hours: float = 24) -> DataFrame:
+    """
+    Generates the events of len(lengths) consecutive cases, sorted by time.
+
+    Args:
+        rng (np.random.Generator): Source of randomness.
+        first_case (int): Number of the first case, used in the case IDs.
+        lengths (np.ndarray): Number of events of every case.
+        first_event (int): Number of the first event, used in the event IDs.
+        duplicate_rate (float): Share of the events after the first of a case recorded as a duplicate.
+        span_days (float): Cases start uniformly within this many days.
+        mean_gap_hours (float): Mean time between two events of a case.
+
+    Returns:
+        DataFrame: The events, with the columns and the timestamp strings of logs/orders_log.csv.
+    """
+    cases = len(lengths)
+    starts = np.cumsum(lengths) - lengths
+    case_of_event = np.repeat(np.arange(cases), lengths)
+    position = np.arange(lengths.sum()) - np.repeat(starts, lengths)
+    is_last = position == np.repeat(lengths, lengths) - 1
+
+    activity = np.full(len(position), 2)
+    activity[position == 0] = 0
+    activity[position == 1] = 1
+    activity[is_last & (position >= 2)] = 3
+
+    gaps = rng.exponential(mean_gap_hours * 3600, size=len(position)).astype(np.int64)
+    gaps[position == 0] = (rng.random(cases) * span_days * 86400).astype(np.int64)
+    cost = ACTIVITY_COSTS[activity]
+
+    duplicated = (position > 0) & (rng.random(len(position)) < duplicate_rate)
+    if duplicated.any():
+        gaps[duplicated] = 0
+        cost[duplicated] = 0
+        # Runs of duplicates repeat the last event recorded before them.
+        source = np.where(duplicated, 0, np.arange(len(position)))
+        activity = activity[np.maximum.accumulate(source)]
+
+    seconds = _cumsum_per_case(gaps, starts, lengths)
+    cumulative_cost = _cumsum_per_case(cost, starts, lengths)
+
+    order = np.argsort(seconds, kind='stable')
+    case_of_event, activity, cost, cumulative_cost = (case_of_event[order], activity[order],
+                                                      cost[order], cumulative_cost[order])
+    case_ids = pd.Series(np.arange(first_case, first_case + cases)).astype(str).str.zfill(8).radd('o-').to_numpy()
+
+    return DataFrame({
+        'ocel:eid': pd.Series(first_event + order).astype(str).radd('e-'),
+        'time:timestamp': _format_timestamps(seconds[order]),
+        'concept:name': ACTIVITIES[activity],
+        'case:concept:name': case_ids[case_of_event],
+        'case:role': np.nan,
+        'case:weight': np.nan,
+        'case:price': np.round(rng.lognormal(7.5, 0.7, size=cases), 2)[case_of_event],
+        'case:ocel:type': 'orders',
+        'event_cost': cost,
+        'cumulative_cost': cumulative_cost,
+    }, columns=COLUMNS)
+
+def _format_timestamps(seconds: np.ndarray) -> pd.Series:
+    # Same format as logs/orders_log.csv, e.g. 2023-04-03 12:08:18+00:00.
+    iso = np.datetime_as_string(START.tz_localize(None).to_datetime64() + seconds.astype('timedelta64[s]'), unit='s')
+    return pd.Series(iso).str.replace('T', ' ', regex=False) + '+00:00'
+
+def _cumsum_per_case(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    totals = np.cumsum(values)
+    return totals - np.repeat(totals[starts] - values[starts], lengths)
+
+def iter_synthetic_log(events: int, case_length: str = 'geometric', mean_case_length: float = 3.3,
+                       duplicate_rate: float = 0.01, seed: int = 0, block_events: int = 1_000_000):
+    """
+    Yields blocks of a synthetic log with exactly events events, each block about block_events long.
+    """
+    rng = np.random.default_rng(seed)
+    written, next_case = 0, 0
+    while written < events:
+        wanted = min(block_events, events - written)
+        lengths = case_lengths(rng, max(int(wanted / mean_case_length * 1.1), 1), case_length, mean_case_length)
+        lengths = lengths[:np.searchsorted(np.cumsum(lengths), wanted) + 1]
+        lengths[-1] -= max(lengths.sum() - wanted, 0)
+
+        yield generate_cases(rng, next_case, lengths, written, duplicate_rate)
+        written += int(lengths.sum())
+        next_case += len(lengths)
+
+def synthetic_log(events: int, case_length: str = 'geometric', mean_case_length: float = 3.3,
+                  duplicate_rate: float = 0.01, seed: int = 0) -> DataFrame:
+    """
+    Returns a synthetic log of the given number of events in memory, see iter_synthetic_log.
+    """
+    return pd.concat(iter_synthetic_log(events, case_length, mean_case_length, duplicate_rate, seed), ignore_index=True)
+
+def write_synthetic_log(path: str, events: int, case_length: str = 'geometric', mean_case_length: float = 3.3,
+                        duplicate_rate: float = 0.01, seed: int = 0, block_events: int = 1_000_000) -> None:
+    """
+    Writes a synthetic log to a CSV file one block at a time, see iter_synthetic_log.
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', newline='') as output:
+        for number, block in enumerate(iter_synthetic_log(events, case_length, mean_case_length,
+                                                          duplicate_rate, seed, block_events)):
+            block.to_csv(output, header=number == 0, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic orders log generator")
+    parser.add_argument('--events', type=lambda value: int(float(value)), required=True)
+    parser.add_argument('--output', required=True)
+    parser.add_argument('--case_length', choices=CASE_LENGTHS, default='geometric')
+    parser.add_argument('--mean_case_length', type=float, default=3.3)
+    parser.add_argument('--duplicate_rate', type=float, default=0.01)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    write_synthetic_log(args.output, args.events, args.case_length, args.mean_case_length,
+                        args.duplicate_rate, args.seed)
+    print(f"Wrote {args.events:,} events to {args.output}")
+
+if __name__ == "__main__":
+    main()
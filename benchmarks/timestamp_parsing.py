@@ -0,0 +1,48 @@
+"""
+Reports timestamp parse throughput (rows/s) for every log in logs/.
+
+Compares pd.to_datetime with format inference, the errors='coerce' call used by
+the metric scripts, and the shared parser of process_roc.timestamps.
+
+Usage:
+    python -m benchmarks.timestamp_parsing [--copies 20] [--repeat 3]
+"""
+import argparse
+import time
+import pandas as pd
+from process_roc.timestamps import parse_timestamps
+
+LOGS = ['logs/orders_log.csv', 'logs/customers_log.csv', 'logs/employees_log.csv', 'logs/packages_log.csv']
+
+PARSERS = {
+    'to_datetime': lambda values: pd.to_datetime(values),
+    "to_datetime coerce": lambda values: pd.to_datetime(values, errors='coerce'),
+    'parse_timestamps': lambda values: parse_timestamps(values),
+    'parse_timestamps ns': lambda values: parse_timestamps(values, as_epoch_ns=True),
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Timestamp parsing benchmark")
+    parser.add_argument('--timestamp_column', default='time:timestamp')
+    parser.add_argument('--copies', type=int, default=20, help='Times each log column is repeated')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'log':<26}{'rows':>10}" + ''.join(f"{name:>22}" for name in PARSERS))
+    for log_file in LOGS:
+        values = pd.read_csv(log_file, usecols=[args.timestamp_column])[args.timestamp_column]
+        values = pd.concat([values] * args.copies, ignore_index=True)
+
+        throughputs = []
+        for parse in PARSERS.values():
+            best = float('inf')
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                parse(values)
+                best = min(best, time.perf_counter() - start)
+            throughputs.append(len(values) / best)
+
+        print(f"{log_file:<26}{len(values):>10,}" + ''.join(f"{rows:>22,.0f}" for rows in throughputs))
+
+if __name__ == "__main__":
+    main()
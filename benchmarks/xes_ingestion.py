@@ -0,0 +1,42 @@
+"""
+Compares XES and CSV ingestion through prepare_data.
+
+Usage:
+    python -m benchmarks.xes_ingestion [--log logs/employees_log] [--repeat 3]
+"""
+import argparse
+import time
+import tracemalloc
+from process_roc.preprocessing import prepare_data
+
+def measure(log_file: str, case_id_column: str, repeat: int):
+    """
+    Returns the best wall time (s), the peak traced memory (MiB) and the row count of prepare_data.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = prepare_data(log_file, case_id_column)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    prepare_data(log_file, case_id_column)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak / 2**20, len(df)
+
+def main():
+    parser = argparse.ArgumentParser(description="XES vs CSV ingestion benchmark")
+    parser.add_argument('--log', default='logs/employees_log', help='Log path without extension')
+    parser.add_argument('--case_id_column', default='case:concept:name')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'format':<8}{'rows':>10}{'time (s)':>12}{'rows/s':>14}{'peak (MiB)':>14}")
+    for extension in ('csv', 'xes'):
+        seconds, peak, rows = measure(f"{args.log}.{extension}", args.case_id_column, args.repeat)
+        print(f"{extension:<8}{rows:>10}{seconds:>12.3f}{rows / seconds:>14,.0f}{peak:>14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+import argparse
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from typing import Dict, List, Tuple
+from metrics_roc.periods import Period
+
+# Scales the median absolute deviation to the standard deviation of normal data.
+MAD_SCALE = 1.4826
+
+def daily_series(metrics: Dict[str, DataFrame], value_column: str = 'ROC', date_column: str = 'Date') -> DataFrame:
+    """
+    Aligns daily metric frames, e.g. from compute_metrics, into one frame with a
+    column per metric and a row per calendar day. Days without data are NaN.
+
+    Args:
+        metrics (Dict[str, DataFrame]): Daily frames keyed by series name.
+        value_column (str): Column holding the series values.
+        date_column (str): Column holding the day of each row.
+
+    Returns:
+        DataFrame: The series side by side, on a continuous DatetimeIndex.
+    """
+    series = pd.concat({name: daily.set_index(pd.to_datetime(daily[date_column]))[value_column]
+                        for name, daily in metrics.items() if value_column in daily}, axis=1)
+    if series.empty:
+        return series
+    return series.reindex(pd.date_range(series.index.min(), series.index.max(), freq='D'))
+
+def _nanmedian(windows: np.ndarray) -> np.ndarray:
+    """
+    Median of the non-missing values along the last axis, NaN where all are missing.
+    """
+    ordered = np.sort(windows, axis=-1)
+    count = np.count_nonzero(~np.isnan(windows), axis=-1)
+    low = np.take_along_axis(ordered, np.maximum(count - 1, 0)[..., None] // 2, axis=-1)[..., 0]
+    high = np.take_along_axis(ordered, count[..., None] // 2, axis=-1)[..., 0]
+    return np.where(count > 0, (low + high) / 2, np.nan)
+
+def rolling_median_mad(series: DataFrame, window: int = 28, min_periods: int = 7,
+                       block_days: int = 256) -> Tuple[DataFrame, DataFrame]:
+    """
+    Computes, for every day, the median of the preceding window days of its series and the
+    median absolute deviation (MAD) of those same days from that median.
+
+    The windows are sliding views of the series, sorted block_days rows at a time, so
+    memory stays bounded by block_days x series x window values.
+
+    Args:
+        series (DataFrame): One column per series, one row per day.
+        window (int): Number of preceding days in the baseline.
+        min_periods (int): Minimum number of non-missing baseline days; other days get NaN.
+        block_days (int): Number of days whose windows are sorted at once.
+
+    Returns:
+        Tuple[DataFrame, DataFrame]: The baseline medians and MADs, shaped like series.
+    """
+    values = series.to_numpy(dtype=float)
+    padded = np.vstack([np.full((window, values.shape[1]), np.nan), values])
+    # The window of day t holds the days t - window to t - 1.
+    windows = np.lib.stride_tricks.sliding_window_view(padded, window, axis=0)[:len(values)]
+
+    center = np.full(values.shape, np.nan)
+    mad = np.full(values.shape, np.nan)
+    for start in range(0, len(values), block_days):
+        block = windows[start:start + block_days]
+        enough = np.count_nonzero(~np.isnan(block), axis=-1) >= min_periods
+        block_center = _nanmedian(block)
+        center[start:start + block_days] = np.where(enough, block_center, np.nan)
+        mad[start:start + block_days] = np.where(enough, _nanmedian(np.abs(block - block_center[..., None])), np.nan)
+
+    return (DataFrame(center, index=series.index, columns=series.columns),
+            DataFrame(mad, index=series.index, columns=series.columns))
+
+def rolling_zscores(series: DataFrame, window: int = 28, min_periods: int = 7, robust: bool = True) -> DataFrame:
+    """
+    Scores every day against the preceding window days of its own series, for all series at once.
+
+    Args:
+        series (DataFrame): One column per series, one row per day.
+        window (int): Number of preceding days in the baseline.
+        min_periods (int): Minimum number of non-missing baseline days to score a day.
+        robust (bool): Use the median and the scaled median absolute deviation (MAD) of the
+            baseline, which single spikes do not distort, see rolling_median_mad. Otherwise
+            use the mean and standard deviation, which is faster.
+
+    Returns:
+        DataFrame: The z-scores, NaN where the baseline is too short or flat.
+    """
+    if robust:
+        center, mad = rolling_median_mad(series, window, min_periods)
+        scale = mad * MAD_SCALE
+    else:
+        baseline = series.shift(1).rolling(window, min_periods=min_periods)
+        center = baseline.mean()
+        scale = baseline.std()
+    return (series - center) / scale.where(scale > 0)
+
+def flags_to_periods(flags: DataFrame, max_gap: int = 3, min_days: int = 1) -> Dict[str, List[Period]]:
+    """
+    Turns runs of flagged days into periods, for every series at once.
+
+    Args:
+        flags (DataFrame): Boolean flags, one column per series, on a continuous daily DatetimeIndex.
+        max_gap (int): Runs separated by at most this many unflagged days are merged.
+        min_days (int): Shortest period kept, in days.
+
+    Returns:
+        Dict[str, List[Period]]: Periods of every series, from the start of their first
+            day to the end of their last day, usable with PeriodFilter and period_breakdown.
+    """
+    days = flags.index
+    flagged = np.zeros((len(days) + 2, flags.shape[1]), dtype=np.int8)
+    flagged[1:-1] = flags.fillna(False).to_numpy(dtype=bool)
+
+    # Runs are located on the column-major layout so they come out ordered by series, then by day.
+    edges = np.diff(flagged, axis=0).T
+    series_of_start, run_start = np.nonzero(edges == 1)
+    _, run_stop = np.nonzero(edges == -1)
+
+    new_period = np.ones(len(run_start), dtype=bool)
+    new_period[1:] = (series_of_start[1:] != series_of_start[:-1]) | (run_start[1:] - run_stop[:-1] > max_gap)
+    first_run = np.flatnonzero(new_period)
+    last_run = np.r_[first_run[1:], len(run_start)] - 1
+
+    periods: Dict[str, List[Period]] = {name: [] for name in flags.columns}
+    for series_number, start, stop in zip(series_of_start[first_run], run_start[first_run], run_stop[last_run]):
+        if stop - start >= min_days:
+            periods[flags.columns[series_number]].append(
+                (f"{days[start]:%Y-%m-%d} 00:00:00+00:00", f"{days[stop - 1]:%Y-%m-%d} 23:59:59+00:00"))
+    return periods
+
+def detect_anomalous_periods(series: DataFrame, window: int = 28, threshold: float = 3.5, min_periods: int = 7,
+                             max_gap: int = 3, min_days: int = 1, robust: bool = True) -> Dict[str, List[Period]]:
+    """
+    Detects anomalous periods in many daily series with rolling z-scores.
+
+    A day is anomalous when its value is more than threshold scaled MADs (or standard
+    deviations) away from the median (or mean) of the preceding window days; nearby
+    anomalous days are merged into periods.
+
+    Args:
+        series (DataFrame): One column per series on a daily index, e.g. from daily_series.
+        window (int): Number of preceding days in the baseline.
+        threshold (float): Robust z-score above which a day is anomalous.
+        min_periods (int): Minimum number of baseline days to score a day.
+        max_gap (int): Anomalous days separated by at most this many days share a period.
+        min_days (int): Shortest period kept, in days.
+        robust (bool): Score with the median/MAD rather than the mean/standard deviation.
+
+    Returns:
+        Dict[str, List[Period]]: Anomalous periods of every series.
+    """
+    flags = rolling_zscores(series, window, min_periods, robust).abs() > threshold
+    return flags_to_periods(flags, max_gap, min_days)
+
+def add_detection_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the options replacing the anomalous periods of a metric script with detected ones.
+    """
+    parser.add_argument('--detect', action='store_true',
+                        help='Detect the anomalous periods in the daily ROC instead of using the listed ones')
+    parser.add_argument('--threshold', type=float, default=3.5,
+                        help='Robust z-score above which a day is anomalous with --detect (default: 3.5)')
+
+def detected_periods(metrics: Dict[str, DataFrame], name: str, threshold: float = 3.5) -> List[Period]:
+    """
+    Detects the anomalous periods in the daily ROC of one metric of compute_metrics.
+
+    Args:
+        metrics (Dict[str, DataFrame]): Daily frames of compute_metrics.
+        name (str): The metric, e.g. cycle_time.
+        threshold (float): Robust z-score above which a day is anomalous.
+
+    Returns:
+        List[Period]: The anomalous periods, see detect_anomalous_periods.
+    """
+    return detect_anomalous_periods(daily_series({name: metrics[name]}), threshold=threshold)[name]
@@ -0,0 +1,47 @@
+from pandas import DataFrame, Series
+from pandas.core.groupby import SeriesGroupBy
+from typing import List, Union
+
+# Grouped spans are computed with pandas' built-in min/max kernels, which run over
+# the int64 nanosecond representation of the timestamps, instead of a Python
+# callback per group.
+
+def _span_hours(timestamps: SeriesGroupBy) -> Series:
+    return (timestamps.max() - timestamps.min()).dt.total_seconds() / 3600
+
+def span_hours_per_event(df: DataFrame, by: Union[str, List[str]], timestamp_column: str = 'Timestamp') -> Series:
+    """
+    Returns, for every event, the span in hours of the group it belongs to.
+
+    Args:
+        df (DataFrame): Event log with parsed timestamps.
+        by (Union[str, List[str]]): Column(s) defining the groups.
+        timestamp_column (str): Name of the timestamp column.
+
+    Returns:
+        Series: One value per event, aligned with df.
+    """
+    timestamps = df.groupby(by)[timestamp_column]
+    return (timestamps.transform('max') - timestamps.transform('min')).dt.total_seconds() / 3600
+
+def duration_breakdown(df: DataFrame, by: Union[str, List[str]], count_name: str, timestamp_column: str = 'Timestamp',
+                       count_column: str = 'concept:name') -> DataFrame:
+    """
+    Summarizes each group with its TotalDuration (hours between first and last event)
+    and its number of events.
+
+    Args:
+        df (DataFrame): Event log with parsed timestamps.
+        by (Union[str, List[str]]): Column(s) defining the groups, e.g. the activity or the case column.
+        count_name (str): Name of the event count column, e.g. Frequency or ActivityCount.
+        timestamp_column (str): Name of the timestamp column.
+        count_column (str): Column whose non-null values are counted.
+
+    Returns:
+        DataFrame: TotalDuration and count_name per group, indexed by the group keys.
+    """
+    grouped = df.groupby(by)
+    return DataFrame({
+        'TotalDuration': _span_hours(grouped[timestamp_column]),
+        count_name: grouped[count_column].count(),
+    })
@@ -0,0 +1,234 @@
+import argparse
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from typing import Dict, Optional
+from process_roc.resampling import GRANULARITIES, TimeBuckets, bucket_roc, smooth_roc
+from process_roc.timestamps import parse_timestamps
+
+CASE_COLUMN = 'case:concept:name'
+ACTIVITY_COLUMN = 'concept:name'
+TIMESTAMP_COLUMN = 'Timestamp'
+
+LOG_FILE = 'logs/orders_log.csv'
+
+# Per metric: the case timestamp dating a case and the per-case value averaged per bucket,
+# as in daily_metrics.
+METRIC_SOURCES = {
+    'cycle_time': ('StartTimestamp', 'ThroughputTime (hours)'),
+    'throughput_time': ('EndTimestamp', 'ThroughputTime (hours)'),
+    'idle_time': ('StartTimestamp', 'IdleTime (hours)'),
+    'service_time': ('StartTimestamp', 'ServiceTime (hours)'),
+}
+
+# Column holding the average of every metric in its daily frame, see daily_metrics.
+METRIC_COLUMNS = {
+    'cycle_time': 'AverageCycleTime',
+    'throughput_time': 'AverageThroughputTime',
+    'idle_time': 'AverageIdleTime',
+    'service_time': 'AverageServiceTime',
+}
+
+# Names of the series of every granularity in output files, e.g. cycle_time_weekly.
+SERIES_NAMES = {'hour': 'hourly', 'day': 'daily', 'week': 'weekly', 'month': 'monthly'}
+
+def load_event_log(log_file: str, timestamp_source: str = 'time:timestamp',
+                   timestamp_column: str = TIMESTAMP_COLUMN) -> DataFrame:
+    """
+    Reads an event log and parses its timestamps into timestamp_column.
+
+    Args:
+        log_file (str): Path to the CSV log file.
+        timestamp_source (str): Column holding the raw timestamps.
+        timestamp_column (str): Name of the parsed timestamp column.
+
+    Returns:
+        DataFrame: The event log; unparseable timestamps become NaT.
+    """
+    event_log = pd.read_csv(log_file)
+    event_log[timestamp_column] = parse_timestamps(event_log[timestamp_source], errors='coerce')
+    return event_log
+
+def case_metrics(event_log: DataFrame, case_column: str = CASE_COLUMN, activity_column: str = ACTIVITY_COLUMN,
+                 timestamp_column: str = TIMESTAMP_COLUMN) -> DataFrame:
+    """
+    Computes the per-case times shared by all metrics from two grouped aggregations:
+    the per-case start/end and the per-(case, activity) spans.
+
+    Args:
+        event_log (DataFrame): Event log with parsed timestamps.
+        case_column (str): Name of the column identifying cases.
+        activity_column (str): Name of the activity column.
+        timestamp_column (str): Name of the parsed timestamp column.
+
+    Returns:
+        DataFrame: One row per case with StartTimestamp, EndTimestamp, ThroughputTime (hours)
+            (also the cycle time), ActiveTime (hours), IdleTime (hours) and ServiceTime (hours).
+    """
+    case_timestamps = event_log.groupby(case_column)[timestamp_column]
+    cases = case_timestamps.agg(StartTimestamp='min', EndTimestamp='max').reset_index()
+    cases['ThroughputTime (hours)'] = (
+        (cases['EndTimestamp'] - cases['StartTimestamp']).dt.total_seconds() / 3600
+    )
+
+    activity_groups = event_log.groupby([case_column, activity_column])
+    activity_timestamps = activity_groups[timestamp_column]
+    activity_hours = (
+        (activity_timestamps.max() - activity_timestamps.min()).dt.total_seconds() / 3600
+    )
+
+    # Active time adds the span of a (case, activity) once per event of that pair, as
+    # the per-event Duration column of the idle time analysis does; service time adds it once.
+    group_numbers = activity_groups.ngroup().to_numpy()
+    event_hours = np.append(activity_hours.to_numpy(), np.nan)[group_numbers]
+    active_hours = pd.Series(event_hours, index=event_log.index).groupby(event_log[case_column]).sum()
+    service_hours = activity_hours.groupby(level=0).sum()
+
+    cases['ActiveTime (hours)'] = cases[case_column].map(active_hours)
+    cases['IdleTime (hours)'] = cases['ThroughputTime (hours)'] - cases['ActiveTime (hours)']
+    cases['ServiceTime (hours)'] = cases[case_column].map(service_hours)
+    return cases
+
+def daily_metrics(cases: DataFrame) -> Dict[str, DataFrame]:
+    """
+    Derives the daily cycle, throughput, idle and service time series and their
+    day-over-day ROC from the per-case times of case_metrics.
+
+    Returns:
+        Dict[str, DataFrame]: Daily frames keyed by 'cycle_time', 'throughput_time',
+            'idle_time' and 'service_time'.
+    """
+    start_date = cases['StartTimestamp'].dt.date
+    end_date = cases['EndTimestamp'].dt.date
+
+    cycle_time = (cases['ThroughputTime (hours)'].groupby(start_date.rename('Date'))
+                  .mean()
+                  .reset_index(name='AverageCycleTime'))
+    cycle_time['ROC'] = cycle_time['AverageCycleTime'].diff() / 1
+
+    throughput_time = (cases['ThroughputTime (hours)'].groupby(end_date.rename('Date'))
+                       .agg(TotalThroughputTime='sum', NumberOfCases='count')
+                       .reset_index())
+    throughput_time['AverageThroughputTime'] = (
+        throughput_time['TotalThroughputTime'] / throughput_time['NumberOfCases']
+    )
+    throughput_time['ROC'] = throughput_time['AverageThroughputTime'].diff()
+
+    idle_time = (cases['IdleTime (hours)'].groupby(start_date.rename('Date'))
+                 .mean()
+                 .reset_index(name='AverageIdleTime'))
+    idle_time['ROC'] = idle_time['AverageIdleTime'].diff()
+
+    service_time = (cases['ServiceTime (hours)'].groupby(start_date.rename('Date'))
+                    .agg(AverageServiceTime='mean', CaseCount='count')
+                    .reset_index())
+    service_time['ROC'] = service_time['AverageServiceTime'].diff()
+
+    return {
+        'cycle_time': cycle_time,
+        'throughput_time': throughput_time,
+        'idle_time': idle_time,
+        'service_time': service_time,
+    }
+
+def compute_metrics(event_log: DataFrame, case_column: str = CASE_COLUMN, activity_column: str = ACTIVITY_COLUMN,
+                    timestamp_column: str = TIMESTAMP_COLUMN) -> Dict[str, DataFrame]:
+    """
+    Computes all daily metric series of an event log in one pass over its grouped aggregates.
+
+    Args:
+        event_log (DataFrame): Event log with parsed timestamps, e.g. from load_event_log.
+        case_column (str): Name of the column identifying cases.
+        activity_column (str): Name of the activity column.
+        timestamp_column (str): Name of the parsed timestamp column.
+
+    Returns:
+        Dict[str, DataFrame]: The daily frames of daily_metrics plus the per-case table under 'cases'.
+    """
+    cases = case_metrics(event_log, case_column, activity_column, timestamp_column)
+    metrics = daily_metrics(cases)
+    metrics['cases'] = cases
+    return metrics
+
+class MetricBuckets:
+    """
+    The four metrics bucketed at any granularity, with ROC over configurable lags and windows.
+
+    The cases are aggregated into hourly buckets once, by start and by end time;
+    coarser buckets are rolled up from them and kept (see TimeBuckets).
+
+    Args:
+        cases (DataFrame): Per-case table from case_metrics.
+    """
+
+    def __init__(self, cases: DataFrame) -> None:
+        self._buckets = {}
+        for timestamp_column in dict.fromkeys(source for source, _ in METRIC_SOURCES.values()):
+            value_columns = [value for source, value in METRIC_SOURCES.values() if source == timestamp_column]
+            self._buckets[timestamp_column] = TimeBuckets(cases, timestamp_column, list(dict.fromkeys(value_columns)))
+
+    def roc(self, granularity: str = 'day', lag: int = 1, window: int = 1,
+            ewm_span: Optional[float] = None) -> Dict[str, DataFrame]:
+        """
+        Returns the mean of every metric per non-empty bucket with its ROC, see bucket_roc.
+
+        Args:
+            granularity (str): hour, day, week or month.
+            lag (int): Number of buckets between the two values of a difference.
+            window (int): Adds ROC_smoothed, the rolling mean of the ROC over this many buckets.
+            ewm_span (Optional[float]): Adds ROC_ewm, the exponentially weighted mean of the ROC.
+
+        Returns:
+            Dict[str, DataFrame]: One frame per metric, indexed by bucket start.
+        """
+        return {
+            name: bucket_roc(self._buckets[timestamp_column].at(granularity)[value_column], lag, window, ewm_span)
+            for name, (timestamp_column, value_column) in METRIC_SOURCES.items()
+        }
+
+def add_log_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the --log_file option choosing the CSV event log of a metric script.
+    """
+    parser.add_argument('--log_file', '--log-file', default=LOG_FILE,
+                        help=f'Path to the CSV event log, relative to the working directory (default: {LOG_FILE})')
+
+def add_series_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    Adds the options choosing the buckets and the ROC of a metric series to the parser of a metric script.
+    """
+    parser.add_argument('--granularity', choices=GRANULARITIES, default='day',
+                        help='Bucket size of the metric series (default: day)')
+    parser.add_argument('--lag', type=int, default=1,
+                        help='Number of buckets between the two values of each ROC (default: 1)')
+    parser.add_argument('--smooth', type=int, default=1,
+                        help='Also plot the rolling mean of the ROC over this many buckets (default: 1, off)')
+    parser.add_argument('--ewm_span', '--ewm-span', type=float, default=None,
+                        help='Also plot the exponentially weighted mean of the ROC with this span (default: off)')
+
+def metric_series(metrics: Dict[str, DataFrame], name: str, granularity: str = 'day', lag: int = 1, smooth: int = 1,
+                  ewm_span: Optional[float] = None) -> DataFrame:
+    """
+    Returns a metric per bucket with its ROC, as plotted by the metric scripts.
+
+    At day granularity with lag 1 this is the daily frame of compute_metrics; other
+    granularities and lags are rolled up from the hourly buckets of MetricBuckets.
+
+    Args:
+        metrics (Dict[str, DataFrame]): Output of compute_metrics.
+        name (str): cycle_time, throughput_time, idle_time or service_time.
+        granularity (str): hour, day, week or month.
+        lag (int): Number of buckets between the two values of a difference.
+        smooth (int): Adds ROC_smoothed, the rolling mean of the ROC over this many buckets.
+        ewm_span (Optional[float]): Adds ROC_ewm, the exponentially weighted mean of the ROC.
+
+    Returns:
+        DataFrame: Date (the start of every bucket), the average column of the daily frame
+            (see METRIC_COLUMNS), ROC and the requested smoothed columns.
+    """
+    if granularity == 'day' and lag == 1:
+        daily = metrics[name]
+        return daily.join(smooth_roc(daily['ROC'], smooth, ewm_span))
+
+    series = MetricBuckets(metrics['cases']).roc(granularity, lag, smooth, ewm_span)[name]
+    return series.rename(columns={series.columns[0]: METRIC_COLUMNS[name]}).rename_axis('Date').reset_index()
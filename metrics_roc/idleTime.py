@@ -1,50 +1,41 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import argparse
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a file (python metrics_roc/idleTime.py): make the repository root importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics_roc.anomalies import add_detection_arguments, detected_periods
+from metrics_roc.durations import duration_breakdown
+from metrics_roc.engine import SERIES_NAMES, add_log_arguments, add_series_arguments, compute_metrics, load_event_log, metric_series
+from metrics_roc.periods import PeriodFilter, period_breakdown
+from process_roc.output import ResultWriter, add_output_arguments, figures_requested, load_pyplot
+from process_roc.resampling import SMOOTHED_ROC_COLUMNS
 
 # -------------------------------------------------------
 #                       IDLE TIME
 # -------------------------------------------------------
 
-log_file = "logs/orders_log.csv"
-event_log = pd.read_csv(log_file)
-
-event_log['Timestamp'] = pd.to_datetime(event_log['time:timestamp'], errors='coerce')
-
-throughput_times = (event_log.groupby('case:concept:name')['Timestamp']
-                        .agg(StartTimestamp='min', EndTimestamp='max')
-                        .reset_index())
-
-throughput_times['ThroughputTime (hours)'] = (
-    (throughput_times['EndTimestamp'] - throughput_times['StartTimestamp'])
-    .dt.total_seconds() / 3600
-)
-
-event_log['Duration'] = event_log.groupby(['case:concept:name', 'concept:name'])['Timestamp'].transform(
-    lambda x: (x.max() - x.min()).total_seconds() / 3600
-)
+parser = argparse.ArgumentParser(description="Idle time ROC analysis")
+add_log_arguments(parser)
+add_output_arguments(parser)
+add_series_arguments(parser)
+add_detection_arguments(parser)
+args = parser.parse_args()
 
-active_times = (event_log.groupby('case:concept:name')['Duration']
-                .sum()
-                .reset_index(name='ActiveTime (hours)'))
+event_log = load_event_log(args.log_file)
 
-idle_times = throughput_times.merge(active_times, on='case:concept:name')
-idle_times['IdleTime (hours)'] = (
-    idle_times['ThroughputTime (hours)'] - idle_times['ActiveTime (hours)']
-)
+metrics = compute_metrics(event_log)
+idle_times = metrics['cases'][['case:concept:name', 'StartTimestamp', 'EndTimestamp',
+                               'ThroughputTime (hours)', 'ActiveTime (hours)', 'IdleTime (hours)']]
 
 negative_idle = idle_times[idle_times['IdleTime (hours)'] < 0]
 if not negative_idle.empty:
     print("Warning: Negative Idle Times Detected!")
     print(negative_idle)
 
-
-idle_times['Date'] = idle_times['StartTimestamp'].dt.date
-daily_idle = (idle_times.groupby('Date')['IdleTime (hours)']
-              .mean()
-              .reset_index(name='AverageIdleTime'))
-
-daily_idle['ROC'] = daily_idle['AverageIdleTime'].diff()
+daily_idle = metric_series(metrics, 'idle_time', args.granularity, args.lag, args.smooth, args.ewm_span)
 
 # ............................................................
 
@@ -54,13 +45,13 @@ anomalous_periods = [
     ('2023-10-01 00:00:00+00:00', '2023-12-31 23:59:59+00:00'),
     ('2024-02-01 00:00:00+00:00', '2024-04-30 23:59:59+00:00'),
 ]
+if args.detect:
+    anomalous_periods = detected_periods(metrics, 'idle_time', args.threshold)
+    print(f"Detected anomalous periods: {anomalous_periods}")
 
 # Filter event log for these periods
-filtered_logs = []
-for start, end in anomalous_periods:
-    filtered_logs.append(event_log[(event_log['Timestamp'] >= pd.Timestamp(start)) &
-                                   (event_log['Timestamp'] <= pd.Timestamp(end))])
-anomalous_log = pd.concat(filtered_logs)
+period_filter = PeriodFilter(event_log['Timestamp'])
+anomalous_log = period_filter.select(event_log, anomalous_periods)
 
 print("Filtered Event Log for Anomalous Periods:")
 print(anomalous_log.head())
@@ -68,19 +59,13 @@ print(anomalous_log.head())
 # ............................................................
 
 # Group by Activity - Anomalous Periods
-activity_analysis = anomalous_log.groupby('concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    Frequency=('concept:name', 'count')
-).sort_values(by='Frequency', ascending=False)
+activity_analysis = duration_breakdown(anomalous_log, 'concept:name', 'Frequency').sort_values(by='Frequency', ascending=False)
 
 print("Activity Analysis During Anomalous Periods:")
 print(activity_analysis)
 
 # Group by Case - Anomalous Periods
-case_analysis = anomalous_log.groupby('case:concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    ActivityCount=('concept:name', 'count')
-).sort_values(by='TotalDuration', ascending=False)
+case_analysis = duration_breakdown(anomalous_log, 'case:concept:name', 'ActivityCount').sort_values(by='TotalDuration', ascending=False)
 
 print("Case Analysis During Anomalous Periods:")
 print(case_analysis.head())
@@ -89,27 +74,52 @@ print(case_analysis.head())
 
 # VISUALIZATION - Idle Time and Rate of Change (ROC)
 
-fig, ax1 = plt.subplots(figsize=(14, 8))
-
-ax1.set_xlabel('Date')
-ax1.set_ylabel('Average Idle Time (hours)', color='blue')
-ax1.plot(daily_idle['Date'], daily_idle['AverageIdleTime'], label='Avg Idle Time', color='blue', marker='o')
-ax1.tick_params(axis='y', labelcolor='blue')
-ax1.tick_params(axis='x', rotation=45)
-
-ax2 = ax1.twinx()
-ax2.set_ylabel('ROC (hours/day)', color='red')
-ax2.plot(daily_idle['Date'], daily_idle['ROC'], label='ROC', color='red', linestyle='--', marker='x')
-ax2.tick_params(axis='y', labelcolor='red')
-
-ax1.xaxis.set_major_locator(mdates.MonthLocator()) 
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))  
-
-plt.title('Average Idle Time and Rate of Change (ROC)')
-ax1.legend(loc='upper left')
-ax2.legend(loc='upper right')
-ax1.grid(True)
-fig.tight_layout()
-plt.show()
+fig = None
+if figures_requested(args):
+    plt = load_pyplot(headless=bool(args.output_dir) and not args.show)
+    import matplotlib.dates as mdates
+
+    fig, ax1 = plt.subplots(figsize=(14, 8))
+
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('Average Idle Time (hours)', color='blue')
+    ax1.plot(daily_idle['Date'], daily_idle['AverageIdleTime'], label='Avg Idle Time', color='blue', marker='o')
+    ax1.tick_params(axis='y', labelcolor='blue')
+    ax1.tick_params(axis='x', rotation=45)
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel(f'ROC (hours/{args.granularity})', color='red')
+    ax2.plot(daily_idle['Date'], daily_idle['ROC'], label='ROC', color='red', linestyle='--', marker='x')
+    for column, label in SMOOTHED_ROC_COLUMNS.items():
+        if column in daily_idle:
+            ax2.plot(daily_idle['Date'], daily_idle[column], label=label)
+    ax2.tick_params(axis='y', labelcolor='red')
+
+    ax1.xaxis.set_major_locator(mdates.MonthLocator())
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+
+    plt.title('Average Idle Time and Rate of Change (ROC)')
+    ax1.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+    ax1.grid(True)
+    fig.tight_layout()
+
+if args.output_dir:
+    # Group by Activity and by Case - each anomalous period on its own, only written to files
+    activity_per_period = period_breakdown(event_log, anomalous_periods, 'concept:name', 'Frequency',
+                                           period_filter=period_filter)
+    case_per_period = period_breakdown(event_log, anomalous_periods, 'case:concept:name', 'ActivityCount',
+                                       period_filter=period_filter)
+    with ResultWriter(args.output_dir, args.format) as output:
+        output.write_table(daily_idle, f'idle_time_{SERIES_NAMES[args.granularity]}')
+        output.write_table(activity_analysis.reset_index(), 'idle_time_activities_anomalous')
+        output.write_table(activity_per_period.reset_index(), 'idle_time_activities_per_period')
+        output.write_table(case_analysis.reset_index(), 'idle_time_cases_anomalous')
+        output.write_table(case_per_period.reset_index(), 'idle_time_cases_per_period')
+        if fig is not None:
+            output.write_figure(fig, 'idle_time_roc')
+
+if fig is not None and (not args.output_dir or args.show):
+    plt.show()
 
 # ............................................................
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from typing import List, Optional, Tuple
+from metrics_roc.durations import duration_breakdown
+
+# (start, end) timestamps of a period, both included, e.g.
+# ('2023-05-01 00:00:00+00:00', '2023-06-30 23:59:59+00:00').
+Period = Tuple[str, str]
+
+PERIOD_COLUMN = 'Period'
+
+class PeriodFilter:
+    """
+    Selects the events of a log that fall in given time periods.
+
+    The event timestamps are sorted once; each set of periods is then matched
+    with a single searchsorted over all period bounds, so the cost of a query
+    grows with the number of matched events rather than with the log size
+    times the number of periods.
+
+    Args:
+        timestamps (Series): Parsed event timestamps. Missing timestamps never match.
+    """
+
+    def __init__(self, timestamps: Series) -> None:
+        epoch_ns = timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+        self._order = np.argsort(epoch_ns, kind='mergesort')
+        self._sorted_ns = epoch_ns[self._order]
+
+    def match(self, periods: List[Period]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the events inside every period.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Row positions of the matching events and the
+                number of the period each one matched. Rows are grouped by period, in the
+                order of periods, and keep the log order within a period; an event in
+                overlapping periods appears once per period.
+        """
+        starts = np.array([pd.Timestamp(start).value for start, _ in periods], dtype=np.int64)
+        ends = np.array([pd.Timestamp(end).value for _, end in periods], dtype=np.int64)
+        first = np.searchsorted(self._sorted_ns, starts, side='left')
+        stop = np.maximum(np.searchsorted(self._sorted_ns, ends, side='right'), first)
+
+        lengths = stop - first
+        labels = np.repeat(np.arange(len(periods)), lengths)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        positions = self._order[np.repeat(first, lengths) + offsets]
+
+        by_period = np.lexsort((positions, labels))
+        return positions[by_period], labels[by_period]
+
+    def select(self, event_log: DataFrame, periods: List[Period], deduplicate: bool = True,
+               period_column: Optional[str] = None) -> DataFrame:
+        """
+        Returns the events of event_log inside the periods.
+
+        Args:
+            event_log (DataFrame): The log whose timestamps built the filter.
+            periods (List[Period]): Periods to select.
+            deduplicate (bool): Keep events in overlapping periods once, under the first
+                period they match. Otherwise every period gets its own copy of them.
+            period_column (Optional[str]): Adds the number of the matched period under this name.
+
+        Returns:
+            DataFrame: The selected events, grouped by period and in log order within a period.
+        """
+        positions, labels = self.match(periods)
+        if deduplicate:
+            first_match = np.sort(np.unique(positions, return_index=True)[1])
+            positions, labels = positions[first_match], labels[first_match]
+
+        selected = event_log.iloc[positions]
+        if period_column is not None:
+            selected = selected.assign(**{period_column: labels})
+        return selected
+
+def period_breakdown(event_log: DataFrame, periods: List[Period], by: str, count_name: str,
+                     timestamp_column: str = 'Timestamp', count_column: str = 'concept:name',
+                     period_filter: Optional[PeriodFilter] = None) -> DataFrame:
+    """
+    Summarizes the groups of by inside every period with one grouped aggregation.
+
+    Args:
+        event_log (DataFrame): Event log with parsed timestamps.
+        periods (List[Period]): Periods to summarize, possibly overlapping.
+        by (str): Column defining the groups, e.g. the activity or the case column.
+        count_name (str): Name of the event count column, e.g. Frequency or ActivityCount.
+        timestamp_column (str): Name of the timestamp column.
+        count_column (str): Column whose non-null values are counted.
+        period_filter (Optional[PeriodFilter]): A filter already built on the timestamps of event_log.
+
+    Returns:
+        DataFrame: TotalDuration and count_name per (Period, group), see duration_breakdown.
+    """
+    if period_filter is None:
+        period_filter = PeriodFilter(event_log[timestamp_column])
+    period_events = period_filter.select(event_log, periods, deduplicate=False, period_column=PERIOD_COLUMN)
+    return duration_breakdown(period_events, [PERIOD_COLUMN, by], count_name, timestamp_column, count_column)
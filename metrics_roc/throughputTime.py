@@ -1,36 +1,34 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
+import argparse
+import sys
+from pathlib import Path
+
+if not __package__:
+    # Run as a file (python metrics_roc/throughputTime.py): make the repository root importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from metrics_roc.anomalies import add_detection_arguments, detected_periods
+from metrics_roc.durations import duration_breakdown
+from metrics_roc.engine import SERIES_NAMES, add_log_arguments, add_series_arguments, compute_metrics, load_event_log, metric_series
+from metrics_roc.periods import PeriodFilter, period_breakdown
+from process_roc.output import ResultWriter, add_output_arguments, figures_requested, load_pyplot
+from process_roc.resampling import SMOOTHED_ROC_COLUMNS
 
 # -------------------------------------------------------
 #                    THROUGHPUT TIME
 # -------------------------------------------------------
 
-log_file = "logs/orders_log.csv"
-event_log = pd.read_csv(log_file)
-
-event_log['Timestamp'] = pd.to_datetime(event_log['time:timestamp'], errors='coerce')
-
-throughput_times = (event_log.groupby('case:concept:name')['Timestamp']
-                        .agg(StartTimestamp='min', EndTimestamp='max')
-                        .reset_index())
-
-throughput_times['ThroughputTime (hours)'] = (
-    (throughput_times['EndTimestamp'] - throughput_times['StartTimestamp'])
-    .dt.total_seconds() / 3600
-)
+parser = argparse.ArgumentParser(description="Throughput time ROC analysis")
+add_log_arguments(parser)
+add_output_arguments(parser)
+add_series_arguments(parser)
+add_detection_arguments(parser)
+args = parser.parse_args()
 
-throughput_times['Date'] = throughput_times['EndTimestamp'].dt.date
-daily_throughput = (throughput_times.groupby('Date')
-                    .agg(TotalThroughputTime=('ThroughputTime (hours)', 'sum'),
-                         NumberOfCases=('ThroughputTime (hours)', 'count'))
-                    .reset_index())
+event_log = load_event_log(args.log_file)
 
-daily_throughput['AverageThroughputTime'] = (
-    daily_throughput['TotalThroughputTime'] / daily_throughput['NumberOfCases']
-)
-
-daily_throughput['ROC'] = daily_throughput['AverageThroughputTime'].diff()
+metrics = compute_metrics(event_log)
+daily_throughput = metric_series(metrics, 'throughput_time', args.granularity, args.lag,
+                                 args.smooth, args.ewm_span)
 
 # ............................................................
 
@@ -41,12 +39,12 @@ anomalous_periods = [
     ('2024-04-01 00:00:00+00:00', '2024-05-30 23:59:59+00:00'),
     ('2024-05-01 00:00:00+00:00', '2024-06-30 23:59:59+00:00')   
 ]
+if args.detect:
+    anomalous_periods = detected_periods(metrics, 'throughput_time', args.threshold)
+    print(f"Detected anomalous periods: {anomalous_periods}")
 
-filtered_logs = []
-for start, end in anomalous_periods:
-    filtered_logs.append(event_log[(event_log['Timestamp'] >= pd.Timestamp(start)) &
-                                   (event_log['Timestamp'] <= pd.Timestamp(end))])
-anomalous_log = pd.concat(filtered_logs)
+period_filter = PeriodFilter(event_log['Timestamp'])
+anomalous_log = period_filter.select(event_log, anomalous_periods)
 
 print("Filtered Event Log for Anomalous Periods:")
 print(anomalous_log.head())
@@ -61,11 +59,7 @@ normal_periods = [
     ('2024-02-01 00:00:00+00:00', '2024-03-30 23:59:59+00:00')   
 ]
 
-filtered_logs = []
-for start, end in normal_periods:
-    filtered_logs.append(event_log[(event_log['Timestamp'] >= pd.Timestamp(start)) &
-                                   (event_log['Timestamp'] <= pd.Timestamp(end))])
-normal_periods = pd.concat(filtered_logs)
+normal_periods = period_filter.select(event_log, normal_periods)
 
 print("Filtered Event Log for Normal Periods:")
 print(normal_periods.head())
@@ -73,37 +67,25 @@ print(normal_periods.head())
 # ............................................................
 
 # Group by Activity - Anomalous Periods
-activity_analysis = anomalous_log.groupby('concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    Frequency=('concept:name', 'count')
-).sort_values(by='Frequency', ascending=False)
+activity_analysis = duration_breakdown(anomalous_log, 'concept:name', 'Frequency').sort_values(by='Frequency', ascending=False)
 
 print("Activity Analysis During Anomalous Periods:")
 print(activity_analysis)
 
 # Group by Activity - Normal Periods
-activity_analysis_n = normal_periods.groupby('concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    Frequency=('concept:name', 'count')
-).sort_values(by='Frequency', ascending=False)
+activity_analysis_n = duration_breakdown(normal_periods, 'concept:name', 'Frequency').sort_values(by='Frequency', ascending=False)
 
 print("Activity Analysis During Normal Periods:")
 print(activity_analysis_n)
 
 # Group by Case - Anomalous Periods
-case_analysis = anomalous_log.groupby('case:concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    ActivityCount=('concept:name', 'count')
-).sort_values(by='TotalDuration', ascending=False)
+case_analysis = duration_breakdown(anomalous_log, 'case:concept:name', 'ActivityCount').sort_values(by='TotalDuration', ascending=False)
 
 print("Case Analysis During Anomalous Periods:")
 print(case_analysis.head())
 
 # Group by Case - Normal Periods
-case_analysis_n = normal_periods.groupby('case:concept:name').agg(
-    TotalDuration=('Timestamp', lambda x: (x.max() - x.min()).total_seconds() / 3600),
-    ActivityCount=('concept:name', 'count')
-).sort_values(by='TotalDuration', ascending=False)
+case_analysis_n = duration_breakdown(normal_periods, 'case:concept:name', 'ActivityCount').sort_values(by='TotalDuration', ascending=False)
 
 print("Case Analysis During Normal Periods:")
 print(case_analysis_n.head())
@@ -112,27 +94,54 @@ print(case_analysis_n.head())
 
 # VISUALIZATION - Throughput Time and Rate of Change (ROC)
 
-fig, ax1 = plt.subplots(figsize=(14, 8))
-
-ax1.set_xlabel('Date')
-ax1.set_ylabel('Average Throughput Time (hours)', color='blue')
-ax1.plot(daily_throughput['Date'], daily_throughput['AverageThroughputTime'], label='Avg Throughput Time', color='blue', marker='o')
-ax1.tick_params(axis='y', labelcolor='blue')
-ax1.tick_params(axis='x', rotation=45)
-
-ax2 = ax1.twinx()
-ax2.set_ylabel('ROC (hours/day)', color='red')
-ax2.plot(daily_throughput['Date'], daily_throughput['ROC'], label='ROC', color='red', linestyle='--', marker='x')
-ax2.tick_params(axis='y', labelcolor='red')
-
-ax1.xaxis.set_major_locator(mdates.MonthLocator()) 
-ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
-
-plt.title('Average Throughput Time and Rate of Change (ROC)')
-ax1.legend(loc='upper left')
-ax2.legend(loc='upper right')
-ax1.grid(True)
-fig.tight_layout()
-plt.show()
+fig = None
+if figures_requested(args):
+    plt = load_pyplot(headless=bool(args.output_dir) and not args.show)
+    import matplotlib.dates as mdates
+
+    fig, ax1 = plt.subplots(figsize=(14, 8))
+
+    ax1.set_xlabel('Date')
+    ax1.set_ylabel('Average Throughput Time (hours)', color='blue')
+    ax1.plot(daily_throughput['Date'], daily_throughput['AverageThroughputTime'], label='Avg Throughput Time', color='blue', marker='o')
+    ax1.tick_params(axis='y', labelcolor='blue')
+    ax1.tick_params(axis='x', rotation=45)
+
+    ax2 = ax1.twinx()
+    ax2.set_ylabel(f'ROC (hours/{args.granularity})', color='red')
+    ax2.plot(daily_throughput['Date'], daily_throughput['ROC'], label='ROC', color='red', linestyle='--', marker='x')
+    for column, label in SMOOTHED_ROC_COLUMNS.items():
+        if column in daily_throughput:
+            ax2.plot(daily_throughput['Date'], daily_throughput[column], label=label)
+    ax2.tick_params(axis='y', labelcolor='red')
+
+    ax1.xaxis.set_major_locator(mdates.MonthLocator())
+    ax1.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m'))
+
+    plt.title('Average Throughput Time and Rate of Change (ROC)')
+    ax1.legend(loc='upper left')
+    ax2.legend(loc='upper right')
+    ax1.grid(True)
+    fig.tight_layout()
+
+if args.output_dir:
+    # Group by Activity and by Case - each anomalous period on its own, only written to files
+    activity_per_period = period_breakdown(event_log, anomalous_periods, 'concept:name', 'Frequency',
+                                           period_filter=period_filter)
+    case_per_period = period_breakdown(event_log, anomalous_periods, 'case:concept:name', 'ActivityCount',
+                                       period_filter=period_filter)
+    with ResultWriter(args.output_dir, args.format) as output:
+        output.write_table(daily_throughput, f'throughput_time_{SERIES_NAMES[args.granularity]}')
+        output.write_table(activity_analysis.reset_index(), 'throughput_time_activities_anomalous')
+        output.write_table(activity_per_period.reset_index(), 'throughput_time_activities_per_period')
+        output.write_table(activity_analysis_n.reset_index(), 'throughput_time_activities_normal')
+        output.write_table(case_analysis.reset_index(), 'throughput_time_cases_anomalous')
+        output.write_table(case_per_period.reset_index(), 'throughput_time_cases_per_period')
+        output.write_table(case_analysis_n.reset_index(), 'throughput_time_cases_normal')
+        if fig is not None:
+            output.write_figure(fig, 'throughput_time_roc')
+
+if fig is not None and (not args.output_dir or args.show):
+    plt.show()
 
 # ............................................................
\ No newline at end of file
@@ -0,0 +1,151 @@
+import hashlib
+import os
+import tempfile
+from pandas import DataFrame
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+from process_roc.preprocessing import CaseIndex, build_case_index, prepare_data, set_granularity
+from process_roc.profiling import profiled
+
+CACHE_DIR = Path(__file__).resolve().parent / "cache"
+
+# Bumped whenever prepare_data changes the prepared columns, so older entries are never read.
+CACHE_VERSION = 2
+
+def _log_key(log_file: str, case_id_column: str) -> str:
+    """
+    Identifies a (log path, case column) pair, independently of the file contents.
+    """
+    source = f"{Path(log_file).resolve()}|{case_id_column}"
+    return hashlib.sha256(source.encode()).hexdigest()[:12]
+
+def _columns_key(value_columns: Optional[List[str]]) -> str:
+    """
+    Identifies the column selection of a compact prepared log ('full' for the whole log).
+    """
+    if value_columns is None:
+        return "full"
+    return hashlib.sha256("|".join(sorted(set(value_columns))).encode()).hexdigest()[:8]
+
+def log_fingerprint(log_file: str, case_id_column: str, hash_content: bool = False) -> str:
+    """
+    Computes the cache key of a log file.
+
+    Args:
+        log_file (str): Path to the log file.
+        case_id_column (str): Name of the column identifying cases.
+        hash_content (bool): Hash the file contents instead of trusting size and mtime.
+
+    Returns:
+        str: A hex digest that changes whenever the log or the case column changes.
+    """
+    path = Path(log_file).resolve()
+    stat = path.stat()
+    fingerprint = hashlib.sha256(f"{path}|{stat.st_size}|{case_id_column}".encode())
+
+    if hash_content:
+        with open(path, 'rb') as log:
+            for block in iter(lambda: log.read(1 << 20), b''):
+                fingerprint.update(block)
+    else:
+        fingerprint.update(str(stat.st_mtime_ns).encode())
+
+    return fingerprint.hexdigest()[:16]
+
+def cache_path(log_file: str, case_id_column: str, hash_content: bool = False, cache_dir: Path = CACHE_DIR,
+               value_columns: Optional[List[str]] = None) -> Path:
+    """
+    Returns the Feather file holding the prepared version of a log, at day granularity,
+    for the current CACHE_VERSION.
+    """
+    stem = Path(log_file).stem
+    key = _log_key(log_file, case_id_column)
+    fingerprint = log_fingerprint(log_file, case_id_column, hash_content)
+    return Path(cache_dir) / f"{stem}-{key}-{_columns_key(value_columns)}-{fingerprint}.v{CACHE_VERSION}.feather"
+
+def clear_cache(log_file: Optional[str] = None, case_id_column: Optional[str] = None, cache_dir: Path = CACHE_DIR) -> int:
+    """
+    Deletes cached logs.
+
+    Args:
+        log_file (Optional[str]): Only delete the entries of this log. Deletes everything when omitted.
+        case_id_column (Optional[str]): Case column of log_file, required when log_file is given.
+        cache_dir (Path): Folder holding the cache.
+
+    Returns:
+        int: Number of deleted entries.
+    """
+    pattern = "*.feather"
+    if log_file is not None:
+        pattern = f"{Path(log_file).stem}-{_log_key(log_file, case_id_column)}-*.feather"
+
+    removed = 0
+    for entry in Path(cache_dir).glob(pattern):
+        entry.unlink()
+        removed += 1
+    return removed
+
+@profiled
+def prepare_data_cached(log_file: str, case_id_column: str, with_case_index: bool = False, use_cache: bool = True,
+                        hash_content: bool = False, cache_dir: Path = CACHE_DIR,
+                        value_columns: Optional[List[str]] = None,
+                        granularity: str = 'day') -> Union[DataFrame, Tuple[DataFrame, CaseIndex]]:
+    """
+    Returns the prepared log, reading it from the columnar cache when the log is unchanged.
+
+    On a miss the log goes through prepare_data and is stored as a Feather file,
+    replacing older entries of the same log and column selection. The file is written under
+    a unique temporary name and renamed, so concurrent writers never see a partial entry.
+    Hits are memory-mapped. The cache is
+    skipped when use_cache is False or pyarrow is not installed. Entries hold the log at day
+    granularity and serve every granularity through set_granularity, which rolls the
+    buckets up from the cached timestamps instead of preparing the log again.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+        case_id_column (str): Name of the column identifying cases.
+        with_case_index (bool): Also return the case_id -> (start, stop) row ranges of the log.
+        use_cache (bool): Read and write the cache.
+        hash_content (bool): Key the cache on the file contents instead of size and mtime.
+        cache_dir (Path): Folder holding the cache.
+        value_columns (Optional[List[str]]): Load only the columns needed for these values, see prepare_data.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+
+    Returns:
+        DataFrame: Processed log dataframe, or a (DataFrame, CaseIndex) tuple when with_case_index is set.
+    """
+    try:
+        from pyarrow import feather
+    except ImportError:
+        use_cache = False
+
+    if not use_cache:
+        return prepare_data(log_file, case_id_column, with_case_index=with_case_index, value_columns=value_columns,
+                            granularity=granularity)
+
+    entry = cache_path(log_file, case_id_column, hash_content, cache_dir, value_columns)
+
+    if entry.exists():
+        df = feather.read_table(entry, memory_map=True).to_pandas()
+    else:
+        df = prepare_data(log_file, case_id_column, value_columns=value_columns)
+
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        for stale in entry.parent.glob(f"{entry.stem.rsplit('-', 1)[0]}-*.feather"):
+            stale.unlink(missing_ok=True)
+        with tempfile.NamedTemporaryFile(dir=entry.parent, prefix=f"{entry.stem}-", suffix='.tmp',
+                                         delete=False) as temporary:
+            temporary_path = Path(temporary.name)
+        try:
+            df.to_feather(temporary_path)
+            os.replace(temporary_path, entry)
+        finally:
+            temporary_path.unlink(missing_ok=True)
+
+    if granularity != 'day':
+        df = set_granularity(df, granularity)
+
+    if with_case_index:
+        return df, build_case_index(df, case_id_column)
+
+    return df
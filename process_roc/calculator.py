@@ -1,9 +1,41 @@
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from pandas import DataFrame
-from typing import List
-from process_roc.utils import log_discarded_events
+from typing import Dict, List, Optional, Tuple, Union
+from process_roc.preprocessing import CaseIndex
+from process_roc.profiling import profiled
+from process_roc.resampling import SMOOTHED_ROC_COLUMNS, smooth_roc
+from process_roc.timestamps import diff_minutes
+from process_roc.utils import DiscardedEventsCollector, log_discarded_events
 
-def calculate_roc_single_trace(df: DataFrame, case_id: str, delta_y: str, delta_x: str, case_id_column: str) -> DataFrame:
+# (shared memory name, numpy dtype string, length) of an array shared with worker processes.
+SharedArray = Tuple[str, str, int]
+
+def select_trace(df: DataFrame, case_id: str, case_id_column: str, case_index: Optional[CaseIndex] = None) -> DataFrame:
+    """
+    Returns the events of a single trace.
+
+    Args:
+        df (DataFrame): The prepared event log data.
+        case_id (str): The identifier of the case to select.
+        case_id_column (str): The name of the column that identifies each case.
+        case_index (Optional[CaseIndex]): Row ranges built by build_case_index on df.
+            When given, the trace is sliced instead of scanning the whole column.
+
+    Returns:
+        DataFrame: The rows of df belonging to the case.
+    """
+    if case_index is None:
+        return df[df[case_id_column] == case_id]
+
+    start, stop = case_index.get(case_id, (0, 0))
+    return df.iloc[start:stop]
+
+@profiled
+def calculate_roc_single_trace(df: DataFrame, case_id: str, delta_y: str, delta_x: str, case_id_column: str, case_index: Optional[CaseIndex] = None,
+                               discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
     """
     Calculates the Rate of Change (ROC) for a single trace.
 
@@ -13,28 +45,36 @@ def calculate_roc_single_trace(df: DataFrame, case_id: str, delta_y: str, delta_
         delta_y (str): The dependent variable (Y axis).
         delta_x (str): The independent variable (X axis).
         case_id_column (str): The name of the column that identifies each case.
+        case_index (Optional[CaseIndex]): Row ranges of df, see build_case_index.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+            When omitted, each trace appends its discarded events to the CSV log directly.
 
     Returns:
         DataFrame: A DataFrame containing the ROC values for the specified trace.
     """
-    trace_data = df[df[case_id_column] == case_id].sort_values(by=delta_x)
+    trace_data = select_trace(df, case_id, case_id_column, case_index).sort_values(by=delta_x, kind='mergesort')
 
     duplicated_mask = trace_data.duplicated(subset=[delta_y, delta_x], keep='first')
     discarded_rows = trace_data[duplicated_mask]
 
     if not discarded_rows.empty:
-        log_discarded_events(case_id, discarded_rows)
+        if discarded_events is None:
+            log_discarded_events(case_id, discarded_rows)
+        else:
+            discarded_events.add(case_id, discarded_rows)
 
     trace_data = trace_data.drop_duplicates(subset=[delta_y, delta_x], keep='first').reset_index(drop=True)
 
     if pd.api.types.is_datetime64_any_dtype(trace_data[delta_x]):
-        trace_data['ROC'] = trace_data[delta_y].diff() / (trace_data[delta_x].diff().dt.total_seconds() / 60)
+        trace_data['ROC'] = trace_data[delta_y].diff() / diff_minutes(trace_data[delta_x])
     else:
         trace_data['ROC'] = trace_data[delta_y].diff() / trace_data[delta_x].diff()
 
     return trace_data[[case_id_column, delta_x, delta_y, 'ROC']]
 
-def calculate_roc_all_traces(df: DataFrame, delta_y: str, delta_x: str, case_id_column: str) -> DataFrame:
+@profiled
+def calculate_roc_all_traces(df: DataFrame, delta_y: str, delta_x: str, case_id_column: str, engine: str = "groupby", case_index: Optional[CaseIndex] = None,
+                             discarded_events: Optional[DiscardedEventsCollector] = None, workers: int = 1) -> DataFrame:
     """
     Calculates the ROC for all traces in the event log.
 
@@ -43,17 +83,370 @@ def calculate_roc_all_traces(df: DataFrame, delta_y: str, delta_x: str, case_id_
         delta_y (str): The dependent variable (Y axis).
         delta_x (str): The independent variable (X axis).
         case_id_column (str): The name of the column that identifies each case.
+        engine (str): "groupby" computes every trace in a single grouped pass,
+            "per_trace" calls calculate_roc_single_trace once per case.
+        case_index (Optional[CaseIndex]): Row ranges of df used by the per-trace engine.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+            When omitted, each trace appends its discarded events to the CSV log directly.
+        workers (int): Number of processes used by the groupby engine, see calculate_roc_parallel.
 
     Returns:
         DataFrame: A DataFrame containing the ROC values for all traces.
     """
+    if engine == "groupby" and workers > 1:
+        return calculate_roc_parallel(df, delta_y, delta_x, case_id_column, workers, discarded_events)
+
+    if engine == "groupby":
+        return calculate_roc_grouped(df, delta_y, delta_x, case_id_column, discarded_events)
+
+    if engine != "per_trace":
+        raise ValueError(f"Unknown ROC engine: {engine}")
+
     all_traces_roc = [
-        calculate_roc_single_trace(df, case_id, delta_y, delta_x, case_id_column)
+        calculate_roc_single_trace(df, case_id, delta_y, delta_x, case_id_column, case_index, discarded_events)
         for case_id in df[case_id_column].unique()
     ]
     return pd.concat(all_traces_roc, ignore_index=True)
 
-def calculate_roc_selected_traces(df: DataFrame, selected_cases: List[str], delta_y: str, delta_x: str, case_id_column: str) -> DataFrame:
+@profiled
+def calculate_roc_grouped(df: DataFrame, delta_y: str, delta_x: str, case_id_column: str,
+                          discarded_events: Optional[DiscardedEventsCollector] = None,
+                          with_positions: bool = False) -> Union[DataFrame, Tuple[DataFrame, np.ndarray]]:
+    """
+    Calculates the ROC for all traces in one vectorized pass.
+
+    The log is sorted once by (case, delta_x), duplicated (delta_y, delta_x)
+    pairs are dropped per case and the diffs are taken over the whole column,
+    masking the first row of every trace. Cases keep their order of first
+    appearance, so the output matches the per-trace engine.
+
+    Args:
+        df (DataFrame): The prepared event log data.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+            When omitted, each trace appends its discarded events to the CSV log directly.
+        with_positions (bool): Also return the position in df of every ROC row, to look up
+            other columns of the events.
+
+    Returns:
+        DataFrame: A DataFrame containing the ROC values for all traces, or a (DataFrame, np.ndarray)
+            tuple when with_positions is set.
+    """
+    case_codes, _ = pd.factorize(df[case_id_column])
+    order = _trace_order(df, case_codes, delta_x)
+    trace_data, kept = _roc_in_order(df, order, case_codes, delta_y, delta_x, case_id_column, discarded_events)
+    if with_positions:
+        return trace_data, kept
+    return trace_data
+
+def _trace_order(df: DataFrame, case_codes: np.ndarray, delta_x: str) -> np.ndarray:
+    """
+    Returns the row positions of df sorted stably by (case, delta_x).
+    """
+    sort_keys = DataFrame({'case_code': case_codes, 'delta_x': df[delta_x].array})
+    return sort_keys.sort_values(by=['case_code', 'delta_x'], kind='mergesort').index.to_numpy()
+
+def _roc_in_order(df: DataFrame, order: np.ndarray, case_codes: np.ndarray, delta_y: str, delta_x: str,
+                  case_id_column: str, discarded_events: Optional[DiscardedEventsCollector] = None,
+                  reason: str = "Duplicated delta_x and delta_y") -> Tuple[DataFrame, np.ndarray]:
+    """
+    Computes the ROC of all traces from rows already sorted by (case, delta_x).
+
+    Returns:
+        Tuple[DataFrame, np.ndarray]: The ROC rows and the positions in df of the rows
+            kept after dropping duplicated (delta_y, delta_x) pairs.
+    """
+    trace_data = df.iloc[order]
+
+    duplicated_mask = trace_data.duplicated(subset=[case_id_column, delta_y, delta_x], keep='first')
+    _log_discarded_rows(trace_data[duplicated_mask], case_id_column, discarded_events, reason)
+
+    trace_data = trace_data[~duplicated_mask][[case_id_column, delta_x, delta_y]].reset_index(drop=True)
+
+    kept = order[~duplicated_mask.to_numpy()]
+    case_codes = case_codes[kept]
+    first_in_trace = np.empty(len(case_codes), dtype=bool)
+    first_in_trace[:1] = True
+    first_in_trace[1:] = case_codes[1:] != case_codes[:-1]
+
+    dy = trace_data[delta_y].diff()
+    if pd.api.types.is_datetime64_any_dtype(trace_data[delta_x]):
+        dx = diff_minutes(trace_data[delta_x])
+    else:
+        dx = trace_data[delta_x].diff()
+
+    roc = dy / dx
+    roc[first_in_trace] = np.nan
+    trace_data['ROC'] = roc
+
+    return trace_data, kept
+
+def roc_positions(df: DataFrame, traces_roc: DataFrame, delta_y: str, delta_x: str, case_id_column: str) -> np.ndarray:
+    """
+    Returns the position in df of the event behind every ROC row. Every engine keeps the first
+    event of each (case, delta_y, delta_x), so the rows are matched to those events.
+
+    Args:
+        df (DataFrame): The prepared event log data the ROC was calculated from.
+        traces_roc (DataFrame): ROC rows of one or more traces, as returned by the calculators.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+
+    Returns:
+        np.ndarray: The positions in df, in the order of traces_roc.
+    """
+    keys = [case_id_column, delta_y, delta_x]
+    events = df[keys].reset_index(drop=True)
+    first_events = events[~events.duplicated(keep='first')].rename_axis('_position').reset_index()
+    return traces_roc[keys].merge(first_events, on=keys, how='left', sort=False)['_position'].to_numpy()
+
+def attach_rounded_time(traces_roc: DataFrame, df: DataFrame, delta_y: str, delta_x: str, case_id_column: str,
+                        positions: Optional[np.ndarray] = None) -> DataFrame:
+    """
+    Adds the rounded_time bucket of the event behind every ROC row, so ROC tables over
+    any delta_x can be related to dates, e.g. by the result store.
+
+    Args:
+        traces_roc (DataFrame): ROC rows of one or more traces, as returned by the calculators.
+        df (DataFrame): The prepared event log data the ROC was calculated from.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        positions (Optional[np.ndarray]): Positions in df of the ROC rows, e.g. from
+            calculate_roc_grouped; looked up with roc_positions when omitted.
+
+    Returns:
+        DataFrame: traces_roc with a rounded_time column; unchanged when it already has one.
+    """
+    if 'rounded_time' in traces_roc:
+        return traces_roc
+    if positions is None:
+        positions = roc_positions(df, traces_roc, delta_y, delta_x, case_id_column)
+    return traces_roc.assign(rounded_time=df['rounded_time'].array.take(positions))
+
+def roc_column(delta_y: str, delta_x: str, column: str = 'ROC') -> str:
+    """
+    Name of the ROC column (or of a smoothed ROC column) of a (delta_y, delta_x) pair in the wide batch output.
+    """
+    return f"{column}({delta_y}/{delta_x})"
+
+@profiled
+def pivot_batch_roc(df: DataFrame, pair_rocs: Dict[Tuple[str, str], DataFrame], case_id_column: str) -> DataFrame:
+    """
+    Lays the ROC of several pairs out in the wide layout of calculate_roc_batch, without
+    recomputing it: every ROC row is placed at the event behind it, see roc_positions.
+
+    Args:
+        df (DataFrame): The prepared event log data the ROC was calculated from.
+        pair_rocs (Dict[Tuple[str, str], DataFrame]): The ROC rows of every (delta_y, delta_x) pair,
+            with their delta_y and delta_x columns, e.g. after calculate_windowed_roc.
+        case_id_column (str): The name of the column that identifies each case.
+
+    Returns:
+        DataFrame: One row per event of df, with a ROC column per pair (see roc_column), and a column
+            per pair for ROC_smoothed and ROC_ewm when present, NaN for the discarded events.
+    """
+    delta_ys, delta_xs = [delta_y for delta_y, _ in pair_rocs], [delta_x for _, delta_x in pair_rocs]
+    value_columns = [column for column in dict.fromkeys(delta_ys + delta_xs) if column != case_id_column]
+    wide = df[[case_id_column] + value_columns].reset_index(drop=True)
+
+    for (delta_y, delta_x), pair_roc in pair_rocs.items():
+        positions = roc_positions(df, pair_roc, delta_y, delta_x, case_id_column)
+        for column in ['ROC', *SMOOTHED_ROC_COLUMNS]:
+            if column in pair_roc:
+                values = np.full(len(df), np.nan)
+                values[positions] = pair_roc[column].to_numpy()
+                wide[roc_column(delta_y, delta_x, column)] = values
+    return wide
+
+@profiled
+def calculate_roc_batch(df: DataFrame, delta_ys: List[str], delta_xs: List[str], case_id_column: str,
+                        layout: str = "long", discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
+    """
+    Calculates the ROC of all traces for every (delta_y, delta_x) pair in one run.
+
+    The log is sorted once per delta_x, and the order is shared by all delta_y.
+    Duplicated (delta_y, delta_x) pairs are dropped per pair, as in calculate_roc_grouped,
+    so every pair gives the same rows as a separate run.
+
+    Args:
+        df (DataFrame): The prepared event log data.
+        delta_ys (List[str]): The dependent variables (Y axis).
+        delta_xs (List[str]): The independent variables (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        layout (str): "long" stacks the ROC rows of every pair, with delta_y/delta_x naming
+            the pair and y/x holding its values. "wide" keeps one row per event of df, with
+            a ROC column per pair (see roc_column) that is NaN for the discarded events.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+
+    Returns:
+        DataFrame: The ROC values of all pairs for all traces.
+
+    Raises:
+        ValueError: If the layout is unknown.
+    """
+    if layout not in ("long", "wide"):
+        raise ValueError(f"Unknown batch layout: {layout}")
+
+    case_codes, _ = pd.factorize(df[case_id_column])
+    value_columns = [column for column in dict.fromkeys(delta_ys + delta_xs) if column != case_id_column]
+    wide = df[[case_id_column] + value_columns].reset_index(drop=True)
+    pairs = []
+
+    for delta_x in dict.fromkeys(delta_xs):
+        order = _trace_order(df, case_codes, delta_x)
+        for delta_y in dict.fromkeys(delta_ys):
+            if delta_y == delta_x:
+                continue
+            trace_data, kept = _roc_in_order(df, order, case_codes, delta_y, delta_x, case_id_column,
+                                             discarded_events, f"Duplicated {delta_x} and {delta_y}")
+            if layout == "wide":
+                roc = np.full(len(df), np.nan)
+                roc[kept] = trace_data['ROC'].to_numpy()
+                wide[roc_column(delta_y, delta_x)] = roc
+            else:
+                pairs.append(DataFrame({
+                    case_id_column: trace_data[case_id_column],
+                    'delta_y': delta_y,
+                    'delta_x': delta_x,
+                    'y': trace_data[delta_y],
+                    'x': trace_data[delta_x],
+                    'ROC': trace_data['ROC'],
+                }))
+
+    if layout == "wide":
+        return wide
+    if not pairs:
+        return DataFrame(columns=[case_id_column, 'delta_y', 'delta_x', 'y', 'x', 'ROC'])
+    return pd.concat(pairs, ignore_index=True)
+
+@profiled
+def _log_discarded_rows(discarded_rows: DataFrame, case_id_column: str,
+                        discarded_events: Optional[DiscardedEventsCollector] = None,
+                        reason: str = "Duplicated delta_x and delta_y") -> None:
+    """
+    Logs the discarded rows of several traces at once.
+    """
+    if discarded_events is not None:
+        discarded_events.add(discarded_rows[case_id_column], discarded_rows, reason)
+    else:
+        for case_id, case_rows in discarded_rows.groupby(case_id_column, sort=False, observed=True):
+            log_discarded_events(case_id, case_rows, reason)
+
+def _attach_array(spec: SharedArray) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, dtype, length = spec
+    buffer = shared_memory.SharedMemory(name=name)
+    return buffer, np.ndarray((length,), dtype=dtype, buffer=buffer.buf)
+
+def _share_array(values: np.ndarray, buffers: List[shared_memory.SharedMemory]) -> SharedArray:
+    buffer = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    buffers.append(buffer)
+    np.ndarray(values.shape, dtype=values.dtype, buffer=buffer.buf)[:] = values
+    return buffer.name, values.dtype.str, len(values)
+
+def _roc_partition(case_codes: SharedArray, x_values: SharedArray, y_values: SharedArray, start: int, stop: int,
+                   x_is_datetime: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the ROC of rows [start, stop) of the (case, delta_x)-sorted shared arrays.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The mask of rows kept after dropping duplicates
+            and the ROC of the kept rows.
+    """
+    attached = [_attach_array(spec) for spec in (case_codes, x_values, y_values)]
+    try:
+        trace_data = DataFrame({name: values[start:stop].copy()
+                                for name, (_, values) in zip(('case', 'x', 'y'), attached)})
+    finally:
+        for buffer, _ in attached:
+            buffer.close()
+
+    keep_mask = ~trace_data.duplicated(subset=['case', 'y', 'x'], keep='first').to_numpy()
+    trace_data = trace_data[keep_mask]
+
+    case_codes = trace_data['case'].to_numpy()
+    first_in_trace = np.empty(len(case_codes), dtype=bool)
+    first_in_trace[:1] = True
+    first_in_trace[1:] = case_codes[1:] != case_codes[:-1]
+
+    dy = trace_data['y'].diff().to_numpy()
+    dx = trace_data['x'].diff().to_numpy()
+    if x_is_datetime:
+        dx = dx / 1e9 / 60
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        roc = dy / dx
+    roc[first_in_trace] = np.nan
+    return keep_mask, roc
+
+@profiled
+def calculate_roc_parallel(df: DataFrame, delta_y: str, delta_x: str, case_id_column: str, workers: int = 2,
+                           discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
+    """
+    Calculates the ROC for all traces in a pool of worker processes.
+
+    The log is sorted once by (case, delta_x) and its case codes, delta_x and
+    delta_y are placed in shared memory as numeric arrays, so the workers never
+    receive pickled frames. Traces are split into contiguous partitions with a
+    similar number of events and the results are stitched back in case order,
+    giving the same output as calculate_roc_grouped. Columns that are neither
+    numeric nor datetime fall back to calculate_roc_grouped.
+
+    Args:
+        df (DataFrame): The prepared event log data.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        workers (int): Number of worker processes.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+
+    Returns:
+        DataFrame: A DataFrame containing the ROC values for all traces.
+    """
+    x_is_datetime = pd.api.types.is_datetime64_any_dtype(df[delta_x])
+    numeric_x = x_is_datetime or pd.api.types.is_numeric_dtype(df[delta_x])
+    if workers <= 1 or df.empty or not numeric_x or not pd.api.types.is_numeric_dtype(df[delta_y]) or df[delta_x].isna().any():
+        return calculate_roc_grouped(df, delta_y, delta_x, case_id_column, discarded_events)
+
+    case_codes, _ = pd.factorize(df[case_id_column])
+    x_values = df[delta_x].to_numpy(dtype='datetime64[ns]').view('int64') if x_is_datetime else df[delta_x].to_numpy()
+    y_values = df[delta_y].to_numpy()
+
+    order = np.lexsort((x_values, case_codes))
+    case_codes, x_values, y_values = case_codes[order], x_values[order], y_values[order]
+
+    trace_starts = np.flatnonzero(np.r_[True, case_codes[1:] != case_codes[:-1]])
+    targets = np.arange(1, workers) * len(order) / workers
+    bounds = np.unique(np.r_[0, trace_starts[np.searchsorted(trace_starts, targets)
+                                             .clip(max=len(trace_starts) - 1)], len(order)])
+
+    buffers: List[shared_memory.SharedMemory] = []
+    try:
+        shared = [_share_array(values, buffers) for values in (case_codes, x_values, y_values)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_roc_partition, *shared, start, stop, x_is_datetime)
+                       for start, stop in zip(bounds[:-1], bounds[1:])]
+            results = [future.result() for future in futures]
+    finally:
+        for buffer in buffers:
+            buffer.close()
+            buffer.unlink()
+
+    keep_mask = np.concatenate([partition_keep for partition_keep, _ in results])
+
+    _log_discarded_rows(df.iloc[order[~keep_mask]], case_id_column, discarded_events)
+
+    trace_data = df.iloc[order[keep_mask]][[case_id_column, delta_x, delta_y]].reset_index(drop=True)
+    trace_data['ROC'] = np.concatenate([roc for _, roc in results])
+
+    return trace_data
+
+@profiled
+def calculate_roc_selected_traces(df: DataFrame, selected_cases: List[str], delta_y: str, delta_x: str, case_id_column: str, case_index: Optional[CaseIndex] = None,
+                                  discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
     """
     Calculates the ROC for a selected set of traces in the event log.
 
@@ -63,12 +456,65 @@ def calculate_roc_selected_traces(df: DataFrame, selected_cases: List[str], delt
         delta_y (str): The dependent variable (Y axis).
         delta_x (str): The independent variable (X axis).
         case_id_column (str): The name of the column that identifies each case.
+        case_index (Optional[CaseIndex]): Row ranges of df, see build_case_index.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+            When omitted, each trace appends its discarded events to the CSV log directly.
 
     Returns:
         DataFrame: A DataFrame containing the ROC values for the selected traces.
     """
     selected_traces_roc = [
-        calculate_roc_single_trace(df, case_id, delta_y, delta_x, case_id_column)
+        calculate_roc_single_trace(df, case_id, delta_y, delta_x, case_id_column, case_index, discarded_events)
         for case_id in selected_cases
     ]
     return pd.concat(selected_traces_roc, ignore_index=True)
+
+@profiled
+def calculate_windowed_roc(traces_roc: DataFrame, delta_y: str, delta_x: str, case_id_column: str,
+                           window: int = 1) -> DataFrame:
+    """
+    Recomputes the ROC of every point over the last window steps of its trace, i.e. the
+    slope between the point and the one window points earlier, which is less noisy
+    than the step-to-step ROC. Points with fewer than window predecessors get NaN.
+
+    Args:
+        traces_roc (DataFrame): ROC rows of one or more traces, as returned by the calculators.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        window (int): Number of steps spanned by each ROC value; 1 keeps the input unchanged.
+
+    Returns:
+        DataFrame: traces_roc with the windowed ROC.
+    """
+    if window <= 1:
+        return traces_roc
+
+    previous = traces_roc.groupby(case_id_column, sort=False, observed=True)[[delta_y, delta_x]].shift(window)
+    dy = traces_roc[delta_y] - previous[delta_y]
+    if pd.api.types.is_datetime64_any_dtype(traces_roc[delta_x]):
+        dx = diff_minutes(traces_roc[delta_x], previous[delta_x])
+    else:
+        dx = traces_roc[delta_x] - previous[delta_x]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return traces_roc.assign(ROC=dy / dx)
+
+@profiled
+def calculate_smoothed_roc(traces_roc: DataFrame, case_id_column: str, smooth: int = 1,
+                           ewm_span: Optional[float] = None) -> DataFrame:
+    """
+    Adds smoothed variants of the ROC of every trace, see smooth_roc: ROC_smoothed, the
+    rolling mean over the last smooth steps, and ROC_ewm, the exponentially weighted mean.
+
+    Args:
+        traces_roc (DataFrame): ROC rows of one or more traces, e.g. from calculate_windowed_roc.
+        case_id_column (str): The name of the column that identifies each case.
+        smooth (int): Number of steps of the rolling mean; 1 adds no ROC_smoothed.
+        ewm_span (Optional[float]): Span of the exponentially weighted mean; None adds no ROC_ewm.
+
+    Returns:
+        DataFrame: traces_roc with the requested smoothed columns.
+    """
+    smoothed = smooth_roc(traces_roc['ROC'], smooth, ewm_span, traces_roc[case_id_column])
+    return traces_roc.assign(**{column: smoothed[column].to_numpy() for column in smoothed.columns})
@@ -0,0 +1,135 @@
+import tempfile
+import pandas as pd
+from pandas import DataFrame
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+from process_roc.calculator import attach_rounded_time, calculate_roc_grouped
+from process_roc.preprocessing import add_frequency, add_time_features, find_timestamp_column
+from process_roc.profiling import profiled
+from process_roc.resampling import floor_timestamps
+from process_roc.timestamps import parse_timestamps
+from process_roc.utils import DiscardedEventsCollector
+from process_roc.xes import iter_xes_chunks
+
+def _iter_log_chunks(log_file: str, chunksize: int) -> Iterator[DataFrame]:
+    if str(log_file).lower().endswith(('.xes', '.xes.gz')):
+        return iter_xes_chunks(log_file, chunksize)
+    return pd.read_csv(log_file, chunksize=chunksize)
+
+@profiled
+def partition_log(log_file: str, case_id_column: str, spill_dir: str, partitions: int = 16,
+                  chunksize: int = 500_000, granularity: str = 'day') -> Tuple[List[Path], DataFrame]:
+    """
+    Splits a log into spill files by hashing the case ID, reading it in blocks.
+
+    Every case ends up in exactly one partition, in its original row order, so
+    partitions can be prepared independently. Each block writes its own file with
+    its own header to the folder of a partition, since XES blocks may bring columns
+    that earlier blocks did not have. The event counts per rounded_time bucket are
+    accumulated over the whole log while it is read.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+        case_id_column (str): Name of the column identifying cases.
+        spill_dir (str): Folder where the partition files are written.
+        partitions (int): Number of partitions.
+        chunksize (int): Number of rows read at a time.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+
+    Returns:
+        Tuple[List[Path], DataFrame]: The partition folders that received events and
+            the global rounded_time/frequency counts.
+    """
+    spill_paths = [Path(spill_dir) / f"partition_{number}" for number in range(partitions)]
+    frequency = None
+    timestamp_column = None
+
+    for chunk_number, chunk in enumerate(_iter_log_chunks(log_file, chunksize)):
+        if timestamp_column is None:
+            timestamp_column = find_timestamp_column(chunk)
+
+        buckets = floor_timestamps(parse_timestamps(chunk[timestamp_column]), granularity).dropna()
+        chunk_frequency = buckets.value_counts()
+        frequency = chunk_frequency if frequency is None else frequency.add(chunk_frequency, fill_value=0)
+
+        case_hashes = pd.util.hash_pandas_object(chunk[case_id_column].astype(str), index=False)
+        for number, rows in chunk.groupby(case_hashes.to_numpy() % partitions, sort=False):
+            spill_paths[number].mkdir(exist_ok=True)
+            rows.to_csv(spill_paths[number] / f"chunk_{chunk_number:06d}.csv", index=False)
+
+    if frequency is None:
+        raise ValueError("The log file does not contain any events.")
+
+    frequency_over_time = (frequency.astype('int64')
+                           .rename_axis('rounded_time')
+                           .sort_index()
+                           .reset_index(name='frequency'))
+
+    return [path for path in spill_paths if path.exists()], frequency_over_time
+
+def iter_prepared_partitions(log_file: str, case_id_column: str, partitions: int = 16, chunksize: int = 500_000,
+                             spill_dir: Optional[str] = None, granularity: str = 'day') -> Iterator[DataFrame]:
+    """
+    Yields the log prepared as in prepare_data, one case partition at a time.
+
+    Peak memory is bounded by the chunk size and the largest partition rather
+    than by the whole log. The frequency column holds the global counts per bucket.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+        case_id_column (str): Name of the column identifying cases.
+        partitions (int): Number of case partitions.
+        chunksize (int): Number of rows read at a time.
+        spill_dir (Optional[str]): Folder for the partition files. A temporary folder is used when omitted.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+
+    Yields:
+        DataFrame: Prepared events of the cases in one partition.
+    """
+    with tempfile.TemporaryDirectory(dir=spill_dir) as partition_dir:
+        spill_paths, frequency_over_time = partition_log(log_file, case_id_column, partition_dir,
+                                                         partitions, chunksize, granularity)
+
+        for spill_path in spill_paths:
+            df = pd.concat([pd.read_csv(chunk_path) for chunk_path in sorted(spill_path.glob('chunk_*.csv'))],
+                           ignore_index=True)
+            df = add_time_features(df, case_id_column, find_timestamp_column(df), granularity)
+            yield add_frequency(df, frequency_over_time)
+
+@profiled
+def calculate_roc_out_of_core(log_file: str, delta_y: str, delta_x: str, case_id_column: str, partitions: int = 16,
+                              chunksize: int = 500_000, spill_dir: Optional[str] = None,
+                              discarded_events: Optional[DiscardedEventsCollector] = None,
+                              granularity: str = 'day', with_rounded_time: bool = False) -> DataFrame:
+    """
+    Calculates the ROC for all traces of a log that may not fit in memory.
+
+    Each case partition is prepared and run through the grouped ROC engine on
+    its own; only the ROC columns are kept. The result is ordered by case, like
+    prepare_data followed by calculate_roc_all_traces.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        partitions (int): Number of case partitions.
+        chunksize (int): Number of rows read at a time.
+        spill_dir (Optional[str]): Folder for the partition files. A temporary folder is used when omitted.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+        with_rounded_time (bool): Also keep the rounded_time bucket of every ROC row, see attach_rounded_time.
+
+    Returns:
+        DataFrame: A DataFrame containing the ROC values for all traces.
+    """
+    partition_rocs = []
+    for df in iter_prepared_partitions(log_file, case_id_column, partitions, chunksize, spill_dir, granularity):
+        partition_roc, positions = calculate_roc_grouped(df, delta_y, delta_x, case_id_column, discarded_events,
+                                                         with_positions=True)
+        if with_rounded_time:
+            partition_roc = attach_rounded_time(partition_roc, df, delta_y, delta_x, case_id_column, positions)
+        partition_rocs.append(partition_roc)
+
+    all_traces_roc = pd.concat(partition_rocs, ignore_index=True)
+    return all_traces_roc.sort_values(by=case_id_column, kind='mergesort', ignore_index=True)
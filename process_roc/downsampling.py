@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from typing import List, Tuple
+
+def numeric_axis(values: Series) -> np.ndarray:
+    """
+    Returns the values of an axis as floats, datetimes as nanoseconds since the epoch.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values.to_numpy(dtype='datetime64[ns]').view('int64').astype(float)
+    return values.to_numpy(dtype=float)
+
+def from_numeric_axis(values: np.ndarray, like: Series) -> Series:
+    """
+    Converts floats from numeric_axis back to the dtype of like.
+    """
+    if not pd.api.types.is_datetime64_any_dtype(like):
+        return Series(values)
+
+    tz = like.dt.tz
+    converted = Series(pd.to_datetime(values.astype(np.int64), unit='ns', utc=tz is not None))
+    return converted.dt.tz_convert(tz) if tz is not None else converted
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Selects n_out points of a line with Largest-Triangle-Three-Buckets (LTTB).
+
+    The first and last points are kept; the points in between are split into
+    n_out - 2 buckets, and each bucket keeps the point forming the largest
+    triangle with the point kept in the previous bucket and the mean of the
+    next bucket, which preserves the visual shape of the line.
+
+    Args:
+        x (np.ndarray): Increasing x values, as floats.
+        y (np.ndarray): y values, without NaN.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted positions of the kept points, all of them when n_out >= len(x).
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean()
+        next_y = y[stop:next_stop].mean()
+
+        areas = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+def split_traces(df: DataFrame, x_col: str, y_col: str, case_id_column: str) -> List[Tuple[object, np.ndarray, np.ndarray]]:
+    """
+    Splits the points of every case in one pass, skipping missing y values.
+
+    Returns:
+        List[Tuple[object, np.ndarray, np.ndarray]]: (case ID, row positions sorted by x, numeric x)
+            per case, in order of first appearance.
+    """
+    valid = np.flatnonzero(df[y_col].notna().to_numpy())
+    case_codes, cases = pd.factorize(df[case_id_column].iloc[valid])
+    x = numeric_axis(df[x_col].iloc[valid])
+
+    order = np.lexsort((x, case_codes))
+    boundaries = np.flatnonzero(np.diff(case_codes[order])) + 1
+    return [(cases[case_codes[positions[0]]], valid[positions], x[positions])
+            for positions in np.split(order, boundaries) if len(positions)]
+
+def percentile_bands(x: np.ndarray, y: np.ndarray, bins: int = 200,
+                     percentiles: Tuple[float, ...] = (5, 25, 50, 75, 95)) -> DataFrame:
+    """
+    Summarizes a point cloud by the percentiles of y within equal-width bins of x.
+
+    Returns:
+        DataFrame: The center of every non-empty bin (x), the number of points in it (points)
+            and one column per percentile, e.g. p50.
+    """
+    points = DataFrame({'bin': _bin_positions(x, bins), 'y': y})
+    grouped = points.groupby('bin')['y']
+    bands = grouped.quantile([p / 100 for p in percentiles]).unstack()
+    bands.columns = [f"p{p:g}" for p in percentiles]
+
+    low, high = _axis_range(x)
+    width = (high - low) / bins
+    bands.insert(0, 'points', grouped.size())
+    bands.insert(0, 'x', low + (bands.index.to_numpy() + 0.5) * width)
+    return bands.reset_index(drop=True)
+
+def density_grid(x: np.ndarray, y: np.ndarray, bins: int = 200, clip: float = 1.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Counts the points in a bins x bins grid, leaving out the clip percent most extreme y values at each end.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Centers of the x bins, centers of the y bins
+            and the counts, one row per y bin.
+    """
+    y_range = _axis_range(np.percentile(y, [clip, 100 - clip]))
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins, range=[_axis_range(x), y_range])
+    return (x_edges[:-1] + x_edges[1:]) / 2, (y_edges[:-1] + y_edges[1:]) / 2, counts.T
+
+def _axis_range(values: np.ndarray) -> Tuple[float, float]:
+    low, high = float(np.nanmin(values)), float(np.nanmax(values))
+    return (low, high) if high > low else (low, low + 1.0)
+
+def _bin_positions(x: np.ndarray, bins: int) -> np.ndarray:
+    low, high = _axis_range(x)
+    return np.minimum(((x - low) / (high - low) * bins).astype(np.int64), bins - 1)
@@ -0,0 +1,228 @@
+import os
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from process_roc.calculator import calculate_roc_grouped
+from process_roc.preprocessing import DERIVED_COLUMNS, find_timestamp_column
+from process_roc.resampling import floor_timestamps
+from process_roc.timestamps import parse_timestamps, to_epoch_ns
+from process_roc.utils import DiscardedEventsCollector, validate_columns
+
+# Per case: (first timestamp, last timestamp) in epoch ns, and the kept points at the
+# last delta_x, as tuples over IncrementalROC.tail_columns.
+CaseState = Tuple[int, int, List[tuple]]
+
+class IncrementalROC:
+    """
+    Keeps the ROC of all traces of a growing log up to date, one batch of new events at a time.
+
+    Per case, only the first and last timestamps and the points at the last delta_x are
+    kept, together with the event counts per rounded_time bucket, so an update costs O(batch) and the
+    rows it returns equal those of prepare_data followed by calculate_roc_all_traces
+    over the whole log. Events of a case must arrive in time order and must not move
+    its delta_x backwards; events that do, or whose timestamp is missing or malformed,
+    are discarded.
+
+    With delta_y set to frequency, rows use the bucket counts known when they are
+    returned; a row is final once no later batch adds events to its bucket. frequency
+    cannot be delta_x, since the order of old points would change as counts grow.
+
+    Args:
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        case_id_column (str): The name of the column that identifies each case.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+
+    Raises:
+        ValueError: If delta_x is frequency.
+    """
+
+    def __init__(self, delta_y: str, delta_x: str, case_id_column: str, granularity: str = 'day'):
+        if delta_x == 'frequency':
+            raise ValueError("frequency cannot be delta_x for incremental ROC updates.")
+
+        self.delta_y = delta_y
+        self.delta_x = delta_x
+        self.case_id_column = case_id_column
+        self.granularity = granularity
+        self.timestamp_column: Optional[str] = None
+        self.tail_columns = [column for column in dict.fromkeys([delta_x, delta_y, 'rounded_time'])
+                             if column != 'frequency']
+        self.cases: Dict[Any, CaseState] = {}
+        self.frequency: Dict[pd.Timestamp, int] = {}
+        self.latest_ns = np.iinfo(np.int64).min
+
+    def update(self, events: DataFrame, discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
+        """
+        Adds a batch of raw events, as read from the log, and returns their ROC rows.
+
+        Args:
+            events (DataFrame): New events with the case, timestamp and delta_y/delta_x source columns.
+            discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+
+        Returns:
+            DataFrame: The ROC rows of the new events, ordered by case.
+
+        Raises:
+            ValueError: If columns are missing.
+        """
+        case_id_column = self.case_id_column
+        if self.timestamp_column is None:
+            self.timestamp_column = find_timestamp_column(events)
+        timestamp_column = self.timestamp_column
+        source_columns = [column for column in (self.delta_y, self.delta_x) if column not in DERIVED_COLUMNS]
+        validate_columns(events, [case_id_column, timestamp_column] + source_columns)
+
+        batch = events[list(dict.fromkeys([case_id_column, timestamp_column] + source_columns))].copy()
+        batch[timestamp_column] = parse_timestamps(batch[timestamp_column], errors='coerce')
+        batch = self._discard(batch, batch[timestamp_column].isna(), events, discarded_events,
+                              "Missing or malformed timestamp")
+        batch = batch.sort_values(by=[case_id_column, timestamp_column])
+        batch = self._discard_out_of_order(batch, events, discarded_events)
+        if batch.empty:
+            return DataFrame(columns=[case_id_column, self.delta_x, self.delta_y, 'ROC'])
+
+        epoch_ns = to_epoch_ns(batch[timestamp_column]).to_numpy()
+        batch_cases = batch[case_id_column].to_numpy()
+        known = [self.cases.get(case_id) for case_id in batch_cases]
+
+        batch_start = pd.Series(epoch_ns, index=batch.index).groupby(batch[case_id_column]).transform('min')
+        start_ns = np.where([state is None for state in known], batch_start.to_numpy(),
+                            [0 if state is None else state[0] for state in known])
+        batch['timestamp_minutes'] = (epoch_ns - start_ns) / 1e9 / 60.0
+        batch['rounded_time'] = floor_timestamps(batch[timestamp_column], self.granularity)
+
+        self.latest_ns = max(self.latest_ns, int(epoch_ns.max()))
+        for day, count in batch['rounded_time'].value_counts(sort=False).items():
+            self.frequency[day] = self.frequency.get(day, 0) + count
+
+        carried_rows = []
+        carried_counts = {}
+        for case_id in pd.unique(batch_cases):
+            state = self.cases.get(case_id)
+            if state is not None:
+                carried_rows.extend((case_id,) + point for point in state[2])
+                carried_counts[case_id] = len(state[2])
+
+        carried = (DataFrame.from_records(carried_rows, columns=[case_id_column] + self.tail_columns)
+                   .astype(batch[self.tail_columns].dtypes.to_dict()))
+        combined = pd.concat([carried, batch[[case_id_column] + self.tail_columns]], ignore_index=True)
+        combined = combined.sort_values(by=case_id_column, kind='mergesort', ignore_index=True)
+        if 'frequency' in (self.delta_y, self.delta_x):
+            combined['frequency'] = combined['rounded_time'].map(self.frequency)
+
+        all_traces_roc = calculate_roc_grouped(combined, self.delta_y, self.delta_x, case_id_column, discarded_events)
+        self._update_cases(combined, epoch_ns, start_ns, batch_cases)
+
+        position = all_traces_roc.groupby(case_id_column, sort=False).cumcount()
+        carried_count = all_traces_roc[case_id_column].map(carried_counts).fillna(0)
+        return all_traces_roc[position.to_numpy() >= carried_count.to_numpy()].reset_index(drop=True)
+
+    def _discard(self, batch: DataFrame, discarded: Series, events: DataFrame,
+                 discarded_events: Optional[DiscardedEventsCollector], reason: str) -> DataFrame:
+        """
+        Drops the rows of batch flagged in discarded, buffering the raw events for the discarded events log.
+        """
+        if not discarded.any():
+            return batch
+        if discarded_events is not None:
+            discarded_rows = events.loc[discarded[discarded].index]
+            discarded_events.add(discarded_rows[self.case_id_column], discarded_rows, reason)
+        return batch[~discarded]
+
+    def _discard_out_of_order(self, batch: DataFrame, events: DataFrame,
+                              discarded_events: Optional[DiscardedEventsCollector]) -> DataFrame:
+        """
+        Discards the events older than the last event of their case, then those with a
+        smaller delta_x than the last point of their case, both kept from earlier batches.
+        """
+        case_id_column = self.case_id_column
+        known = {case_id: self.cases[case_id] for case_id in pd.unique(batch[case_id_column]) if case_id in self.cases}
+        if not known:
+            return batch
+
+        last_ns = np.array([known[case_id][1] if case_id in known else np.iinfo(np.int64).min
+                            for case_id in batch[case_id_column]], dtype=np.int64)
+        late = Series(to_epoch_ns(batch[self.timestamp_column]).to_numpy() < last_ns, index=batch.index)
+        batch = self._discard(batch, late, events, discarded_events, "Older than the last event of its case")
+
+        # Derived columns grow with the event time, so only source columns can move backwards.
+        if self.delta_x in DERIVED_COLUMNS:
+            return batch
+        x_position = self.tail_columns.index(self.delta_x)
+        last_x = batch[case_id_column].map({case_id: state[2][0][x_position] for case_id, state in known.items()
+                                            if state[2]})
+        return self._discard(batch, batch[self.delta_x] < last_x, events, discarded_events,
+                             f"{self.delta_x} smaller than the last point of its case")
+
+    def _update_cases(self, combined: DataFrame, epoch_ns: np.ndarray, start_ns: np.ndarray,
+                      batch_cases: np.ndarray) -> None:
+        """
+        Stores the new first/last timestamps and last points of the cases of a batch.
+        """
+        case_id_column = self.case_id_column
+        points = combined.sort_values(by=[case_id_column, self.delta_x], kind='mergesort')
+        points = points[~points.duplicated(subset=[case_id_column, self.delta_y, self.delta_x], keep='first')]
+        last_x = points.groupby(case_id_column, sort=False)[self.delta_x].transform('last')
+        tail = points[points[self.delta_x] == last_x]
+
+        tails = {}
+        for case_id, *point in tail[[case_id_column] + self.tail_columns].itertuples(index=False, name=None):
+            tails.setdefault(case_id, []).append(tuple(point))
+
+        # The batch is sorted by case and time, so the last row of a case holds its last timestamp.
+        last_rows = np.r_[batch_cases[1:] != batch_cases[:-1], True]
+        for case_id, first, last in zip(batch_cases[last_rows], start_ns[last_rows], epoch_ns[last_rows]):
+            self.cases[case_id] = (int(first), int(last), tails.get(case_id, []))
+
+    def evict_idle(self, timeout_minutes: float) -> int:
+        """
+        Forgets the cases whose last event is more than timeout_minutes older than the
+        latest event seen, and the bucket counts older than both the cutoff and the
+        points kept for the remaining cases.
+
+        An evicted case that receives new events starts over as a new case, and events
+        older than the cutoff are counted from zero, so such rows no longer match a
+        full recompute.
+
+        Args:
+            timeout_minutes (float): Idle time, in event time, after which a case is treated as closed.
+
+        Returns:
+            int: Number of evicted cases.
+        """
+        cutoff_ns = self.latest_ns - int(timeout_minutes * 60 * 1e9)
+        idle_cases = [case_id for case_id, (_, last_ns, _) in self.cases.items() if last_ns < cutoff_ns]
+        for case_id in idle_cases:
+            del self.cases[case_id]
+
+        if idle_cases and self.frequency:
+            day_position = self.tail_columns.index('rounded_time')
+            cutoff = pd.Series([pd.Timestamp(cutoff_ns, tz=next(iter(self.frequency)).tz)])
+            cutoff_day = floor_timestamps(cutoff, self.granularity).iloc[0]
+            oldest_day = min((point[day_position] for _, _, tail in self.cases.values() for point in tail),
+                             default=cutoff_day)
+            oldest_day = min(oldest_day, cutoff_day)
+            self.frequency = {day: count for day, count in self.frequency.items() if day >= oldest_day}
+
+        return len(idle_cases)
+
+    def save(self, path: str) -> None:
+        """
+        Writes the state to path, replacing it atomically so an interrupted job keeps the previous state.
+        """
+        path = Path(path)
+        temporary_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        pd.to_pickle(self.__dict__, temporary_path)
+        os.replace(temporary_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'IncrementalROC':
+        """
+        Restores a calculator saved with save.
+        """
+        calculator = cls.__new__(cls)
+        calculator.__dict__.update(pd.read_pickle(path))
+        return calculator
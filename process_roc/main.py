@@ -1,23 +1,187 @@
 import argparse
 from process_roc import scenarios
+from contextlib import nullcontext
+from process_roc.cache import clear_cache
+from process_roc.output import ResultWriter, add_output_arguments
+from process_roc.plotter import PLOT_MODES
+from process_roc.profiling import profiling
+from process_roc.resampling import GRANULARITIES
+from process_roc.store import ROCStore
+from process_roc.streaming import run_stream
 
 def main():
     parser = argparse.ArgumentParser(description="Process Mining ROC Analysis")
-    parser.add_argument('--log_file', required=True, help='Path to the event log CSV')
+    parser.add_argument('--log_file', help='Path to the event log (CSV or XES), or - for stdin in stream mode')
+    parser.add_argument('--object_logs', '--object-logs', nargs='+', default=None,
+                        help='Logs of every object type of one OCEL log, analyzed together instead of --log_file')
     parser.add_argument('--case_id_column', required=True, help='Name of the case ID column (e.g. case:concept:name)')
-    parser.add_argument('--delta_y', required=True, help='The dependent variable (Y axis), e.g., cumulative_cost')
-    parser.add_argument('--delta_x', required=True, help='The independent variable (X axis), e.g., rounded_time or timestamp_minutes')
+    parser.add_argument('--delta_y', nargs='+', required=True,
+                        help='The dependent variable (Y axis), e.g., cumulative_cost. Several columns run in batch mode')
+    parser.add_argument('--delta_x', nargs='+', required=True,
+                        help='The independent variable (X axis), e.g., rounded_time or timestamp_minutes. Several columns run in batch mode')
     parser.add_argument('--case_ids', nargs='*', help='Optional: List of case IDs to filter. Leave empty for all.')
+    parser.add_argument('--engine', choices=['groupby', 'per_trace'], default='groupby',
+                        help='ROC engine for all traces: single grouped pass (default) or one pass per trace')
+    parser.add_argument('--discarded_format', choices=['csv', 'parquet', 'none'], default='csv',
+                        help='Format of the discarded events log, or none to disable it (default: csv)')
+    parser.add_argument('--no_cache', '--no-cache', action='store_true',
+                        help='Preprocess the log from scratch instead of using the prepared-log cache')
+    parser.add_argument('--clear_cache', '--clear-cache', action='store_true',
+                        help='Delete the cached copies of the log before running')
+    parser.add_argument('--partitions', type=int, default=0,
+                        help='Process all traces out of core in this many case partitions (default: 0, in memory)')
+    parser.add_argument('--chunksize', type=int, default=500_000,
+                        help='Rows read at a time in out-of-core mode (default: 500000)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for the groupby engine on all traces (default: 1)')
+    parser.add_argument('--granularity', choices=GRANULARITIES, default='day',
+                        help='Bucket size of rounded_time and frequency (default: day)')
+    parser.add_argument('--window', type=int, default=1,
+                        help='Compute each ROC value over this many steps of its trace (default: 1)')
+    parser.add_argument('--smooth', type=int, default=1,
+                        help='Also plot the rolling mean of the ROC over this many steps of each trace (default: 1, off)')
+    parser.add_argument('--ewm_span', '--ewm-span', type=float, default=None,
+                        help='Also plot the exponentially weighted mean of the ROC of each trace with this span (default: off)')
+    parser.add_argument('--batch_layout', '--batch-layout', choices=['long', 'wide'], default='long',
+                        help='Layout of the batch ROC table: one row per pair and event (long) or one ROC column per pair (wide)')
+    parser.add_argument('--batch_output', '--batch-output', default=None,
+                        help='CSV file receiving the ROC of all pairs in batch mode (default: none)')
+    add_output_arguments(parser)
+    parser.add_argument('--store', default=None,
+                        help='Folder of a ROC result store receiving the ROC tables as a new run, '
+                             'queried later with python -m process_roc.store (default: none)')
+    parser.add_argument('--profile', nargs='?', const='profile.json', default=None,
+                        help='Time every pipeline stage, print a summary and write the report to this JSON file '
+                             '(default when given without a path: profile.json)')
+    parser.add_argument('--profile_no_memory', '--profile-no-memory', action='store_true',
+                        help='Profile wall time and rows only; tracing peak memory slows Python-heavy stages down')
+    parser.add_argument('--plot_mode', '--plot-mode', choices=PLOT_MODES, default='auto',
+                        help='Plot a line per case (traces), percentile bands or a density heatmap; '
+                             'auto draws bands above 200 cases (default: auto)')
+    parser.add_argument('--max_points', '--max-points', type=int, default=100_000,
+                        help='Cap on the points drawn in traces mode, longer traces are downsampled (default: 100000)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Tail the CSV log (or stdin) and write ROC rows of new events as they arrive')
+    parser.add_argument('--stream_output', '--stream-output', default='-',
+                        help='CSV file receiving the ROC rows in stream mode (default: -, stdout)')
+    parser.add_argument('--batch_size', type=int, default=1000,
+                        help='Maximum events per micro-batch in stream mode (default: 1000)')
+    parser.add_argument('--max_wait', type=float, default=1.0,
+                        help='Maximum seconds an event waits for its micro-batch in stream mode (default: 1.0)')
+    parser.add_argument('--idle_timeout', type=float, default=None,
+                        help='Evict cases idle for this many minutes of event time in stream mode (default: never)')
 
     args = parser.parse_args()
+    if not args.log_file and not args.object_logs:
+        parser.error("--log_file or --object_logs is required")
+
+    if args.clear_cache:
+        for log_file in args.object_logs or [args.log_file]:
+            clear_cache(log_file, args.case_id_column)
+
+    with profiling(args.profile, trace_memory=not args.profile_no_memory) if args.profile else nullcontext():
+        with ResultWriter(args.output_dir, args.format, show=args.show) if args.output_dir else nullcontext() as output:
+            run_scenario(parser, args, output, ROCStore(args.store) if args.store else None)
+
+def run_scenario(parser, args, output=None, store=None):
+    """
+    Runs the scenario selected by the arguments, writing its results to output and
+    appending its ROC tables to store when given.
+    """
+    batch = len(args.delta_y) > 1 or len(args.delta_x) > 1
+    delta_y, delta_x = args.delta_y[0], args.delta_x[0]
+
+    if args.stream:
+        if batch:
+            parser.error("stream mode takes a single --delta_y and --delta_x")
+        if not args.log_file:
+            parser.error("stream mode reads --log_file")
+        if store is not None:
+            parser.error("stream mode writes --stream_output, not --store")
+        if (args.engine != "groupby" or args.workers > 1 or args.partitions > 0 or args.case_ids
+                or args.window > 1 or args.smooth > 1 or args.ewm_span is not None):
+            parser.error("stream mode updates the step-to-step ROC of every case incrementally; "
+                         "--engine, --workers, --partitions, --case_ids, --window, --smooth and --ewm_span are not supported")
+        run_stream(
+            source=args.log_file,
+            case_id_column=args.case_id_column,
+            delta_y=delta_y,
+            delta_x=delta_x,
+            output=args.stream_output,
+            batch_size=args.batch_size,
+            max_wait=args.max_wait,
+            idle_timeout=args.idle_timeout,
+            discarded_format=args.discarded_format,
+            granularity=args.granularity
+        )
+
+    # Logs of several object types → object-centric scenario
+    elif args.object_logs:
+        if len(args.delta_x) > 1:
+            parser.error("object-centric mode takes a single --delta_x, shared by all object types")
+        if args.smooth > 1 or args.ewm_span is not None:
+            parser.error("object-centric mode does not smooth the ROC, use --window")
+        scenarios.scenario_objects(
+            log_files=args.object_logs,
+            case_id_column=args.case_id_column,
+            delta_ys=args.delta_y,
+            delta_x=delta_x,
+            discarded_format=args.discarded_format,
+            use_cache=not args.no_cache,
+            granularity=args.granularity,
+            window=args.window,
+            output=output,
+            plot_mode=args.plot_mode,
+            max_points=args.max_points,
+            store=store
+        )
+
+    # Several delta_y or delta_x → batch scenario: every pair in one run
+    elif batch:
+        if args.engine != "groupby" or args.workers > 1 or args.partitions > 0:
+            parser.error("batch mode computes every pair in one grouped pass in memory; "
+                         "--engine, --workers and --partitions take a single --delta_y and --delta_x")
+        scenarios.scenario_batch(
+            log_file=args.log_file,
+            case_id_column=args.case_id_column,
+            delta_ys=args.delta_y,
+            delta_xs=args.delta_x,
+            case_ids=args.case_ids,
+            layout=args.batch_layout,
+            batch_output=args.batch_output,
+            discarded_format=args.discarded_format,
+            use_cache=not args.no_cache,
+            granularity=args.granularity,
+            window=args.window,
+            smooth=args.smooth,
+            ewm_span=args.ewm_span,
+            output=output,
+            plot_mode=args.plot_mode,
+            max_points=args.max_points,
+            store=store
+        )
 
     # No case IDs → scenario 1: all traces
-    if not args.case_ids:
+    elif not args.case_ids:
         scenarios.scenario_1(
             log_file=args.log_file,
             case_id_column=args.case_id_column,
-            delta_y=args.delta_y,
-            delta_x=args.delta_x
+            delta_y=delta_y,
+            delta_x=delta_x,
+            engine=args.engine,
+            discarded_format=args.discarded_format,
+            use_cache=not args.no_cache,
+            partitions=args.partitions,
+            chunksize=args.chunksize,
+            workers=args.workers,
+            granularity=args.granularity,
+            window=args.window,
+            smooth=args.smooth,
+            ewm_span=args.ewm_span,
+            output=output,
+            plot_mode=args.plot_mode,
+            max_points=args.max_points,
+            store=store
         )
     
     # Multiple case IDs → scenario 2
@@ -25,9 +189,19 @@ def main():
         scenarios.scenario_2(
             log_file=args.log_file,
             case_id_column=args.case_id_column,
-            delta_y=args.delta_y,
-            delta_x=args.delta_x,
-            selected_cases=args.case_ids
+            delta_y=delta_y,
+            delta_x=delta_x,
+            selected_cases=args.case_ids,
+            discarded_format=args.discarded_format,
+            use_cache=not args.no_cache,
+            granularity=args.granularity,
+            window=args.window,
+            smooth=args.smooth,
+            ewm_span=args.ewm_span,
+            output=output,
+            plot_mode=args.plot_mode,
+            max_points=args.max_points,
+            store=store
         )
     
     # Single case ID → scenario 3
@@ -35,9 +209,19 @@ def main():
         scenarios.scenario_3(
             log_file=args.log_file,
             case_id_column=args.case_id_column,
-            delta_y=args.delta_y,
-            delta_x=args.delta_x,
-            case_id=args.case_ids[0]
+            delta_y=delta_y,
+            delta_x=delta_x,
+            case_id=args.case_ids[0],
+            discarded_format=args.discarded_format,
+            use_cache=not args.no_cache,
+            granularity=args.granularity,
+            window=args.window,
+            smooth=args.smooth,
+            ewm_span=args.ewm_span,
+            output=output,
+            plot_mode=args.plot_mode,
+            max_points=args.max_points,
+            store=store
         )
     
     else:
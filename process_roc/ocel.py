@@ -0,0 +1,244 @@
+import itertools
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pathlib import Path
+from typing import Dict, List, Optional
+from process_roc.cache import prepare_data_cached
+from process_roc.calculator import calculate_roc_grouped, calculate_windowed_roc
+from process_roc.profiling import profiled
+from process_roc.utils import DiscardedEventsCollector
+
+EVENT_ID_COLUMN = 'ocel:eid'
+TYPE_COLUMN = 'case:ocel:type'
+
+class ObjectLogs:
+    """
+    The logs flattened from one object-centric (OCEL) log, one per object type, with
+    an index of the events they share.
+
+    The cases of every log are the objects of its type, and an event touching objects
+    of several types appears in the log of each type with the same event ID. Event IDs
+    are encoded once, as integer codes shared by all logs, so events are linked across
+    logs through their codes instead of by joining the logs on strings.
+
+    Args:
+        logs (Dict[str, DataFrame]): Prepared log of every object type.
+        case_id_column (str): Column identifying the objects (cases) in every log.
+        event_id_column (str): Column holding the OCEL event IDs.
+
+    Raises:
+        ValueError: If a log has no event ID column.
+    """
+
+    def __init__(self, logs: Dict[str, DataFrame], case_id_column: str = 'case:concept:name',
+                 event_id_column: str = EVENT_ID_COLUMN) -> None:
+        missing = [object_type for object_type, df in logs.items() if event_id_column not in df.columns]
+        if missing:
+            raise ValueError(f"Logs without a {event_id_column} column: {', '.join(missing)}")
+
+        self.logs = logs
+        self.case_id_column = case_id_column
+        self.event_id_column = event_id_column
+
+        codes, self.event_ids = pd.factorize(pd.concat([df[event_id_column] for df in logs.values()],
+                                                       ignore_index=True))
+        bounds = np.cumsum([0] + [len(df) for df in logs.values()])
+        self.event_codes: Dict[str, np.ndarray] = {object_type: codes[start:stop] for object_type, start, stop
+                                                   in zip(logs, bounds, bounds[1:])}
+
+    @property
+    def object_types(self) -> List[str]:
+        return list(self.logs)
+
+    def event_column(self, object_type: str, positions: Optional[np.ndarray] = None) -> pd.Categorical:
+        """
+        Returns the event IDs of the rows of a log (at positions, or all of them) as a categorical
+        sharing its categories with every log, which merges on the integer codes.
+        """
+        codes = self.event_codes[object_type]
+        return pd.Categorical.from_codes(codes if positions is None else codes[positions], categories=self.event_ids)
+
+    def shared_events(self) -> DataFrame:
+        """
+        Counts the events shared by every pair of object types; the diagonal holds the events of each type.
+        """
+        unique = {object_type: np.unique(codes) for object_type, codes in self.event_codes.items()}
+        counts = DataFrame(0, index=self.object_types, columns=self.object_types)
+        for first, second in itertools.combinations_with_replacement(self.object_types, 2):
+            shared = np.intersect1d(unique[first], unique[second], assume_unique=True).size
+            counts.loc[first, second] = counts.loc[second, first] = shared
+        return counts
+
+@profiled
+def load_object_logs(log_files: List[str], case_id_column: str = 'case:concept:name',
+                     event_id_column: str = EVENT_ID_COLUMN, type_column: str = TYPE_COLUMN,
+                     granularity: str = 'day', use_cache: bool = True) -> ObjectLogs:
+    """
+    Prepares the log of every object type once and indexes the events they share.
+
+    Args:
+        log_files (List[str]): Paths to the CSV or XES logs, one per object type.
+        case_id_column (str): Column identifying the objects (cases) in every log.
+        event_id_column (str): Column holding the OCEL event IDs.
+        type_column (str): Column holding the object type of a log; the file name is used
+            when the column is missing or empty.
+        granularity (str): Size of the rounded_time buckets, shared by all logs, see prepare_data.
+        use_cache (bool): Read and write the prepared-log cache, see prepare_data_cached.
+
+    Returns:
+        ObjectLogs: The prepared logs, by object type.
+
+    Raises:
+        ValueError: If two logs have the same object type.
+    """
+    logs = {}
+    for log_file in log_files:
+        df = prepare_data_cached(log_file, case_id_column, use_cache=use_cache, granularity=granularity)
+        types = df[type_column].dropna() if type_column in df.columns else []
+        object_type = str(types.iloc[0]) if len(types) else Path(log_file).stem
+        if object_type in logs:
+            raise ValueError(f"Several logs of object type {object_type}")
+        logs[object_type] = df
+
+    return ObjectLogs(logs, case_id_column, event_id_column)
+
+def parse_object_columns(columns: List[str], object_logs: ObjectLogs) -> Dict[str, List[str]]:
+    """
+    Assigns delta_y columns to object types. A column written as <object type>:<column>,
+    e.g. orders:cumulative_cost, belongs to that type only; any other column, including
+    names with a colon such as case:weight, belongs to every type whose log has it.
+
+    Returns:
+        Dict[str, List[str]]: The columns of every object type that has any.
+
+    Raises:
+        ValueError: If a column is in none of the logs.
+    """
+    assigned: Dict[str, List[str]] = {}
+    for column in columns:
+        object_type, separator, name = column.partition(':')
+        if separator and object_type in object_logs.logs:
+            targets = [object_type]
+        else:
+            name = column
+            targets = [object_type for object_type, df in object_logs.logs.items() if column in df.columns]
+            if not targets:
+                raise ValueError(f"Unknown column in every log: {column}")
+        for target in targets:
+            names = assigned.setdefault(target, [])
+            if name not in names:
+                names.append(name)
+    return assigned
+
+@profiled
+def calculate_roc_object_types(object_logs: ObjectLogs, delta_ys: Dict[str, List[str]], delta_x: str,
+                               window: int = 1, discarded_events: Optional[DiscardedEventsCollector] = None) -> DataFrame:
+    """
+    Calculates the ROC of all objects of every object type, keeping the event ID and
+    rounded_time bucket of every ROC row so types can be related through their events
+    or their buckets.
+
+    Args:
+        object_logs (ObjectLogs): The logs of all object types.
+        delta_ys (Dict[str, List[str]]): The dependent variables of every object type, see parse_object_columns.
+        delta_x (str): The independent variable, shared by all object types.
+        window (int): Number of steps spanned by each ROC value, see calculate_windowed_roc.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+
+    Returns:
+        DataFrame: One row per object type, delta_y and kept event, with the columns object_type,
+            the case ID column, the event ID column, rounded_time, delta_y, delta_x, y, x and ROC.
+
+    Raises:
+        ValueError: If an object type is unknown, or a column is missing from the log of its type.
+    """
+    case_id_column = object_logs.case_id_column
+    frames = []
+    for object_type, columns in delta_ys.items():
+        if object_type not in object_logs.logs:
+            raise ValueError(f"Unknown object type: {object_type}")
+        df = object_logs.logs[object_type]
+        for delta_y in columns:
+            missing = [column for column in (delta_y, delta_x) if column not in df.columns]
+            if missing:
+                raise ValueError(f"Unknown column in the {object_type} log: {', '.join(missing)}")
+            if delta_y == delta_x:
+                raise ValueError(f"delta_y and delta_x are both {delta_x}")
+
+            trace_data, positions = calculate_roc_grouped(df, delta_y, delta_x, case_id_column, discarded_events,
+                                                          with_positions=True)
+            trace_data = calculate_windowed_roc(trace_data, delta_y, delta_x, case_id_column, window)
+            frames.append(DataFrame({
+                'object_type': object_type,
+                case_id_column: trace_data[case_id_column].to_numpy(),
+                object_logs.event_id_column: object_logs.event_column(object_type, positions),
+                # .array keeps timezone-aware datetimes, which to_numpy turns into objects.
+                'rounded_time': df['rounded_time'].array.take(positions),
+                'delta_y': delta_y,
+                'delta_x': delta_x,
+                'y': trace_data[delta_y].array,
+                'x': trace_data[delta_x].array,
+                'ROC': trace_data['ROC'].to_numpy(),
+            }))
+
+    if not frames:
+        raise ValueError("No delta_y column for any object type")
+    return pd.concat(frames, ignore_index=True).infer_objects()
+
+def series_name(object_type: str, delta_y: str) -> str:
+    """
+    Name of the series of an object type and delta_y in the correlated views, e.g. orders:cumulative_cost.
+    """
+    return f"{object_type}:{delta_y}"
+
+def bucket_view(object_roc: DataFrame, statistic: str = 'mean') -> DataFrame:
+    """
+    Aggregates the ROC of every object type and delta_y per rounded_time bucket, so types
+    can be compared over the same days (or hours, weeks, months). Infinite ROC values
+    (a change of delta_y without a change of delta_x) are left out.
+
+    Args:
+        object_roc (DataFrame): Output of calculate_roc_object_types.
+        statistic (str): Aggregation of the ROC values of a bucket, e.g. mean, median or sum.
+
+    Returns:
+        DataFrame: One row per bucket, with rounded_time and a column per series (see series_name).
+    """
+    finite = object_roc[np.isfinite(object_roc['ROC'].to_numpy(dtype=float))]
+    view = (finite.groupby(['rounded_time', 'object_type', 'delta_y'], sort=True, observed=True)['ROC']
+            .agg(statistic).unstack(['object_type', 'delta_y']))
+    view.columns = [series_name(object_type, delta_y) for object_type, delta_y in view.columns]
+    return view.reset_index()
+
+def event_view(object_roc: DataFrame, source_type: str, target_type: str, event_id_column: str = EVENT_ID_COLUMN) -> DataFrame:
+    """
+    Pairs the ROC rows of two object types at the events they share, e.g. the ROC of the
+    cost of an order and of the workload of the employee at the same event.
+
+    Returns:
+        DataFrame: One row per shared event and pair of rows, with the event ID, rounded_time and,
+            for each type, the object, delta_y and ROC, in columns prefixed by the type.
+    """
+    def rows_of(object_type):
+        rows = object_roc[object_roc['object_type'] == object_type]
+        rows = rows.drop(columns=['object_type', 'delta_x', 'y', 'x'])
+        return rows.rename(columns={column: f"{object_type} {column}" for column in rows.columns
+                                    if column not in (event_id_column, 'rounded_time')})
+
+    return rows_of(source_type).merge(rows_of(target_type).drop(columns='rounded_time'), on=event_id_column)
+
+def event_correlation(view: DataFrame, source_type: str, target_type: str) -> DataFrame:
+    """
+    Correlates the finite ROC values of two object types at their shared events, per pair of delta_y.
+
+    Returns:
+        DataFrame: The delta_y of each type, the number of event pairs and the Pearson correlation.
+    """
+    source_roc, target_roc = f"{source_type} ROC", f"{target_type} ROC"
+    finite = view[np.isfinite(view[source_roc].to_numpy(dtype=float)) & np.isfinite(view[target_roc].to_numpy(dtype=float))]
+    rows = []
+    for (source_y, target_y), pairs in finite.groupby([f"{source_type} delta_y", f"{target_type} delta_y"], sort=False):
+        rows.append({'source': series_name(source_type, source_y), 'target': series_name(target_type, target_y),
+                     'events': len(pairs), 'correlation': pairs[source_roc].corr(pairs[target_roc])})
+    return DataFrame(rows, columns=['source', 'target', 'events', 'correlation'])
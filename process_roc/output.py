@@ -0,0 +1,178 @@
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from pandas import DataFrame
+from typing import List, Optional
+
+TABLE_FORMATS = ('csv', 'parquet')
+FIGURE_FORMATS = ('html', 'png')
+OUTPUT_FORMATS = TABLE_FORMATS + FIGURE_FORMATS
+
+# Guards the one write of plotly.min.js into an output folder; the figures are
+# then rendered in parallel, each referencing that file.
+_PLOTLYJS_LOCK = threading.Lock()
+
+def add_output_arguments(parser) -> None:
+    """
+    Adds the --output_dir, --format and --show options of ResultWriter to an argument parser.
+    """
+    parser.add_argument('--output_dir', '--output-dir', default=None,
+                        help='Write the result tables and plots to this folder instead of displaying the plots')
+    parser.add_argument('--format', nargs='+', choices=OUTPUT_FORMATS, default=['csv', 'html'],
+                        help='Formats written to the output folder (default: csv html)')
+    parser.add_argument('--show', action='store_true',
+                        help='Also display the plots interactively when writing them to the output folder')
+
+def figures_requested(args) -> bool:
+    """
+    Tells whether the options added by add_output_arguments ask for figures: displayed
+    without --output_dir or with --show, or written with a figure format.
+    """
+    return not args.output_dir or args.show or any(file_format in FIGURE_FORMATS for file_format in args.format)
+
+def load_pyplot(headless: bool = False):
+    """
+    Imports matplotlib.pyplot on first use, selecting the non-interactive Agg backend
+    before pyplot loads when headless, so no GUI toolkit is imported.
+    """
+    import matplotlib
+
+    if headless:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def output_name(title: str) -> str:
+    """
+    Turns a title, e.g. of a plot, into a file name without extension.
+    """
+    return re.sub(r'[^0-9A-Za-z]+', '_', title).strip('_').lower() or 'output'
+
+class ResultWriter:
+    """
+    Writes ROC tables and figures to an output folder without a display.
+
+    Tables are written as CSV and/or Parquet and figures as HTML and/or PNG,
+    depending on formats. Writing and rendering run in a background thread pool,
+    so figures are rendered while the next results are computed; close waits
+    for all of them and raises the first error. Plotly and matplotlib figures
+    are both accepted, and must not be modified after being written.
+
+    Args:
+        output_dir (str): Folder receiving the files, created if missing.
+        formats (Optional[List[str]]): Any of csv, parquet, html and png. Defaults to csv and html.
+        show (bool): Also display the figures interactively.
+        workers (int): Number of background threads.
+    """
+
+    def __init__(self, output_dir: str, formats: Optional[List[str]] = None, show: bool = False, workers: int = 2) -> None:
+        formats = list(formats or ['csv', 'html'])
+        unknown = [file_format for file_format in formats if file_format not in OUTPUT_FORMATS]
+        if unknown:
+            raise ValueError(f"Unknown output format: {', '.join(unknown)}")
+
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.formats = formats
+        self.show = show
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='roc-output')
+        self._pending: List[Future] = []
+
+    @property
+    def renders_figures(self) -> bool:
+        """
+        Whether written figures are used at all: rendered to a figure format or displayed.
+        """
+        return self.show or any(file_format in FIGURE_FORMATS for file_format in self.formats)
+
+    def write_table(self, df: DataFrame, name: str) -> None:
+        """
+        Writes df as name.csv and/or name.parquet in the background.
+        """
+        for file_format in self.formats:
+            if file_format in TABLE_FORMATS:
+                self._submit(_write_table, df, self.output_dir / f"{name}.{file_format}", file_format)
+
+    def write_figure(self, fig, name: str) -> None:
+        """
+        Renders fig to name.html and/or name.png in the background.
+        """
+        for file_format in self.formats:
+            if file_format in FIGURE_FORMATS:
+                self._submit(_write_figure, fig, self.output_dir / f"{name}.{file_format}", file_format)
+
+        if self.show:
+            fig.show()
+
+    def close(self) -> None:
+        """
+        Waits for all files to be written.
+
+        Raises:
+            Exception: The first error raised while writing a file.
+        """
+        try:
+            for future in self._pending:
+                future.result()
+        finally:
+            self._pending = []
+            self._executor.shutdown(wait=True)
+
+    def _submit(self, function, *args) -> None:
+        self._pending.append(self._executor.submit(function, *args))
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def _write_table(df: DataFrame, path: Path, file_format: str) -> None:
+    if file_format == 'csv':
+        df.to_csv(path, index=False)
+        return
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Writing ROC tables as Parquet requires pyarrow.") from exc
+    df.to_parquet(path, index=False)
+
+def _write_figure(fig, path: Path, file_format: str) -> None:
+    if hasattr(fig, 'savefig'):
+        # matplotlib: HTML embeds the PNG rendering, as matplotlib has no HTML output.
+        if file_format == 'png':
+            fig.savefig(path)
+        else:
+            _write_matplotlib_html(fig, path)
+        return
+
+    if file_format == 'html':
+        # The figures of a folder share one plotly.min.js written next to them, so they open offline.
+        _write_plotlyjs(path.parent)
+        fig.write_html(path, include_plotlyjs='directory')
+        return
+
+    try:
+        import kaleido  # noqa: F401
+    except ImportError as exc:
+        raise ImportError("Rendering plotly figures as PNG requires kaleido.") from exc
+    fig.write_image(path)
+
+def _write_plotlyjs(directory: Path) -> None:
+    # write_html only copies the bundle when it is missing, so it skips it once this ran.
+    bundle = directory / 'plotly.min.js'
+    with _PLOTLYJS_LOCK:
+        if not bundle.exists():
+            from plotly.offline import get_plotlyjs
+            bundle.write_text(get_plotlyjs(), encoding='utf-8')
+
+def _write_matplotlib_html(fig, path: Path) -> None:
+    import base64
+    import io
+
+    image = io.BytesIO()
+    fig.savefig(image, format='png')
+    encoded = base64.b64encode(image.getvalue()).decode('ascii')
+    path.write_text(f'<html><body><img src="data:image/png;base64,{encoded}"/></body></html>')
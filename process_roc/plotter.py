@@ -1,27 +1,129 @@
-import plotly.graph_objects as go
+import numpy as np
 from pandas import DataFrame
+from typing import TYPE_CHECKING, Optional
+from process_roc.downsampling import (density_grid, from_numeric_axis, lttb_indices, numeric_axis, percentile_bands,
+                                      split_traces)
+from process_roc.output import ResultWriter, output_name
+from process_roc.profiling import profiled
 
-def plot_traces(df: DataFrame, x_col: str, y_col: str, case_id_column: str, title: str, y_axis_title: str, x_axis_type: str = "linear") -> None:
-    fig = go.Figure()
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
 
-    for case_id in df[case_id_column].unique():
-        trace_data = df[df[case_id_column] == case_id].dropna(subset=[y_col])
-        if trace_data.empty:
-            continue
+PLOT_MODES = ("auto", "traces", "bands", "density")
 
-        fig.add_trace(go.Scatter(
-            x=trace_data[x_col],
-            y=trace_data[y_col],
-            mode='lines+markers',
-            name=f'Case {case_id}'
-        ))
+@profiled
+def build_traces_figure(df: DataFrame, x_col: str, y_col: str, case_id_column: str, title: str, y_axis_title: str,
+                        mode: str = "auto", max_points: int = 100_000, max_traces: int = 200, bins: int = 200) -> "go.Figure":
+    """
+    Builds the figure of y_col over x_col for all cases in df.
+
+    The rows are grouped by case once, and lines are drawn with WebGL (Scattergl).
+    Traces longer than their share of max_points are downsampled with LTTB.
+    With more than max_traces cases, "auto" switches to the percentile bands of all
+    cases, whose size does not grow with the number of cases.
+
+    Args:
+        df (DataFrame): ROC rows of one or more cases.
+        x_col (str): Column on the X axis.
+        y_col (str): Column on the Y axis; rows with a missing or infinite value are skipped.
+        case_id_column (str): The name of the column that identifies each case.
+        title (str): Title of the figure.
+        y_axis_title (str): Title of the Y axis.
+        mode (str): "traces" draws a line per case, "bands" the 5-25-50-75-95th percentiles
+            of y per x bin, "density" a heatmap of the number of points per (x, y) bin,
+            and "auto" picks traces or bands from the number of cases.
+        max_points (int): Cap on the points drawn in traces mode, shared by the cases.
+        max_traces (int): Largest number of cases drawn as traces in auto mode.
+        bins (int): Number of x bins (and y bins in density mode) of the aggregated views.
+
+    Returns:
+        go.Figure: The figure.
+
+    Raises:
+        ValueError: If the mode is unknown.
+    """
+    if mode not in PLOT_MODES:
+        raise ValueError(f"Unknown plot mode: {mode}")
+
+    valid = df[np.isfinite(df[y_col].to_numpy(dtype=float))]
+    if mode == "auto":
+        mode = "traces" if valid[case_id_column].nunique() <= max_traces else "bands"
+
+    # plotly is imported on the first figure, keeping it out of runs that only compute tables.
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    if mode == "traces":
+        _add_traces(fig, valid, x_col, y_col, case_id_column, max_points)
+    elif not valid.empty:
+        x = numeric_axis(valid[x_col])
+        y = valid[y_col].to_numpy(dtype=float)
+        if mode == "bands":
+            _add_percentile_bands(fig, percentile_bands(x, y, bins), valid[x_col], y_col)
+        else:
+            x_centers, y_centers, counts = density_grid(x, y, bins)
+            fig.add_trace(go.Heatmap(x=from_numeric_axis(x_centers, valid[x_col]), y=y_centers, z=counts,
+                                     colorscale='Viridis', colorbar=dict(title="Events")))
 
     fig.update_layout(
         title=title,
         xaxis_title=x_col,
         yaxis_title=y_axis_title,
-        legend_title="Case ID",
+        legend_title="Case ID" if mode == "traces" else "Percentile",
         template="plotly_white"
     )
 
-    fig.show()
\ No newline at end of file
+    return fig
+
+def _add_traces(fig: "go.Figure", df: DataFrame, x_col: str, y_col: str, case_id_column: str, max_points: int) -> None:
+    import plotly.graph_objects as go
+
+    traces = split_traces(df, x_col, y_col, case_id_column)
+    points_per_trace = max(max_points // max(len(traces), 1), 3)
+    y = df[y_col].to_numpy(dtype=float)
+
+    lines = []
+    for case_id, positions, x in traces:
+        kept = positions[lttb_indices(x, y[positions], points_per_trace)]
+        lines.append(go.Scattergl(
+            x=df[x_col].iloc[kept],
+            y=df[y_col].iloc[kept],
+            mode='lines+markers',
+            name=f'Case {case_id}'
+        ))
+    # Adding all traces at once avoids revalidating the figure after every trace.
+    fig.add_traces(lines)
+
+def _add_percentile_bands(fig: "go.Figure", bands: DataFrame, x_values, y_col: str) -> None:
+    import plotly.graph_objects as go
+
+    x = from_numeric_axis(bands['x'].to_numpy(), x_values)
+    for low, high, opacity in (('p5', 'p95', 0.15), ('p25', 'p75', 0.3)):
+        fig.add_trace(go.Scatter(x=x, y=bands[high], mode='lines', line=dict(width=0),
+                                 showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=x, y=bands[low], mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor=f'rgba(31, 119, 180, {opacity})', name=f'{low[1:]}-{high[1:]}th'))
+    fig.add_trace(go.Scatter(x=x, y=bands['p50'], mode='lines', line=dict(color='rgb(31, 119, 180)'),
+                             name=f'Median {y_col}'))
+
+@profiled
+def plot_traces(df: DataFrame, x_col: str, y_col: str, case_id_column: str, title: str, y_axis_title: str, x_axis_type: str = "linear",
+                output: Optional[ResultWriter] = None, mode: str = "auto", max_points: int = 100_000) -> None:
+    """
+    Plots y_col over x_col with one line per case, or aggregated views for many cases
+    (see build_traces_figure for mode and max_points).
+
+    Without output the figure is displayed interactively. With output it is rendered
+    in the background to the output folder, named after the title, and only
+    displayed when the writer asks for it. When the writer neither renders figures
+    nor displays them, the figure is not built at all.
+    """
+    if output is not None and not output.renders_figures:
+        return
+
+    fig = build_traces_figure(df, x_col, y_col, case_id_column, title, y_axis_title, mode, max_points)
+
+    if output is None:
+        fig.show()
+    else:
+        output.write_figure(fig, output_name(title))
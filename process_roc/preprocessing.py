@@ -1,40 +1,239 @@
+import numpy as np
 import pandas as pd
-from pandas import DataFrame
-from typing import List, Optional, Union
+from pandas import DataFrame, Series
+from typing import Dict, List, Optional, Tuple, Union
+from process_roc.profiling import profiled
+from process_roc.resampling import TimeBuckets, floor_timestamps
+from process_roc.timestamps import parse_timestamps
+from process_roc.xes import iter_xes_chunks, read_xes
 
-def prepare_data(log_file: str, case_id_column: str) -> DataFrame:
+CaseIndex = Dict[str, Tuple[int, int]]
+
+# Columns added by prepare_data, never read from the log.
+DERIVED_COLUMNS = ('timestamp_minutes', 'rounded_time', 'frequency')
+
+ACTIVITY_COLUMN = 'concept:name'
+
+@profiled
+def build_case_index(df: DataFrame, case_id_column: str) -> CaseIndex:
+    """
+    Builds a case_id -> (start, stop) row-range map over a log sorted by case.
+
+    Args:
+        df (DataFrame): Event log whose rows are grouped by case.
+        case_id_column (str): Name of the column identifying cases.
+
+    Returns:
+        CaseIndex: Positional row range of every case, usable with df.iloc[start:stop].
+
+    Raises:
+        ValueError: If the rows of a case are not contiguous.
+    """
+    case_ids = df[case_id_column].to_numpy()
+    if len(case_ids) == 0:
+        return {}
+
+    starts = np.flatnonzero(np.r_[True, case_ids[1:] != case_ids[:-1]])
+    stops = np.r_[starts[1:], len(case_ids)]
+
+    case_index = {case_ids[start]: (int(start), int(stop)) for start, stop in zip(starts, stops)}
+    if len(case_index) != len(starts):
+        raise ValueError("The log must be sorted by case to build a case index.")
+
+    return case_index
+
+@profiled
+def read_log(log_file: str) -> DataFrame:
+    """
+    Reads an event log from a CSV or XES (.xes, .xes.gz) file.
+
+    Args:
+        log_file (str): Path to the log file.
+
+    Returns:
+        DataFrame: One row per event.
+    """
+    if str(log_file).lower().endswith(('.xes', '.xes.gz')):
+        return read_xes(log_file)
+    return pd.read_csv(log_file)
+
+def log_columns(log_file: str) -> List[str]:
+    """
+    Returns the columns of an event log without reading all of its events: the header of
+    a CSV log, or the attributes of the first block of events of an XES log.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+
+    Returns:
+        List[str]: The column names.
+    """
+    if str(log_file).lower().endswith(('.xes', '.xes.gz')):
+        first_chunk = next(iter_xes_chunks(log_file), DataFrame())
+        return list(first_chunk.columns)
+    return list(pd.read_csv(log_file, nrows=0).columns)
+
+@profiled
+def read_log_compact(log_file: str, case_id_column: str, value_columns: List[str]) -> DataFrame:
+    """
+    Reads only the columns needed to compute ROC over value_columns, with compact dtypes.
+
+    The case column and the activity column are loaded as categoricals, and integer
+    value columns are downcast to the smallest of int32/int64 that holds them
+    (narrower integers would make diff() return float32). Float columns stay float64
+    so ROC values are unchanged.
+
+    Args:
+        log_file (str): Path to the CSV or XES log file.
+        case_id_column (str): Name of the column identifying cases.
+        value_columns (List[str]): delta_y/delta_x columns; derived columns are skipped.
+
+    Returns:
+        DataFrame: The case, timestamp and value columns of the log.
+
+    Raises:
+        ValueError: If a value column is neither in the log nor derived by prepare_data.
+    """
+    is_xes = str(log_file).lower().endswith(('.xes', '.xes.gz'))
+    if is_xes:
+        # XES has no header to peek at; the streamed log is pruned after reading.
+        full_log = read_xes(log_file)
+        header = full_log.columns
+    else:
+        header = pd.read_csv(log_file, nrows=0).columns
+    timestamp_column = find_timestamp_column(DataFrame(columns=header))
+
+    source_columns = [column for column in value_columns if column not in DERIVED_COLUMNS]
+    missing = [column for column in [case_id_column] + source_columns if column not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {missing}")
+
+    needed = {case_id_column, timestamp_column, *source_columns}
+    categorical = {column: 'category' for column in (case_id_column, ACTIVITY_COLUMN) if column in needed}
+
+    if is_xes:
+        df = full_log[[column for column in header if column in needed]].astype(categorical)
+    else:
+        df = pd.read_csv(log_file, usecols=lambda column: column in needed, dtype=categorical)
+
+    for column in source_columns:
+        if pd.api.types.is_integer_dtype(df[column]):
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+            if df[column].dtype.itemsize < 4:
+                df[column] = df[column].astype('int32')
+
+    return df
+
+@profiled
+def prepare_data(log_file: str, case_id_column: str, with_case_index: bool = False,
+                 value_columns: Optional[List[str]] = None,
+                 granularity: str = 'day') -> Union[DataFrame, Tuple[DataFrame, CaseIndex]]:
     """
     Reads and prepares the log data for ROC calculations.
 
     Args:
-        log_file (str): Path to the CSV log file.
+        log_file (str): Path to the CSV or XES log file.
         case_id_column (str): Name of the column identifying cases.
+        with_case_index (bool): Also return the case_id -> (start, stop) row ranges of the log.
+        value_columns (Optional[List[str]]): When given (e.g. [delta_y, delta_x]), only the columns
+            needed for them are loaded, with compact dtypes (see read_log_compact).
+        granularity (str): Size of the rounded_time buckets counted by frequency: hour, day, week or month.
 
     Returns:
-        DataFrame: Processed log dataframe with additional time features and frequency.
+        DataFrame: Processed log dataframe with additional time features and frequency,
+            or a (DataFrame, CaseIndex) tuple when with_case_index is set.
     """
     
-    df = pd.read_csv(log_file)
+    if value_columns is None:
+        df = read_log(log_file)
+    else:
+        df = read_log_compact(log_file, case_id_column, value_columns)
+
+    timestamp_column = find_timestamp_column(df)
 
+    df = add_time_features(df, case_id_column, timestamp_column, granularity)
+
+    df = add_frequency(df)
+
+    if with_case_index:
+        return df, build_case_index(df, case_id_column)
+
+    return df
+
+def find_timestamp_column(df: DataFrame) -> str:
+    """
+    Checks that the log has case and time columns and returns the timestamp column.
+
+    Raises:
+        ValueError: If the log does not contain the necessary columns.
+    """
     required_columns = [col for col in df.columns if 'case' in col.lower() or 'time' in col.lower()]
     if len(required_columns) < 2:
         raise ValueError("The log file does not contain the necessary columns to process.")
 
-    timestamp_column = [col for col in df.columns if 'time' in col.lower() or 'timestamp' in col.lower()][0]
+    return [col for col in df.columns if 'time' in col.lower() or 'timestamp' in col.lower()][0]
 
-    df[timestamp_column] = pd.to_datetime(df[timestamp_column])
+@profiled
+def add_time_features(df: DataFrame, case_id_column: str, timestamp_column: str, granularity: str = 'day') -> DataFrame:
+    """
+    Parses the timestamps, sorts the log by case and time and adds
+    timestamp_minutes (minutes since the start of the case) and rounded_time
+    (start of the hour, day, week or month, see floor_timestamps).
+    """
+    df[timestamp_column] = parse_timestamps(df[timestamp_column])
 
     df = df.dropna(subset=[timestamp_column])
 
     df = df.sort_values(by=[case_id_column, timestamp_column])
 
-    df['timestamp_minutes'] = df.groupby(case_id_column)[timestamp_column] \
-        .transform(lambda x: (x - x.min()).dt.total_seconds() / 60.0)
+    df['timestamp_minutes'] = minutes_since_case_start(df, case_id_column, timestamp_column)
 
-    df['rounded_time'] = df[timestamp_column].dt.floor('1D')
+    df['rounded_time'] = floor_timestamps(df[timestamp_column], granularity)
 
-    frequency_over_time = df.groupby('rounded_time').size().reset_index(name='frequency')
+    return df
 
-    df = df.merge(frequency_over_time, how='left', on='rounded_time')
+def minutes_since_case_start(df: DataFrame, case_id_column: str, timestamp_column: str) -> Series:
+    """
+    Returns the minutes elapsed between each event and the first event of its case.
+    """
+    case_start = df.groupby(case_id_column)[timestamp_column].transform('min')
+    return (df[timestamp_column] - case_start).dt.total_seconds() / 60.0
 
-    return df
+@profiled
+def add_frequency(df: DataFrame, frequency_over_time: Optional[DataFrame] = None) -> DataFrame:
+    """
+    Adds the number of events per rounded_time bucket as the frequency column.
+
+    Args:
+        df (DataFrame): Log with a rounded_time column.
+        frequency_over_time (Optional[DataFrame]): Precomputed rounded_time/frequency counts,
+            used when df is only part of the log. Computed from df when omitted.
+    """
+    if frequency_over_time is None:
+        frequency_over_time = df.groupby('rounded_time').size().reset_index(name='frequency')
+
+    return df.merge(frequency_over_time, how='left', on='rounded_time')
+
+@profiled
+def set_granularity(df: DataFrame, granularity: str, buckets: Optional[TimeBuckets] = None) -> DataFrame:
+    """
+    Returns a prepared log with rounded_time and frequency at another granularity, without
+    reading or parsing the log again.
+
+    rounded_time is floored from the parsed timestamps and frequency is rolled up from the
+    hourly event counts of buckets, so switching between granularities reuses the same buckets.
+
+    Args:
+        df (DataFrame): Log prepared by prepare_data, at any granularity.
+        granularity (str): hour, day, week or month.
+        buckets (Optional[TimeBuckets]): Hourly buckets of the timestamps of df, built from df when omitted.
+
+    Returns:
+        DataFrame: A copy of df with the new rounded_time and frequency columns.
+    """
+    timestamp_column = find_timestamp_column(df)
+    if buckets is None:
+        buckets = TimeBuckets(df, timestamp_column)
+    rounded_time = floor_timestamps(df[timestamp_column], granularity)
+    frequency = buckets.totals(granularity)['events'].reindex(rounded_time).to_numpy()
+    return df.assign(rounded_time=rounded_time, frequency=frequency)
@@ -0,0 +1,219 @@
+import bisect
+import functools
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pandas import DataFrame, Series
+from typing import Dict, Iterator, List, Optional
+
+# Upper bounds, in milliseconds, of the call duration histogram buckets; the last bucket is open.
+HISTOGRAM_BOUNDS_MS = (0.1, 1, 10, 100, 1000)
+
+_active: Optional["Profiler"] = None
+
+# Peak memory per stage needs tracemalloc.reset_peak, added in Python 3.9.
+MEMORY_TRACING = hasattr(tracemalloc, 'reset_peak')
+
+class _Frame:
+    __slots__ = ('stage', 'start', 'child_seconds', 'memory_start', 'memory_peak')
+
+    def __init__(self, stage: str, memory_start: int) -> None:
+        self.stage = stage
+        self.start = time.perf_counter()
+        self.child_seconds = 0.0
+        self.memory_start = memory_start
+        self.memory_peak = memory_start
+
+class _StageStats:
+    __slots__ = ('calls', 'seconds', 'self_seconds', 'rows_in', 'rows_out', 'peak_bytes', 'durations')
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.seconds = 0.0
+        self.self_seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.peak_bytes = 0
+        self.durations: List[float] = []
+
+class Profiler:
+    """
+    Collects the wall time, rows in and out and peak traced memory of every call
+    to a profiled function, aggregated per stage.
+
+    Nested stages are timed on their own as well: self seconds leave out the time
+    spent in profiled stages called from a stage. Peak memory is the highest
+    memory traced by tracemalloc during a call, above the memory in use when it started.
+
+    Args:
+        trace_memory (bool): Trace memory allocations, which slows down allocation-heavy code.
+            Ignored before Python 3.9, where only times and rows are recorded.
+    """
+
+    def __init__(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory and MEMORY_TRACING
+        self.stages: Dict[str, _StageStats] = {}
+        self._stack: List[_Frame] = []
+        self._start = time.perf_counter()
+        self._seconds: Optional[float] = None
+
+    def enter(self, stage: str) -> _Frame:
+        memory = 0
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                parent = self._stack[-1]
+                parent.memory_peak = max(parent.memory_peak, peak)
+            tracemalloc.reset_peak()
+            memory = current
+        frame = _Frame(stage, memory)
+        self._stack.append(frame)
+        return frame
+
+    def exit(self, frame: _Frame, rows_in: Optional[int], rows_out: Optional[int]) -> None:
+        seconds = time.perf_counter() - frame.start
+        self._stack.pop()
+
+        peak = 0
+        if self.trace_memory:
+            frame.memory_peak = max(frame.memory_peak, tracemalloc.get_traced_memory()[1])
+            peak = frame.memory_peak - frame.memory_start
+        if self._stack:
+            parent = self._stack[-1]
+            parent.child_seconds += seconds
+            parent.memory_peak = max(parent.memory_peak, frame.memory_peak)
+
+        stats = self.stages.setdefault(frame.stage, _StageStats())
+        stats.calls += 1
+        stats.seconds += seconds
+        stats.self_seconds += seconds - frame.child_seconds
+        stats.rows_in += rows_in or 0
+        stats.rows_out += rows_out or 0
+        stats.peak_bytes = max(stats.peak_bytes, peak)
+        stats.durations.append(seconds)
+
+    def stop(self) -> None:
+        self._seconds = time.perf_counter() - self._start
+
+    def report(self) -> dict:
+        """
+        Returns the profile as a JSON-serializable dictionary, stages sorted by self time.
+        """
+        total = self._seconds if self._seconds is not None else time.perf_counter() - self._start
+        stages = []
+        for stage, stats in sorted(self.stages.items(), key=lambda item: -item[1].self_seconds):
+            durations_ms = sorted(duration * 1000 for duration in stats.durations)
+            stages.append({
+                'stage': stage,
+                'calls': stats.calls,
+                'seconds': stats.seconds,
+                'self_seconds': stats.self_seconds,
+                'rows_in': stats.rows_in,
+                'rows_out': stats.rows_out,
+                'peak_mib': stats.peak_bytes / 2**20 if self.trace_memory else None,
+                'p50_ms': durations_ms[len(durations_ms) // 2],
+                'p95_ms': durations_ms[min(int(len(durations_ms) * 0.95), len(durations_ms) - 1)],
+                'max_ms': durations_ms[-1],
+                'histogram_ms': _histogram(durations_ms),
+            })
+        return {'total_seconds': total, 'stages': stages}
+
+    def summary(self) -> str:
+        """
+        Returns a table of the stages, the slowest first, with the call histogram of repeated stages.
+        """
+        report = self.report()
+        lines = [f"Profile: {report['total_seconds']:.3f} s in total",
+                 f"{'stage':<34}{'calls':>8}{'self (s)':>10}{'total (s)':>11}{'share':>7}"
+                 f"{'rows in':>12}{'rows out':>12}{'peak MiB':>10}"]
+        for stage in report['stages']:
+            share = stage['self_seconds'] / report['total_seconds'] if report['total_seconds'] else 0
+            peak = f"{stage['peak_mib']:.1f}" if stage['peak_mib'] is not None else '-'
+            lines.append(f"{stage['stage']:<34}{stage['calls']:>8,}{stage['self_seconds']:>10.3f}"
+                         f"{stage['seconds']:>11.3f}{share:>7.1%}{stage['rows_in']:>12,}{stage['rows_out']:>12,}{peak:>10}")
+            if stage['calls'] > 1:
+                buckets = ', '.join(f"{bucket}: {count}" for bucket, count in stage['histogram_ms'].items() if count)
+                lines.append(f"{'':<4}per call: p50 {stage['p50_ms']:.2f} ms, p95 {stage['p95_ms']:.2f} ms, "
+                             f"max {stage['max_ms']:.2f} ms ({buckets})")
+        return '\n'.join(lines)
+
+def _histogram(durations_ms: List[float]) -> Dict[str, int]:
+    # durations_ms is sorted, so each bucket is the range between two bisections.
+    edges = [0] + [bisect.bisect_left(durations_ms, bound) for bound in HISTOGRAM_BOUNDS_MS] + [len(durations_ms)]
+    names = [f"{lower:g}-{upper:g} ms" for lower, upper in zip((0,) + HISTOGRAM_BOUNDS_MS, HISTOGRAM_BOUNDS_MS)]
+    names.append(f">={HISTOGRAM_BOUNDS_MS[-1]:g} ms")
+    return {name: stop - start for name, start, stop in zip(names, edges, edges[1:])}
+
+def _rows(value) -> Optional[int]:
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if isinstance(value, (DataFrame, Series)):
+        return len(value)
+    return None
+
+def profiled(function=None, *, stage: Optional[str] = None):
+    """
+    Decorates a pipeline function so its calls are recorded while profiling is on.
+
+    Rows in are the length of the first DataFrame (or Series) argument, rows out the length
+    of the returned DataFrame, or of the first item of a returned tuple. When profiling is
+    off the only overhead is one global lookup per call.
+
+    Args:
+        function: The function to decorate.
+        stage (Optional[str]): Name of the stage, by default the name of the function.
+    """
+    if function is None:
+        return functools.partial(profiled, stage=stage)
+
+    name = stage or function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        profiler = _active
+        if profiler is None:
+            return function(*args, **kwargs)
+
+        rows_in = next((len(value) for value in (*args, *kwargs.values()) if isinstance(value, DataFrame)), None)
+        if rows_in is None:
+            rows_in = next((len(value) for value in (*args, *kwargs.values()) if isinstance(value, Series)), None)
+
+        frame = profiler.enter(name)
+        result = None
+        try:
+            result = function(*args, **kwargs)
+            return result
+        finally:
+            profiler.exit(frame, rows_in, _rows(result))
+
+    return wrapper
+
+@contextmanager
+def profiling(output: Optional[str] = None, trace_memory: bool = True, print_summary: bool = True) -> Iterator[Profiler]:
+    """
+    Profiles the profiled functions called inside the block.
+
+    Args:
+        output (Optional[str]): Path of the JSON report written at the end of the block.
+        trace_memory (bool): Measure peak memory with tracemalloc (Python 3.9+).
+        print_summary (bool): Print the human-readable summary at the end of the block.
+    """
+    global _active
+    profiler = Profiler(trace_memory)
+    started_tracing = profiler.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    _active = profiler
+    try:
+        yield profiler
+    finally:
+        _active = None
+        profiler.stop()
+        if started_tracing:
+            tracemalloc.stop()
+        if output is not None:
+            with open(output, 'w') as report_file:
+                json.dump(profiler.report(), report_file, indent=2)
+        if print_summary:
+            print(profiler.summary())
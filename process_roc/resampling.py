@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from typing import Dict, List, Optional
+
+GRANULARITIES = ('hour', 'day', 'week', 'month')
+
+# Columns added by smooth_roc, with their labels in plots.
+SMOOTHED_ROC_COLUMNS = {'ROC_smoothed': 'Smoothed ROC', 'ROC_ewm': 'EWMA ROC'}
+
+def floor_timestamps(timestamps: Series, granularity: str = 'day') -> Series:
+    """
+    Returns the start of the hour, day, week (Monday) or month of every timestamp.
+
+    Raises:
+        ValueError: If the granularity is unknown.
+    """
+    if granularity == 'hour':
+        return timestamps.dt.floor('1H')
+
+    days = timestamps.dt.floor('1D')
+    if granularity == 'day':
+        return days
+    if granularity == 'week':
+        return days - pd.to_timedelta(days.dt.weekday, unit='D')
+    if granularity == 'month':
+        return days - pd.to_timedelta(days.dt.day - 1, unit='D')
+
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+class TimeBuckets:
+    """
+    Aggregates timestamped rows into hourly buckets once and rolls them up to
+    coarser granularities on demand.
+
+    Each bucket keeps the number of rows and the sum and count of every value
+    column, so means at any granularity come from the hourly buckets instead of
+    the raw rows. Rolled-up buckets are kept, so switching back and forth
+    between granularities is free.
+
+    Args:
+        df (DataFrame): Events, or cases from compute_metrics, with a timestamp column.
+        timestamp_column (str): Column assigning every row to a bucket.
+        value_columns (Optional[List[str]]): Numeric columns averaged per bucket.
+    """
+
+    def __init__(self, df: DataFrame, timestamp_column: str, value_columns: Optional[List[str]] = None) -> None:
+        self.value_columns = list(value_columns or [])
+        rows = df[self.value_columns].assign(events=1)
+        for column in self.value_columns:
+            rows[f"{column}_count"] = rows[column].notna().astype('int64')
+
+        hours = floor_timestamps(df[timestamp_column], 'hour').rename('bucket')
+        self._totals: Dict[str, DataFrame] = {'hour': rows.groupby(hours).sum()}
+
+    def totals(self, granularity: str = 'day') -> DataFrame:
+        """
+        Returns the row count and the per-column sums and counts of every non-empty bucket.
+        """
+        if granularity not in self._totals:
+            hourly = self._totals['hour']
+            buckets = floor_timestamps(hourly.index.to_series(), granularity)
+            self._totals[granularity] = hourly.groupby(buckets.to_numpy()).sum().rename_axis('bucket')
+        return self._totals[granularity]
+
+    def at(self, granularity: str = 'day') -> DataFrame:
+        """
+        Returns the number of rows and the mean of every value column per non-empty bucket.
+        """
+        totals = self.totals(granularity)
+        means = DataFrame({column: totals[column] / totals[f"{column}_count"] for column in self.value_columns},
+                          index=totals.index)
+        return means.assign(events=totals['events'])
+
+def smooth_roc(roc: Series, window: int = 1, ewm_span: Optional[float] = None,
+               groups: Optional[Series] = None) -> DataFrame:
+    """
+    Smooths a ROC series, within every group (e.g. trace) when groups is given.
+    Infinite ROC values (a change of y without a change of x) are left out of the means.
+
+    Args:
+        roc (Series): ROC values, in time order within every group.
+        window (int): Returns ROC_smoothed, the rolling mean of the ROC over this many steps, when above 1.
+        ewm_span (Optional[float]): Returns ROC_ewm, the exponentially weighted mean of the ROC, when given.
+        groups (Optional[Series]): Group of every value, aligned with roc.
+
+    Returns:
+        DataFrame: The requested smoothed columns, aligned with roc.
+    """
+    finite = Series(roc.to_numpy(dtype=float), index=pd.RangeIndex(len(roc)))
+    finite = finite.where(np.isfinite(finite))
+    if groups is not None:
+        finite = finite.groupby(groups.to_numpy(), sort=False)
+
+    smoothed = DataFrame(index=roc.index)
+    if window > 1:
+        means = finite.rolling(window, min_periods=1).mean()
+        smoothed['ROC_smoothed'] = _in_order(means, groups is not None)
+    if ewm_span is not None:
+        means = finite.ewm(span=ewm_span, ignore_na=True).mean()
+        smoothed['ROC_ewm'] = _in_order(means, groups is not None)
+    return smoothed
+
+def _in_order(means: Series, grouped: bool) -> np.ndarray:
+    # Grouped rolling and EWM results are ordered by group, under a (group, position) index.
+    if grouped:
+        means = means.droplevel(0).sort_index()
+    return means.to_numpy()
+
+def bucket_roc(values: Series, lag: int = 1, window: int = 1, ewm_span: Optional[float] = None) -> DataFrame:
+    """
+    Computes the ROC of a bucketed series between buckets lag steps apart, per bucket.
+
+    Args:
+        values (Series): One value per bucket, in time order, e.g. a column of TimeBuckets.at.
+        lag (int): Number of buckets between the two values of a difference.
+        window (int): Also returns ROC_smoothed, the rolling mean of the ROC over this many buckets.
+        ewm_span (Optional[float]): Also returns ROC_ewm, the exponentially weighted mean of the ROC.
+
+    Returns:
+        DataFrame: The values, their ROC and the requested smoothed variants, see smooth_roc.
+    """
+    result = DataFrame({values.name or 'value': values, 'ROC': values.diff(lag) / lag})
+    return result.join(smooth_roc(result['ROC'], window, ewm_span))
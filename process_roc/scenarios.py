@@ -1,65 +1,300 @@
-from process_roc.preprocessing import prepare_data
-from process_roc.calculator import calculate_roc_all_traces, calculate_roc_selected_traces, calculate_roc_single_trace
+import numpy as np
+import pandas as pd
+from process_roc.cache import prepare_data_cached
+from process_roc.calculator import (attach_rounded_time, calculate_roc_all_traces, calculate_roc_batch,
+                                    calculate_roc_selected_traces, calculate_roc_single_trace, calculate_smoothed_roc,
+                                    calculate_windowed_roc, pivot_batch_roc)
+from process_roc.chunked import calculate_roc_out_of_core
+from process_roc.ocel import (bucket_view, calculate_roc_object_types, event_correlation, event_view, load_object_logs,
+                              parse_object_columns, series_name)
+from process_roc.output import output_name
 from process_roc.plotter import plot_traces
+from process_roc.resampling import SMOOTHED_ROC_COLUMNS
+from process_roc.utils import DiscardedEventsCollector
 
-def scenario_1(log_file, case_id_column, delta_y, delta_x):
+def scenario_1(log_file, case_id_column, delta_y, delta_x, engine="groupby", discarded_format="csv", use_cache=True,
+               partitions=0, chunksize=500_000, workers=1, granularity="day", window=1, smooth=1, ewm_span=None,
+               output=None, plot_mode="auto", max_points=100_000, store=None):
     """
     Scenario 1:
     Calculate the ROC for a all traces and generate an interactive plot.
+    With partitions > 0 the log is processed out of core, chunksize rows at a time.
+    rounded_time and frequency use buckets of the given granularity, and with window > 1
+    the ROC spans the last window steps of each trace. smooth > 1 adds the rolling mean of the
+    ROC over smooth steps and ewm_span its exponentially weighted mean, each plotted on its own.
+    With output (a ResultWriter) the ROC table
+    and the plots are written to files instead of being displayed. plot_mode and max_points
+    choose between lines per case and aggregated views, see build_traces_figure. With store
+    (a ROCStore) the ROC table is appended to the result store as a new run, with the
+    rounded_time of every row so the store can partition it by date.
     """
 
-    df = prepare_data(log_file, case_id_column)
-    
-    all_traces_roc = calculate_roc_all_traces(df, delta_y=delta_y, delta_x=delta_x, 
-                                              case_id_column=case_id_column)
+    with DiscardedEventsCollector(discarded_format) as discarded_events:
+        if partitions > 0:
+            all_traces_roc = calculate_roc_out_of_core(log_file, delta_y=delta_y, delta_x=delta_x,
+                                                       case_id_column=case_id_column,
+                                                       partitions=partitions,
+                                                       chunksize=chunksize,
+                                                       discarded_events=discarded_events,
+                                                       granularity=granularity,
+                                                       with_rounded_time=store is not None)
+        else:
+            df = prepare_data_cached(log_file, case_id_column, use_cache=use_cache,
+                                     value_columns=[delta_y, delta_x], granularity=granularity)
+
+            all_traces_roc = calculate_roc_all_traces(df, delta_y=delta_y, delta_x=delta_x, 
+                                                      case_id_column=case_id_column,
+                                                      engine=engine,
+                                                      discarded_events=discarded_events,
+                                                      workers=workers)
+
+    all_traces_roc = calculate_windowed_roc(all_traces_roc, delta_y, delta_x, case_id_column, window)
+    all_traces_roc = calculate_smoothed_roc(all_traces_roc, case_id_column, smooth, ewm_span)
+    if output is not None:
+        output.write_table(all_traces_roc, output_name(f"roc {delta_y} over {delta_x} all cases"))
+    if store is not None:
+        if partitions == 0:
+            all_traces_roc = attach_rounded_time(all_traces_roc, df, delta_y, delta_x, case_id_column)
+        store.write(all_traces_roc, case_id_column, delta_y, delta_x, metadata={'log_file': str(log_file)})
     
     plot_traces(all_traces_roc, x_col=delta_x, y_col='ROC', 
                 case_id_column=case_id_column, 
-                title=f"ROC over {delta_x} for all Cases", y_axis_title="ROC")
+                title=f"ROC over {delta_x} for all Cases", y_axis_title="ROC", output=output,
+                mode=plot_mode, max_points=max_points)
+
+    for column, label in SMOOTHED_ROC_COLUMNS.items():
+        if column in all_traces_roc:
+            plot_traces(all_traces_roc, x_col=delta_x, y_col=column,
+                        case_id_column=case_id_column,
+                        title=f"{label} over {delta_x} for all Cases", y_axis_title=label, output=output,
+                        mode=plot_mode, max_points=max_points)
     
     plot_traces(all_traces_roc, x_col=delta_x, y_col=delta_y, 
                 case_id_column=case_id_column, 
-                title=f"Velocity over {delta_x} for all Cases", y_axis_title="Velocity")
+                title=f"Velocity over {delta_x} for all Cases", y_axis_title="Velocity", output=output,
+                mode=plot_mode, max_points=max_points)
 
-def scenario_2(log_file, case_id_column, delta_y, delta_x, selected_cases):
+def scenario_2(log_file, case_id_column, delta_y, delta_x, selected_cases, discarded_format="csv", use_cache=True,
+               granularity="day", window=1, smooth=1, ewm_span=None, output=None, plot_mode="auto",
+               max_points=100_000, store=None):
     """
     Scenario 2:
     Calculate the ROC for a set of selected traces and generate an interactive plot.
     """
 
-    df = prepare_data(log_file, case_id_column)
+    df, case_index = prepare_data_cached(log_file, case_id_column, with_case_index=True, use_cache=use_cache,
+                                         value_columns=[delta_y, delta_x], granularity=granularity)
 
-    selected_traces_roc = calculate_roc_selected_traces(df, selected_cases=selected_cases,
-                                                        delta_y=delta_y, 
-                                                        delta_x=delta_x,
-                                                        case_id_column=case_id_column)
+    with DiscardedEventsCollector(discarded_format) as discarded_events:
+        selected_traces_roc = calculate_roc_selected_traces(df, selected_cases=selected_cases,
+                                                            delta_y=delta_y, 
+                                                            delta_x=delta_x,
+                                                            case_id_column=case_id_column,
+                                                            case_index=case_index,
+                                                            discarded_events=discarded_events)
+
+    selected_traces_roc = calculate_windowed_roc(selected_traces_roc, delta_y, delta_x, case_id_column, window)
+    selected_traces_roc = calculate_smoothed_roc(selected_traces_roc, case_id_column, smooth, ewm_span)
+    if output is not None:
+        output.write_table(selected_traces_roc, output_name(f"roc {delta_y} over {delta_x} selected cases"))
+    if store is not None:
+        store.write(attach_rounded_time(selected_traces_roc, df, delta_y, delta_x, case_id_column),
+                    case_id_column, delta_y, delta_x,
+                    metadata={'log_file': str(log_file), 'case_ids': ' '.join(map(str, selected_cases))})
 
     plot_traces(selected_traces_roc, x_col=delta_x, y_col='ROC',
                 case_id_column=case_id_column,
                 title=f"ROC over {delta_x} for Selected Cases: {', '.join(selected_cases)}",
-                y_axis_title="ROC")
+                y_axis_title="ROC", output=output,
+                mode=plot_mode, max_points=max_points)
+
+    for column, label in SMOOTHED_ROC_COLUMNS.items():
+        if column in selected_traces_roc:
+            plot_traces(selected_traces_roc, x_col=delta_x, y_col=column,
+                        case_id_column=case_id_column,
+                        title=f"{label} over {delta_x} for Selected Cases: {', '.join(selected_cases)}",
+                        y_axis_title=label, output=output,
+                        mode=plot_mode, max_points=max_points)
     
     plot_traces(selected_traces_roc, x_col=delta_x, y_col=delta_y, 
                 case_id_column=case_id_column, 
-                title=f"Velocity over {delta_x} for Selected Cases", y_axis_title="Velocity")
+                title=f"Velocity over {delta_x} for Selected Cases", y_axis_title="Velocity", output=output,
+                mode=plot_mode, max_points=max_points)
 
-def scenario_3(log_file, case_id_column, delta_y, delta_x, case_id):
+def scenario_3(log_file, case_id_column, delta_y, delta_x, case_id, discarded_format="csv", use_cache=True,
+               granularity="day", window=1, smooth=1, ewm_span=None, output=None, plot_mode="auto",
+               max_points=100_000, store=None):
     """
     Scenario 3:
     Calculate the ROC for a single trace and generate an interactive plot.
     """
    
-    df = prepare_data(log_file, case_id_column)
+    df, case_index = prepare_data_cached(log_file, case_id_column, with_case_index=True, use_cache=use_cache,
+                                         value_columns=[delta_y, delta_x], granularity=granularity)
 
-    single_trace_roc = calculate_roc_single_trace(df, case_id=case_id,
-                                                  delta_y=delta_y,
-                                                  delta_x=delta_x,
-                                                  case_id_column=case_id_column)
+    with DiscardedEventsCollector(discarded_format) as discarded_events:
+        single_trace_roc = calculate_roc_single_trace(df, case_id=case_id,
+                                                      delta_y=delta_y,
+                                                      delta_x=delta_x,
+                                                      case_id_column=case_id_column,
+                                                      case_index=case_index,
+                                                      discarded_events=discarded_events)
+
+    single_trace_roc = calculate_windowed_roc(single_trace_roc, delta_y, delta_x, case_id_column, window)
+    single_trace_roc = calculate_smoothed_roc(single_trace_roc, case_id_column, smooth, ewm_span)
+    if output is not None:
+        output.write_table(single_trace_roc, output_name(f"roc {delta_y} over {delta_x} case {case_id}"))
+    if store is not None:
+        store.write(attach_rounded_time(single_trace_roc, df, delta_y, delta_x, case_id_column),
+                    case_id_column, delta_y, delta_x,
+                    metadata={'log_file': str(log_file), 'case_ids': str(case_id)})
 
     plot_traces(single_trace_roc, x_col=delta_x, y_col='ROC',
                 case_id_column=case_id_column,
-                title=f"ROC over {delta_x} for Case {case_id}", y_axis_title="ROC")
+                title=f"ROC over {delta_x} for Case {case_id}", y_axis_title="ROC", output=output,
+                mode=plot_mode, max_points=max_points)
+
+    for column, label in SMOOTHED_ROC_COLUMNS.items():
+        if column in single_trace_roc:
+            plot_traces(single_trace_roc, x_col=delta_x, y_col=column,
+                        case_id_column=case_id_column,
+                        title=f"{label} over {delta_x} for Case {case_id}", y_axis_title=label, output=output,
+                        mode=plot_mode, max_points=max_points)
 
     plot_traces(single_trace_roc, x_col=delta_x, y_col=delta_y, 
                 case_id_column=case_id_column, 
-                title=f"Velocity over {delta_x} for Case {case_id}", y_axis_title="Velocity")
\ No newline at end of file
+                title=f"Velocity over {delta_x} for Case {case_id}", y_axis_title="Velocity", output=output,
+                mode=plot_mode, max_points=max_points)
+
+def scenario_batch(log_file, case_id_column, delta_ys, delta_xs, case_ids=None, layout="long", batch_output=None,
+                   discarded_format="csv", use_cache=True, granularity="day", window=1, smooth=1, ewm_span=None,
+                   output=None, plot_mode="auto", max_points=100_000, store=None):
+    """
+    Batch scenario:
+    Calculate the ROC of every (delta_y, delta_x) pair for all traces, or only for case_ids,
+    and generate an interactive plot per pair. The log is loaded and prepared once for all pairs,
+    and with batch_output the ROC of all pairs is written to one CSV table in the given layout,
+    after windowing and smoothing. With store the ROC of every pair is appended to the result store.
+    """
+
+    df = prepare_data_cached(log_file, case_id_column, use_cache=use_cache,
+                             value_columns=list(delta_ys) + list(delta_xs), granularity=granularity)
+    if case_ids:
+        df = df[df[case_id_column].isin(case_ids)].reset_index(drop=True)
+
+    with DiscardedEventsCollector(discarded_format) as discarded_events:
+        batch_roc = calculate_roc_batch(df, delta_ys=delta_ys, delta_xs=delta_xs,
+                                        case_id_column=case_id_column,
+                                        discarded_events=discarded_events)
+
+    pair_rocs = {}
+    for (delta_y, delta_x), pair_roc in batch_roc.groupby(['delta_y', 'delta_x'], sort=False):
+        pair_roc = pair_roc.drop(columns=['delta_y', 'delta_x']).rename(columns={'x': delta_x, 'y': delta_y}).infer_objects()
+        pair_roc = calculate_windowed_roc(pair_roc.reset_index(drop=True), delta_y, delta_x, case_id_column, window)
+        pair_rocs[delta_y, delta_x] = calculate_smoothed_roc(pair_roc, case_id_column, smooth, ewm_span)
+
+    if batch_output or output is not None:
+        if layout == "wide":
+            table = pivot_batch_roc(df, pair_rocs, case_id_column)
+        elif pair_rocs:
+            # The pairs are contiguous blocks of batch_roc, in the order of pair_rocs.
+            pair_tables = list(pair_rocs.values())
+            roc_columns = [column for column in ['ROC', *SMOOTHED_ROC_COLUMNS] if column in pair_tables[0]]
+            table = batch_roc.assign(**{column: np.concatenate([pair_roc[column].to_numpy() for pair_roc in pair_tables])
+                                        for column in roc_columns})
+        else:
+            table = batch_roc
+        if batch_output:
+            table.to_csv(batch_output, index=False)
+        if output is not None:
+            output.write_table(table, f"roc_batch_{layout}")
+
+    cases = f"Selected Cases: {', '.join(case_ids)}" if case_ids else "all Cases"
+    for (delta_y, delta_x), pair_roc in pair_rocs.items():
+        if store is not None:
+            store.write(attach_rounded_time(pair_roc, df, delta_y, delta_x, case_id_column),
+                        case_id_column, delta_y, delta_x,
+                        metadata={'log_file': str(log_file), 'case_ids': ' '.join(map(str, case_ids or [])) or 'all'})
+
+        plot_traces(pair_roc, x_col=delta_x, y_col='ROC',
+                    case_id_column=case_id_column,
+                    title=f"ROC of {delta_y} over {delta_x} for {cases}", y_axis_title="ROC", output=output,
+                    mode=plot_mode, max_points=max_points)
+
+        for column, label in SMOOTHED_ROC_COLUMNS.items():
+            if column in pair_roc:
+                plot_traces(pair_roc, x_col=delta_x, y_col=column,
+                            case_id_column=case_id_column,
+                            title=f"{label} of {delta_y} over {delta_x} for {cases}", y_axis_title=label,
+                            output=output, mode=plot_mode, max_points=max_points)
+
+        plot_traces(pair_roc, x_col=delta_x, y_col=delta_y,
+                    case_id_column=case_id_column,
+                    title=f"Velocity of {delta_y} over {delta_x} for {cases}", y_axis_title="Velocity", output=output,
+                    mode=plot_mode, max_points=max_points)
+
+def scenario_objects(log_files, case_id_column, delta_ys, delta_x, discarded_format="csv", use_cache=True,
+                     granularity="day", window=1, output=None, plot_mode="auto", max_points=100_000, store=None):
+    """
+    Object-centric scenario:
+    Load the logs of every object type of an OCEL log once, calculate the ROC of every
+    object type and relate the types through their rounded_time buckets and their shared
+    events. delta_ys are columns of every log that has them, or of one type when written
+    as <object type>:<column>. Prints the events shared by the types and the correlations,
+    and plots the ROC of every type and the mean ROC per bucket of all of them. With store
+    the ROC of every type is appended to the result store, with delta_y named <object type>:<column>.
+    """
+
+    object_logs = load_object_logs(log_files, case_id_column, granularity=granularity, use_cache=use_cache)
+    shared = object_logs.shared_events()
+    print("Events shared by object types:")
+    print(shared)
+
+    with DiscardedEventsCollector(discarded_format) as discarded_events:
+        object_roc = calculate_roc_object_types(object_logs, parse_object_columns(delta_ys, object_logs), delta_x,
+                                                window, discarded_events)
+
+    buckets = bucket_view(object_roc)
+    correlation = buckets.drop(columns='rounded_time').corr()
+    print(f"\nCorrelation of the mean ROC per {granularity}:")
+    print(correlation.round(3))
+
+    types = list(object_roc['object_type'].unique())
+    event_tables = []
+    for position, source_type in enumerate(types):
+        for target_type in types[position + 1:]:
+            if shared.loc[source_type, target_type]:
+                pairs = event_view(object_roc, source_type, target_type, object_logs.event_id_column)
+                event_tables.append((source_type, target_type, pairs))
+    if event_tables:
+        print("\nCorrelation of the ROC at shared events:")
+        print(pd.concat([event_correlation(pairs, source_type, target_type)
+                         for source_type, target_type, pairs in event_tables], ignore_index=True))
+
+    if output is not None:
+        output.write_table(object_roc, output_name(f"roc objects over {delta_x}"))
+        output.write_table(buckets, output_name(f"roc objects mean per {granularity}"))
+        output.write_table(correlation.rename_axis('series').reset_index(), output_name(f"roc objects correlation per {granularity}"))
+        for source_type, target_type, pairs in event_tables:
+            output.write_table(pairs, output_name(f"roc {source_type} {target_type} shared events"))
+
+    for (object_type, delta_y), type_roc in object_roc.groupby(['object_type', 'delta_y'], sort=False):
+        if store is not None:
+            columns = [case_id_column, object_logs.event_id_column, 'rounded_time', 'y', 'x', 'ROC']
+            if delta_x == 'rounded_time':
+                columns.remove('rounded_time')
+            name = series_name(object_type, delta_y)
+            rows = type_roc[columns].rename(columns={'y': name, 'x': delta_x}).reset_index(drop=True)
+            store.write(rows, case_id_column, name, delta_x,
+                        metadata={'log_file': ' '.join(map(str, log_files))})
+        type_roc = type_roc[[case_id_column, 'x', 'ROC']].rename(columns={'x': delta_x})
+        plot_traces(type_roc, x_col=delta_x, y_col='ROC',
+                    case_id_column=case_id_column,
+                    title=f"ROC of {delta_y} over {delta_x} for all {object_type}", y_axis_title="ROC", output=output,
+                    mode=plot_mode, max_points=max_points)
+
+    series = buckets.melt(id_vars='rounded_time', var_name='series', value_name='ROC').dropna(subset=['ROC'])
+    plot_traces(series, x_col='rounded_time', y_col='ROC',
+                case_id_column='series',
+                title=f"Mean ROC per {granularity} by Object Type", y_axis_title="Mean ROC", output=output,
+                mode="traces", max_points=max_points)
@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import json
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from pandas import DataFrame
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+from process_roc.cache import log_fingerprint, prepare_data_cached
+from process_roc.calculator import calculate_roc_grouped, calculate_windowed_roc
+from process_roc.preprocessing import CaseIndex, find_timestamp_column, log_columns, set_granularity
+from process_roc.resampling import GRANULARITIES, TimeBuckets
+from process_roc.utils import DiscardedEventsCollector
+
+# Largest request body accepted, in bytes.
+MAX_BODY_BYTES = 1 << 20
+
+STATUS_REASONS = {200: 'OK', 400: 'Bad Request', 403: 'Forbidden', 404: 'Not Found', 405: 'Method Not Allowed',
+                  413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+class RequestError(Exception):
+    """
+    An invalid request, answered with the given HTTP status and the message as error.
+    """
+
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+class LRUCache:
+    """
+    Keeps values up to a total size in bytes, evicting the least recently used first.
+
+    The most recent value is always kept, even when it is larger than max_bytes on its own.
+
+    Args:
+        max_bytes (int): Total size of the values kept.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[object, int]]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        """
+        Returns the value of key, marking it as recently used, or None when missing.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value, nbytes: int) -> None:
+        """
+        Stores value under key, then evicts old entries until the cache fits in max_bytes.
+        """
+        self.pop(key)
+        self._entries[key] = (value, nbytes)
+        self.size += nbytes
+        while self.size > self.max_bytes and len(self._entries) > 1:
+            _, (_, evicted_bytes) = self._entries.popitem(last=False)
+            self.size -= evicted_bytes
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'mib': self.size / 2**20, 'max_mib': self.max_bytes / 2**20,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class PreparedLog:
+    """
+    A prepared log held in memory by the service, with its case index keyed by
+    case IDs as strings, as they arrive in requests.
+
+    The logs of one file at several granularities share the hourly buckets of its
+    timestamps, so switching granularity rolls them up instead of counting the events again.
+    """
+
+    def __init__(self, df: DataFrame, case_index: CaseIndex, fingerprint: str,
+                 buckets: Optional[TimeBuckets] = None) -> None:
+        self.df = df
+        self.case_index = {str(case_id): rows for case_id, rows in case_index.items()}
+        self.fingerprint = fingerprint
+        self.buckets = buckets
+        self.nbytes = int(df.memory_usage(deep=True).sum())
+
+    def at_granularity(self, granularity: str) -> "PreparedLog":
+        """
+        Returns the log with rounded_time and frequency at another granularity, see set_granularity.
+        """
+        if self.buckets is None:
+            self.buckets = TimeBuckets(self.df, find_timestamp_column(self.df))
+        return PreparedLog(set_granularity(self.df, granularity, self.buckets), self.case_index, self.fingerprint,
+                           self.buckets)
+
+def load_log(log_file: str, case_id_column: str, fingerprint: str, use_cache: bool = True) -> PreparedLog:
+    """
+    Prepares a whole log (every column, so any delta_y/delta_x pair can be queried) at day
+    granularity, with its case index.
+
+    Raises:
+        RequestError: If case_id_column is not a column of the log.
+    """
+    if case_id_column not in log_columns(log_file):
+        raise RequestError(400, f"Unknown column: {case_id_column}")
+    df, case_index = prepare_data_cached(log_file, case_id_column, with_case_index=True, use_cache=use_cache)
+    return PreparedLog(df, case_index, fingerprint)
+
+def roc_json(prepared: PreparedLog, case_id_column: str, delta_y: str, delta_x: str,
+             case_ids: Optional[List[str]] = None, window: int = 1) -> str:
+    """
+    Computes the ROC of one, several or (without case_ids) all cases of a prepared log.
+
+    Discarded events are not logged, as queries are repeated at will.
+
+    Returns:
+        str: The ROC rows as a JSON array of records, timestamps in ISO format. JSON has no
+            infinity, so an infinite ROC (a change of delta_y at the same delta_x) is written
+            as the string "inf" or "-inf"; a missing ROC (the first event of a case) is null.
+
+    Raises:
+        RequestError: If delta_y or delta_x is not a column of the log, or both are the same (400),
+            or case_ids holds cases missing from the log (404).
+    """
+    df = prepared.df
+    missing = [column for column in (delta_y, delta_x) if column not in df.columns]
+    if missing:
+        raise RequestError(400, f"Unknown column: {', '.join(missing)}")
+    if delta_y == delta_x:
+        raise RequestError(400, "delta_y and delta_x must differ")
+
+    discarded_events = DiscardedEventsCollector("none")
+    if case_ids is not None:
+        unknown = [str(case_id) for case_id in dict.fromkeys(case_ids) if case_id not in prepared.case_index]
+        if unknown:
+            raise RequestError(404, f"Unknown case_ids: {', '.join(unknown)}")
+        # The case index turns the selection into row ranges, which one grouped pass handles
+        # faster than a pass per case; cases come out in the requested order.
+        rows = [np.arange(*prepared.case_index.get(case_id, (0, 0))) for case_id in dict.fromkeys(case_ids)]
+        df = df.iloc[np.concatenate(rows)][[case_id_column, delta_y, delta_x]]
+    roc = calculate_roc_grouped(df, delta_y, delta_x, case_id_column, discarded_events)
+
+    roc = calculate_windowed_roc(roc, delta_y, delta_x, case_id_column, window)
+    infinite = np.isinf(roc['ROC'].to_numpy())
+    if infinite.any():
+        roc['ROC'] = roc['ROC'].astype(object).mask(infinite, np.where(roc['ROC'] > 0, 'inf', '-inf'))
+    return roc.to_json(orient='records', date_format='iso')
+
+class ROCService:
+    """
+    Answers ROC queries over HTTP/JSON from prepared logs kept in memory.
+
+    Prepared logs are kept in an LRU cache bounded by their memory use, and ROC
+    results, serialized as JSON, in a second one keyed by (log, case set, delta_y,
+    delta_x, window). A log whose file changed is prepared again, and its old
+    results are never served. Requests are handled by an asyncio front end;
+    preparing logs and computing ROC run in a thread pool, and concurrent requests
+    for the same log or result share a single computation.
+
+    Endpoints:
+        GET /health: Status and cache statistics.
+        GET /cases: Case IDs of a log, with log_file and case_id_column.
+        GET or POST /roc: ROC rows, with log_file, case_id_column, delta_y, delta_x and optionally
+            case_ids (repeated or comma-separated; all cases when omitted), window and granularity.
+            POST takes the same fields as a JSON object.
+
+    Args:
+        log_root (str): Only logs inside this folder can be queried.
+        max_log_bytes (int): Memory budget of the prepared logs.
+        max_result_bytes (int): Memory budget of the memoized ROC results.
+        workers (int): Threads computing ROC and preparing logs.
+        use_cache (bool): Read and write the prepared-log cache on disk, see prepare_data_cached.
+    """
+
+    def __init__(self, log_root: str = '.', max_log_bytes: int = 1 << 30, max_result_bytes: int = 256 << 20,
+                 workers: int = 4, use_cache: bool = True) -> None:
+        self.log_root = Path(log_root).resolve()
+        self.logs = LRUCache(max_log_bytes)
+        self.results = LRUCache(max_result_bytes)
+        self.use_cache = use_cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='roc-service')
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self._started = time.monotonic()
+
+    async def prepared_log(self, log_file: str, case_id_column: str, granularity: str = 'day') -> PreparedLog:
+        """
+        Returns a prepared log from memory, preparing it when missing or when the file changed.
+
+        Raises:
+            RequestError: If the log is outside log_root or does not exist.
+        """
+        path = (self.log_root / log_file).resolve()
+        if self.log_root not in path.parents:
+            raise RequestError(403, f"Log outside {self.log_root}: {log_file}")
+        if not path.is_file():
+            raise RequestError(404, f"Log not found: {log_file}")
+
+        key = (str(path), case_id_column, granularity)
+        fingerprint = log_fingerprint(str(path), case_id_column)
+        prepared = self.logs.get(key)
+        if prepared is not None and prepared.fingerprint == fingerprint:
+            return prepared
+
+        if granularity == 'day':
+            prepared = await self._once(key + (fingerprint,), load_log, str(path), case_id_column, fingerprint,
+                                        self.use_cache)
+        else:
+            # Rolled up from the log at day granularity, which is prepared (and kept) first.
+            day = await self.prepared_log(log_file, case_id_column)
+            prepared = await self._once(key + (fingerprint,), day.at_granularity, granularity)
+        self.logs.put(key, prepared, prepared.nbytes)
+        return prepared
+
+    async def roc(self, log_file: str, case_id_column: str, delta_y: str, delta_x: str,
+                  case_ids: Optional[List[str]] = None, window: int = 1, granularity: str = 'day') -> Tuple[str, bool]:
+        """
+        Returns the ROC rows as JSON and whether they came from the result cache.
+        """
+        prepared = await self.prepared_log(log_file, case_id_column, granularity)
+        if case_ids is not None:
+            # The same cases in any order or with repeats share one result, ordered by case ID.
+            case_ids = sorted(set(case_ids))
+        key = (str((self.log_root / log_file).resolve()), case_id_column, granularity, prepared.fingerprint,
+               tuple(case_ids) if case_ids is not None else None, delta_y, delta_x, window)
+
+        rows = self.results.get(key)
+        if rows is not None:
+            return rows, True
+
+        rows = await self._once(key, roc_json, prepared, case_id_column, delta_y, delta_x, case_ids, window)
+        self.results.put(key, rows, len(rows))
+        return rows, False
+
+    async def _once(self, key: Hashable, function: Callable, *args):
+        # Runs function in the thread pool, sharing the result with concurrent calls for the same key.
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A client going away must not cancel a computation other requests are waiting for.
+        return await asyncio.shield(future)
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, str]:
+        """
+        Answers a request.
+
+        Returns:
+            Tuple[int, str]: HTTP status and JSON body.
+        """
+        url = urlsplit(target)
+        params = {name: values if name == 'case_ids' else values[-1] for name, values in parse_qs(url.query).items()}
+        if body:
+            try:
+                params.update(json.loads(body))
+            except (ValueError, TypeError) as exc:
+                raise RequestError(400, f"Invalid JSON body: {exc}")
+
+        if url.path == '/health':
+            return 200, json.dumps(self.stats())
+        if url.path == '/cases':
+            _require_method(method, ('GET',))
+            prepared = await self.prepared_log(_param(params, 'log_file'), _param(params, 'case_id_column'),
+                                               _granularity(params.get('granularity', 'day')))
+            return 200, json.dumps({'cases': [str(case_id) for case_id in prepared.case_index]})
+        if url.path == '/roc':
+            _require_method(method, ('GET', 'POST'))
+            started = time.perf_counter()
+            rows, cached = await self.roc(_param(params, 'log_file'), _param(params, 'case_id_column'),
+                                          _param(params, 'delta_y'), _param(params, 'delta_x'),
+                                          _case_ids(params.get('case_ids')), _window(params.get('window', 1)),
+                                          _granularity(params.get('granularity', 'day')))
+            milliseconds = (time.perf_counter() - started) * 1000
+            return 200, f'{{"cached": {json.dumps(cached)}, "milliseconds": {milliseconds:.3f}, "rows": {rows}}}'
+        raise RequestError(404, f"Unknown path: {url.path}")
+
+    def stats(self) -> dict:
+        return {'status': 'ok', 'uptime_seconds': time.monotonic() - self._started,
+                'logs': self.logs.stats(), 'results': self.results.stats(), 'in_flight': len(self._in_flight)}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the HTTP/1.1 requests of a connection, keeping it open between requests unless asked to close.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await _respond(writer, 400, json.dumps({'error': 'Malformed request line'}), keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+
+                length = int(headers.get('content-length') or 0)
+                if length > MAX_BODY_BYTES:
+                    await _respond(writer, 413, json.dumps({'error': 'Request body too large'}), keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self.dispatch(method.upper(), target, body)
+                except RequestError as exc:
+                    status, payload = exc.status, json.dumps({'error': str(exc)})
+                except Exception as exc:
+                    status, payload = 500, json.dumps({'error': f"{type(exc).__name__}: {exc}"})
+
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765) -> None:
+        """
+        Serves requests until cancelled.
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ', '.join(f"http://{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets)
+        print(f"ROC service listening on {addresses} (logs under {self.log_root})", flush=True)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for future in list(self._in_flight.values()):
+                future.cancel()
+            self._executor.shutdown(wait=False)
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: str, keep_alive: bool) -> None:
+    body = payload.encode()
+    head = (f"HTTP/1.1 {status} {STATUS_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode('latin-1') + body)
+    await writer.drain()
+
+def _require_method(method: str, allowed: Tuple[str, ...]) -> None:
+    if method not in allowed:
+        raise RequestError(405, f"{method} not allowed, use {' or '.join(allowed)}")
+
+def _param(params: dict, name: str) -> str:
+    value = params.get(name)
+    if not value or not isinstance(value, str):
+        raise RequestError(400, f"Missing parameter: {name}")
+    return value
+
+def _case_ids(value) -> Optional[List[str]]:
+    # Query strings repeat case_ids or separate them with commas; JSON bodies give a list or a string.
+    if value is None:
+        return None
+    values = [value] if isinstance(value, str) else value
+    case_ids = [case_id for item in values for case_id in str(item).split(',') if case_id]
+    return case_ids or None
+
+def _window(value) -> int:
+    try:
+        window = int(value)
+    except (TypeError, ValueError):
+        raise RequestError(400, f"Invalid window: {value}")
+    if window < 1:
+        raise RequestError(400, f"Invalid window: {value}")
+    return window
+
+def _granularity(value: str) -> str:
+    if value not in GRANULARITIES:
+        raise RequestError(400, f"Unknown granularity: {value}, use one of {', '.join(GRANULARITIES)}")
+    return value
+
+def main():
+    parser = argparse.ArgumentParser(description="Local ROC query service")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1, local only)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on (default: 8765)')
+    parser.add_argument('--log_root', '--log-root', default='.',
+                        help='Only logs inside this folder can be queried (default: current folder)')
+    parser.add_argument('--max_log_mb', '--max-log-mb', type=float, default=1024,
+                        help='Memory budget of the prepared logs kept in memory (default: 1024)')
+    parser.add_argument('--max_result_mb', '--max-result-mb', type=float, default=256,
+                        help='Memory budget of the memoized ROC results (default: 256)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='Threads preparing logs and computing ROC (default: 4)')
+    parser.add_argument('--no_cache', '--no-cache', action='store_true',
+                        help='Prepare logs from scratch instead of using the prepared-log cache on disk')
+    args = parser.parse_args()
+
+    service = ROCService(args.log_root, int(args.max_log_mb * 2**20), int(args.max_result_mb * 2**20),
+                         args.workers, not args.no_cache)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
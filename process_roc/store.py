@@ -0,0 +1,357 @@
+import argparse
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from process_roc.output import output_name
+from process_roc.resampling import GRANULARITIES, floor_timestamps
+
+CONFIG_FILE = '_store.json'
+RUNS_FOLDER = '_runs'
+# Date partition of the rows of a ROC table without a date column.
+NO_DATE = 'none'
+
+def case_buckets(case_ids: Series, buckets: int) -> np.ndarray:
+    """
+    Returns the hash partition of every case ID, the same in every run and process.
+    """
+    hashes = pd.util.hash_array(case_ids.astype(str).to_numpy(dtype=object))
+    return (hashes % np.uint64(buckets)).astype(np.int64)
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("The ROC result store requires pyarrow.") from exc
+    return pa, ds, pq
+
+def _statistic(value):
+    """
+    Turns a column minimum or maximum into a JSON value: ISO strings for timestamps, None for missing values.
+    """
+    if value is None or pd.isna(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    return value
+
+def _bound(value, tz) -> pd.Timestamp:
+    """
+    Parses a date bound of a query, in the timezone tz of the stored dates when the bound has none.
+    """
+    bound = pd.Timestamp(value)
+    if tz is not None and bound.tzinfo is None:
+        bound = bound.tz_localize(tz)
+    return bound
+
+class ROCStore:
+    """
+    Keeps ROC tables on disk as Parquet files, so follow-up questions read the rows
+    they need instead of recomputing the ROC.
+
+    Every (delta_y, delta_x) pair has its own folder, partitioned by the hash bucket of
+    the case ID and by date (the hour, day, week or month of the date column, see
+    write). Every write is a run: it adds one file per partition it touches and a run
+    manifest recording the rows and the minimum and maximum of the ROC, delta_x and date
+    columns of every file; existing files are never rewritten. A run becomes visible to
+    readers once its manifest is written, after all its files.
+
+    read prunes files before opening them, through the case buckets and the statistics
+    of the manifests, then filters the rows of the remaining files with predicates pushed
+    down to the Parquet row groups.
+
+    Args:
+        root (str): Folder of the store.
+        buckets (int): Case hash buckets of new pairs; a pair keeps the count it was created with.
+        date_granularity (str): Size of the date partitions of new pairs: hour, day, week or month.
+
+    Raises:
+        ValueError: If buckets is below 1 or the granularity is unknown.
+    """
+
+    def __init__(self, root: str, buckets: int = 16, date_granularity: str = 'month') -> None:
+        if buckets < 1:
+            raise ValueError("A store needs at least one case bucket.")
+        if date_granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {date_granularity}")
+        self.root = Path(root)
+        self.buckets = buckets
+        self.date_granularity = date_granularity
+
+    def pair_path(self, delta_y: str, delta_x: str) -> Path:
+        return self.root / output_name(f"{delta_y} over {delta_x}")
+
+    def pairs(self) -> List[Tuple[str, str]]:
+        """
+        Returns the (delta_y, delta_x) pairs in the store.
+        """
+        if not self.root.is_dir():
+            return []
+        return [(config['delta_y'], config['delta_x'])
+                for config in (json.loads(path.read_text()) for path in sorted(self.root.glob(f"*/{CONFIG_FILE}")))]
+
+    def config(self, delta_y: str, delta_x: str) -> dict:
+        """
+        Returns the settings of a pair: its case ID and date columns, buckets and date granularity.
+
+        Raises:
+            KeyError: If the pair is not in the store.
+        """
+        path = self.pair_path(delta_y, delta_x) / CONFIG_FILE
+        if not path.is_file():
+            raise KeyError(f"No ROC of {delta_y} over {delta_x} in {self.root}")
+        config = json.loads(path.read_text())
+        if (config['delta_y'], config['delta_x']) != (delta_y, delta_x):
+            raise KeyError(f"No ROC of {delta_y} over {delta_x} in {self.root}")
+        return config
+
+    def manifests(self, delta_y: str, delta_x: str) -> List[dict]:
+        """
+        Returns the manifests of the runs of a pair, oldest first.
+        """
+        folder = self.pair_path(delta_y, delta_x) / RUNS_FOLDER
+        manifests = [json.loads(path.read_text()) for path in folder.glob('*.json')] if folder.is_dir() else []
+        return sorted(manifests, key=lambda manifest: (manifest['created'], manifest['run']))
+
+    def runs(self, delta_y: str, delta_x: str) -> DataFrame:
+        """
+        Lists the runs of a pair with their creation time, rows, files and metadata.
+        """
+        return DataFrame([{'run': manifest['run'], 'created': manifest['created'], 'rows': manifest['rows'],
+                           'files': len(manifest['files']), **manifest['metadata']}
+                          for manifest in self.manifests(delta_y, delta_x)])
+
+    def write(self, roc: DataFrame, case_id_column: str, delta_y: str, delta_x: str, date_column: Optional[str] = None,
+              run: Optional[str] = None, metadata: Optional[Dict[str, str]] = None) -> str:
+        """
+        Appends a ROC table to the store as a new run.
+
+        Args:
+            roc (DataFrame): ROC table, with the case ID column, delta_y, delta_x and ROC.
+            case_id_column (str): The name of the column that identifies each case.
+            delta_y (str): The dependent variable of the table.
+            delta_x (str): The independent variable of the table.
+            date_column (Optional[str]): Datetime column deciding the date partition of every row.
+                By default rounded_time when the table has it, else delta_x when it holds datetimes;
+                without either, all rows go to the date partition none.
+            run (Optional[str]): Name of the run, by default its UTC creation time and a random suffix.
+            metadata (Optional[Dict[str, str]]): Recorded in the run manifest, e.g. the log file.
+
+        Returns:
+            str: The name of the run.
+
+        Raises:
+            ValueError: If a column is missing, the run exists already, or the pair was stored
+                with other case ID or date columns.
+        """
+        pa, _, pq = _pyarrow()
+        if date_column is None:
+            date_column = next((column for column in dict.fromkeys(['rounded_time', delta_x])
+                                if column in roc.columns and pd.api.types.is_datetime64_any_dtype(roc[column])), None)
+        missing = [column for column in dict.fromkeys([case_id_column, delta_y, delta_x, 'ROC', date_column])
+                   if column is not None and column not in roc.columns]
+        if missing:
+            raise ValueError(f"Columns missing from the ROC table: {', '.join(missing)}")
+
+        path = self.pair_path(delta_y, delta_x)
+        config = {'delta_y': delta_y, 'delta_x': delta_x, 'case_id_column': case_id_column,
+                  'date_column': date_column, 'buckets': self.buckets, 'date_granularity': self.date_granularity}
+        if (path / CONFIG_FILE).is_file():
+            stored = json.loads((path / CONFIG_FILE).read_text())
+            changed = [key for key in ('delta_y', 'delta_x', 'case_id_column', 'date_column') if stored[key] != config[key]]
+            if changed:
+                raise ValueError(f"{path} was stored with other settings: "
+                                 + ', '.join(f"{key} {stored[key]}" for key in changed))
+            config = stored
+        else:
+            path.mkdir(parents=True, exist_ok=True)
+            (path / CONFIG_FILE).write_text(json.dumps(config, indent=2))
+
+        run = run or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        manifest_path = path / RUNS_FOLDER / f"{run}.json"
+        if manifest_path.exists():
+            raise ValueError(f"Run {run} exists already in {path}")
+
+        table = roc.reset_index(drop=True).assign(run=run)
+        buckets = case_buckets(table[case_id_column], config['buckets'])
+        if date_column is None:
+            dates = np.full(len(table), NO_DATE, dtype=object)
+        else:
+            # Formatting the few partition dates, not every row, keeps large writes fast; missing
+            # dates get code -1, the last name.
+            codes, floors = pd.factorize(floor_timestamps(table[date_column], config['date_granularity']))
+            names = np.append(floors.strftime('%Y-%m-%d').to_numpy(dtype=object), NO_DATE)
+            dates = names[codes]
+
+        files = []
+        stat_columns = list(dict.fromkeys(column for column in ('ROC', delta_x, date_column) if column is not None))
+        for (bucket, date), rows in table.groupby([buckets, dates], sort=True).indices.items():
+            # Sorted partitions keep the row group statistics of case IDs and delta_x narrow.
+            part = table.iloc[rows].sort_values([case_id_column, delta_x], kind='mergesort')
+            relative = Path(f"case_bucket={bucket:03d}") / f"date={date}" / f"part-{run}.parquet"
+            target = path / relative
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temporary = target.with_suffix('.tmp')
+            pq.write_table(pa.Table.from_pandas(part, preserve_index=False), temporary)
+            os.replace(temporary, target)
+            files.append({'path': relative.as_posix(), 'case_bucket': int(bucket), 'date': date, 'rows': len(part),
+                          'min': {column: _statistic(part[column].min()) for column in stat_columns},
+                          'max': {column: _statistic(part[column].max()) for column in stat_columns}})
+
+        manifest = {'run': run, 'created': datetime.now(timezone.utc).isoformat(), 'rows': len(table),
+                    'metadata': metadata or {}, 'files': files}
+        manifest_path.parent.mkdir(exist_ok=True)
+        temporary = manifest_path.with_suffix('.tmp')
+        temporary.write_text(json.dumps(manifest, indent=2))
+        os.replace(temporary, manifest_path)
+        return run
+
+    def plan(self, delta_y: str, delta_x: str, case_ids: Optional[List[str]] = None, start=None, end=None,
+             min_roc: Optional[float] = None, max_roc: Optional[float] = None,
+             runs: Optional[List[str]] = None) -> Tuple[List[Path], int]:
+        """
+        Selects the files of a pair that may hold rows of a query, see read.
+
+        Returns:
+            Tuple[List[Path], int]: The files to scan, and the number of files of the pair.
+        """
+        config = self.config(delta_y, delta_x)
+        path = self.pair_path(delta_y, delta_x)
+        date_column = config['date_column']
+        wanted_buckets = None if case_ids is None else set(case_buckets(Series(list(case_ids)), config['buckets']).tolist())
+
+        selected, total = [], 0
+        for manifest in self.manifests(delta_y, delta_x):
+            for entry in manifest['files']:
+                total += 1
+                if runs is not None and manifest['run'] not in runs:
+                    continue
+                if wanted_buckets is not None and entry['case_bucket'] not in wanted_buckets:
+                    continue
+                if start is not None or end is not None:
+                    low = entry['min'].get(date_column) if date_column else None
+                    high = entry['max'].get(date_column) if date_column else None
+                    if low is None or high is None:
+                        continue
+                    low, high = pd.Timestamp(low), pd.Timestamp(high)
+                    if start is not None and high < _bound(start, high.tzinfo):
+                        continue
+                    if end is not None and low > _bound(end, low.tzinfo):
+                        continue
+                low, high = entry['min'].get('ROC'), entry['max'].get('ROC')
+                if min_roc is not None and (high is None or high < min_roc):
+                    continue
+                if max_roc is not None and (low is None or low > max_roc):
+                    continue
+                selected.append(path / entry['path'])
+        return selected, total
+
+    def read(self, delta_y: str, delta_x: str, case_ids: Optional[List[str]] = None, start=None, end=None,
+             min_roc: Optional[float] = None, max_roc: Optional[float] = None, runs: Optional[List[str]] = None,
+             columns: Optional[List[str]] = None) -> DataFrame:
+        """
+        Reads the stored ROC rows of a pair matching every given condition.
+
+        Args:
+            delta_y (str): The dependent variable.
+            delta_x (str): The independent variable.
+            case_ids (Optional[List[str]]): Only rows of these cases.
+            start: Only rows whose date column is at or after this date (a string or timestamp;
+                without a timezone, the timezone of the stored dates is assumed).
+            end: Only rows whose date column is at or before this date.
+            min_roc (Optional[float]): Only rows with a ROC of at least this value.
+            max_roc (Optional[float]): Only rows with a ROC of at most this value.
+            runs (Optional[List[str]]): Only rows of these runs; all runs by default.
+            columns (Optional[List[str]]): Columns returned, all by default.
+
+        Returns:
+            DataFrame: The matching rows, with a run column naming the run that wrote them.
+
+        Raises:
+            KeyError: If the pair is not in the store.
+            ValueError: If a date range is given for a pair stored without a date column.
+        """
+        pa, ds, pq = _pyarrow()
+        config = self.config(delta_y, delta_x)
+        date_column = config['date_column']
+        if date_column is None and (start is not None or end is not None):
+            raise ValueError(f"The ROC of {delta_y} over {delta_x} was stored without a date column")
+
+        files, _ = self.plan(delta_y, delta_x, case_ids, start, end, min_roc, max_roc, runs)
+        if not files:
+            return DataFrame(columns=columns or [])
+        # Runs may hold different columns, e.g. ROC_smoothed, and a dataset would otherwise
+        # take the schema of its first file.
+        schema = pa.unify_schemas([pq.read_schema(file) for file in files])
+        dataset = ds.dataset([str(file) for file in files], schema=schema, format='parquet')
+
+        conditions = []
+        if case_ids is not None:
+            case_type = schema.field(config['case_id_column']).type
+            if pa.types.is_dictionary(case_type):
+                case_type = case_type.value_type
+            conditions.append(ds.field(config['case_id_column']).isin(pa.array(list(case_ids)).cast(case_type)))
+        for bound, compare in ((start, lambda field, value: field >= value), (end, lambda field, value: field <= value)):
+            if bound is not None:
+                date_type = schema.field(date_column).type
+                value = _bound(bound, date_type.tz)
+                conditions.append(compare(ds.field(date_column), pa.scalar(value, type=date_type)))
+        if min_roc is not None:
+            conditions.append(ds.field('ROC') >= min_roc)
+        if max_roc is not None:
+            conditions.append(ds.field('ROC') <= max_roc)
+
+        condition = None
+        for term in conditions:
+            condition = term if condition is None else condition & term
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the ROC result store")
+    parser.add_argument('--store', required=True, help='Folder of the ROC result store')
+    parser.add_argument('--delta_y', help='The dependent variable of the queried ROC; lists the stored pairs when missing')
+    parser.add_argument('--delta_x', help='The independent variable of the queried ROC')
+    parser.add_argument('--case_ids', nargs='*', default=None, help='Only rows of these cases')
+    parser.add_argument('--start', default=None, help='Only rows at or after this date, e.g. 2023-04-01')
+    parser.add_argument('--end', default=None, help='Only rows at or before this date')
+    parser.add_argument('--min_roc', '--min-roc', type=float, default=None, help='Only rows with a ROC of at least this value')
+    parser.add_argument('--max_roc', '--max-roc', type=float, default=None, help='Only rows with a ROC of at most this value')
+    parser.add_argument('--runs', nargs='*', default=None, help='Only rows of these runs (default: all runs)')
+    parser.add_argument('--list_runs', '--list-runs', action='store_true', help='List the runs of the pair instead')
+    parser.add_argument('--output', default=None, help='CSV file receiving the rows (default: print them)')
+    args = parser.parse_args()
+
+    store = ROCStore(args.store)
+    if not args.delta_y or not args.delta_x:
+        for delta_y, delta_x in store.pairs():
+            print(f"{delta_y} over {delta_x}")
+        return
+
+    try:
+        if args.list_runs:
+            store.config(args.delta_y, args.delta_x)
+            print(store.runs(args.delta_y, args.delta_x).to_string(index=False))
+            return
+        files, total = store.plan(args.delta_y, args.delta_x, args.case_ids, args.start, args.end,
+                                  args.min_roc, args.max_roc, args.runs)
+        rows = store.read(args.delta_y, args.delta_x, args.case_ids, args.start, args.end,
+                          args.min_roc, args.max_roc, args.runs)
+    except (KeyError, ValueError) as exc:
+        parser.error(exc.args[0] if exc.args else str(exc))
+    print(f"Scanned {len(files)} of {total} files: {len(rows)} rows")
+    if args.output:
+        rows.to_csv(args.output, index=False)
+    else:
+        print(rows.to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+import io
+import select
+import sys
+import time
+import pandas as pd
+from pandas import DataFrame
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+from process_roc.incremental import IncrementalROC
+from process_roc.utils import DiscardedEventsCollector
+
+def _wait_for_input(stream: IO[str], timeout: float) -> bool:
+    """
+    Waits up to timeout seconds for stream to become readable. Streams that cannot be
+    polled, and regular files, which never block, are reported as readable.
+    """
+    try:
+        readable, _, _ = select.select([stream], [], [], max(timeout, 0))
+    except (ValueError, OSError, io.UnsupportedOperation):
+        return True
+    return bool(readable)
+
+def _parse_lines(header: str, lines: List[str], discarded_events: Optional[DiscardedEventsCollector]) -> DataFrame:
+    """
+    Parses buffered CSV lines. Lines with more fields than the header are skipped and
+    buffered for the discarded events log, re-parsing with the python engine only then.
+    """
+    text = header + ''.join(lines)
+    try:
+        events = pd.read_csv(io.StringIO(text))
+        # A longer first line makes its extra fields an index instead of raising.
+        if isinstance(events.index, pd.RangeIndex):
+            return events
+    except pd.errors.ParserError:
+        pass
+
+    bad_lines: List[List[str]] = []
+    columns = pd.read_csv(io.StringIO(header), nrows=0).columns
+    events = pd.read_csv(io.StringIO(text), header=0, names=columns, engine='python', on_bad_lines=bad_lines.append)
+    if discarded_events is not None:
+        discarded_events.add(None, DataFrame({'line': [','.join(fields) for fields in bad_lines]}),
+                             "Malformed CSV line")
+    return events
+
+def iter_event_batches(source: str, batch_size: int = 1000, max_wait: float = 1.0, follow: bool = True,
+                       poll_interval: float = 0.1,
+                       discarded_events: Optional[DiscardedEventsCollector] = None) -> Iterator[DataFrame]:
+    """
+    Reads newline-delimited CSV events from a file being appended to, or from stdin,
+    in micro-batches.
+
+    A batch is emitted when batch_size events are buffered or when the oldest
+    buffered event has waited max_wait seconds. A line is only parsed once its
+    newline has been written, and a malformed line is discarded without ending the stream.
+
+    Args:
+        source (str): Path to a CSV file with a header line, or "-" for stdin.
+        batch_size (int): Maximum number of events per batch.
+        max_wait (float): Maximum seconds an event waits before its batch is emitted.
+        follow (bool): Keep waiting for new lines at the end of a file, like tail -f.
+            Reading stops at the end of stdin regardless.
+        poll_interval (float): Seconds between checks for new lines at the end of a file.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers malformed lines for a bulk write.
+
+    Yields:
+        DataFrame: The events of one micro-batch, parsed with the header of the source.
+    """
+    is_stdin = source == '-'
+    stream = sys.stdin if is_stdin else open(source, newline='')
+    try:
+        header = ''
+        pending = ''
+        lines: List[str] = []
+        first_buffered = 0.0
+
+        while True:
+            remaining = max_wait - (time.monotonic() - first_buffered) if lines else max_wait
+            if is_stdin and lines and not _wait_for_input(stream, remaining):
+                line = None
+            else:
+                line = stream.readline()
+
+            if line:
+                pending += line
+                if pending.endswith('\n'):
+                    if not header:
+                        header = pending
+                    else:
+                        if not lines:
+                            first_buffered = time.monotonic()
+                        lines.append(pending)
+                    pending = ''
+
+            end_of_input = line == '' and (is_stdin or not follow)
+            if end_of_input and pending and header:
+                lines.append(pending + '\n')
+
+            if lines and (len(lines) >= batch_size or end_of_input
+                          or time.monotonic() - first_buffered >= max_wait):
+                yield _parse_lines(header, lines, discarded_events)
+                lines = []
+
+            if end_of_input:
+                return
+            if line == '':
+                time.sleep(min(poll_interval, max(remaining, 0)) if lines else poll_interval)
+    finally:
+        if not is_stdin:
+            stream.close()
+
+def stream_roc(batches: Iterable[DataFrame], calculator: IncrementalROC, idle_timeout: Optional[float] = None,
+               discarded_events: Optional[DiscardedEventsCollector] = None) -> Iterator[Tuple[DataFrame, DataFrame]]:
+    """
+    Updates the ROC with every micro-batch of events as it arrives.
+
+    Args:
+        batches (Iterable[DataFrame]): Micro-batches of raw events, e.g. from iter_event_batches.
+        calculator (IncrementalROC): Holds the per-case state between batches.
+        idle_timeout (Optional[float]): Minutes of event time after which an idle case is
+            evicted, bounding the state kept. Cases are never evicted when omitted.
+        discarded_events (Optional[DiscardedEventsCollector]): Buffers discarded events for a bulk write.
+
+    Yields:
+        Tuple[DataFrame, DataFrame]: Each batch of events and its ROC rows.
+    """
+    for events in batches:
+        roc_rows = calculator.update(events, discarded_events)
+        if idle_timeout is not None:
+            calculator.evict_idle(idle_timeout)
+        yield events, roc_rows
+
+class RocSink:
+    """
+    Writes ROC rows as CSV to a file or to stdout as they are produced.
+
+    Args:
+        output (str): Path of the output CSV file, appended to if it exists, or "-" for stdout.
+    """
+
+    def __init__(self, output: str = '-') -> None:
+        self.output = output
+        self._stream: Optional[IO[str]] = None
+        self._write_header = True
+
+    def write(self, roc_rows: DataFrame) -> None:
+        if roc_rows.empty:
+            return
+
+        if self._stream is None:
+            if self.output == '-':
+                self._stream = sys.stdout
+            else:
+                self._stream = open(self.output, 'a', newline='')
+                self._write_header = self._stream.tell() == 0
+
+        roc_rows.to_csv(self._stream, header=self._write_header, index=False)
+        self._write_header = False
+        self._stream.flush()
+
+    def close(self) -> None:
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._stream.close()
+        self._stream = None
+
+    def __enter__(self) -> "RocSink":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+def run_stream(source: str, case_id_column: str, delta_y: str, delta_x: str, output: str = '-',
+               batch_size: int = 1000, max_wait: float = 1.0, idle_timeout: Optional[float] = None,
+               follow: bool = True, discarded_format: str = "csv", granularity: str = 'day') -> None:
+    """
+    Tails a CSV event feed and writes the ROC rows of the new events to output until the
+    feed ends or the process is interrupted.
+
+    Args:
+        source (str): Path to a CSV file being appended to, or "-" for stdin.
+        case_id_column (str): The name of the column that identifies each case.
+        delta_y (str): The dependent variable (Y axis).
+        delta_x (str): The independent variable (X axis).
+        output (str): Output CSV file, or "-" for stdout.
+        batch_size (int): Maximum number of events per micro-batch.
+        max_wait (float): Maximum seconds an event waits before its batch is processed.
+        idle_timeout (Optional[float]): Minutes of event time after which an idle case is evicted.
+        follow (bool): Keep waiting for new lines at the end of the file.
+        discarded_format (str): Format of the discarded events log, see DiscardedEventsCollector.
+        granularity (str): Size of the rounded_time buckets, see prepare_data.
+    """
+    calculator = IncrementalROC(delta_y, delta_x, case_id_column, granularity)
+
+    with RocSink(output) as sink, DiscardedEventsCollector(discarded_format) as discarded_events:
+        batches = iter_event_batches(source, batch_size, max_wait, follow, discarded_events=discarded_events)
+        try:
+            for _, roc_rows in stream_roc(batches, calculator, idle_timeout, discarded_events):
+                sink.write(roc_rows)
+        except KeyboardInterrupt:
+            pass
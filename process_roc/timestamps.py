@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pandas import Series
+from typing import Optional
+from process_roc.profiling import profiled
+
+# Candidate formats, tried in order on a sample of the column.
+TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%d %H:%M:%S.%f%z',
+    '%Y-%m-%dT%H:%M:%S.%f%z',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y-%m-%d',
+)
+
+# Formats with a fixed width that the fast path decodes directly: (date/time separator, UTC suffix).
+FIXED_WIDTH_FORMATS = {
+    '%Y-%m-%d %H:%M:%S%z': (' ', '+00:00'),
+    '%Y-%m-%dT%H:%M:%S%z': ('T', '+00:00'),
+    '%Y-%m-%d %H:%M:%S': (' ', ''),
+    '%Y-%m-%dT%H:%M:%S': ('T', ''),
+}
+
+DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+
+def detect_timestamp_format(values: Series, sample_size: int = 100) -> Optional[str]:
+    """
+    Detects the format of a column of timestamp strings from a sample of its values.
+
+    Args:
+        values (Series): Timestamp strings.
+        sample_size (int): Number of non-null values checked.
+
+    Returns:
+        Optional[str]: The first format of TIMESTAMP_FORMATS matching the whole sample, or None.
+    """
+    sample = values.head(sample_size * 10).dropna().head(sample_size)
+    if sample.empty:
+        sample = values.dropna().head(sample_size)
+    if sample.empty or not all(isinstance(value, str) for value in sample):
+        return None
+
+    for timestamp_format in TIMESTAMP_FORMATS:
+        try:
+            for value in sample:
+                datetime.strptime(value, timestamp_format)
+        except ValueError:
+            continue
+        return timestamp_format
+    return None
+
+def _days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """
+    Days since 1970-01-01 of proleptic Gregorian dates (H. Hinnant's algorithm).
+    """
+    year = year - (month <= 2)
+    era = np.floor_divide(year, 400)
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+def _parse_fixed_width(values: Series, separator: str, suffix: str) -> Optional[Series]:
+    """
+    Decodes 'YYYY-MM-DD?HH:MM:SS<suffix>' strings with integer arithmetic on their bytes.
+
+    Returns:
+        Optional[Series]: The parsed timestamps, or None if any value does not fit the layout.
+    """
+    missing = values.isna().to_numpy()
+    text = values[~missing]
+    width = 19 + len(suffix)
+
+    # One spare byte per value: longer strings leave it non-zero, shorter ones leave
+    # zero padding inside the layout, so both fail the checks below.
+    try:
+        raw = np.frombuffer(text.to_numpy(dtype=f'S{width + 1}').tobytes(), dtype=np.uint8).reshape(-1, width + 1)
+    except UnicodeEncodeError:
+        return None
+    if raw[:, width].any():
+        return None
+    raw = raw[:, :width]
+
+    layout = np.frombuffer(f"0000-00-00{separator}00:00:00{suffix}".encode(), dtype=np.uint8)
+    fixed = np.ones(width, dtype=bool)
+    fixed[DIGIT_POSITIONS] = False
+    if not (raw[:, fixed] == layout[fixed]).all():
+        return None
+
+    digits = raw[:, DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+
+    def field(first: int, length: int) -> np.ndarray:
+        number = np.zeros(len(digits), dtype=np.int64)
+        for position in range(first, first + length):
+            number = number * 10 + digits[:, position]
+        return number
+
+    year, month, day = field(0, 4), field(4, 2), field(6, 2)
+    hour, minute, second = field(8, 2), field(10, 2), field(12, 2)
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])[np.clip(month - 1, 0, 11)] \
+        + ((month == 2) & leap)
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days) \
+        & (hour < 24) & (minute < 60) & (second < 60)
+    if not valid.all():
+        return None
+
+    seconds = _days_from_civil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+
+    epoch_ns = np.full(len(values), np.iinfo(np.int64).min, dtype=np.int64)
+    epoch_ns[~missing] = seconds * 1_000_000_000
+
+    timestamps = Series(epoch_ns.view('datetime64[ns]'), index=values.index, name=values.name)
+    return timestamps.dt.tz_localize('UTC') if suffix else timestamps
+
+@profiled
+def parse_timestamps(values: Series, errors: str = 'raise', as_epoch_ns: bool = False) -> Series:
+    """
+    Parses a column of timestamps with a format detected once from a sample.
+
+    Second-resolution ISO timestamps, naive or in UTC ('+00:00'), are decoded
+    directly from their bytes. Other layouts go through pd.to_datetime with the
+    detected format, or with inference when no format matches. A column where some
+    values do not fit the detected format, e.g. a log mixing layouts, is parsed
+    again with inference, so only values no layout can read become NaT (or raise).
+
+    Args:
+        values (Series): Timestamp strings, or already parsed timestamps.
+        errors (str): 'raise' or 'coerce', as in pd.to_datetime.
+        as_epoch_ns (bool): Return int64 nanoseconds since the epoch (UTC) instead of datetimes.
+            Missing timestamps make the result a nullable Int64 column.
+
+    Returns:
+        Series: The parsed timestamps, aligned with values.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        timestamps = values
+    else:
+        timestamp_format = detect_timestamp_format(values)
+
+        timestamps = None
+        if timestamp_format in FIXED_WIDTH_FORMATS:
+            timestamps = _parse_fixed_width(values, *FIXED_WIDTH_FORMATS[timestamp_format])
+        if timestamps is None and timestamp_format is not None:
+            try:
+                timestamps = pd.to_datetime(values, format=timestamp_format)
+            except (TypeError, ValueError):
+                timestamps = None
+        if timestamps is None or not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(values, errors=errors)
+
+    if not as_epoch_ns:
+        return timestamps
+    return to_epoch_ns(timestamps)
+
+def to_epoch_ns(timestamps: Series) -> Series:
+    """
+    Converts datetimes to int64 nanoseconds since the epoch (UTC).
+    Missing timestamps make the result a nullable Int64 column.
+    """
+    missing = timestamps.isna()
+    epoch_ns = Series(timestamps.to_numpy(dtype='datetime64[ns]').view('int64'), index=timestamps.index, name=timestamps.name)
+    if missing.any():
+        return epoch_ns.astype('Int64').mask(missing)
+    return epoch_ns
+
+def diff_minutes(timestamps: Series, previous: Optional[Series] = None) -> Series:
+    """
+    Returns the minutes elapsed since the previous timestamp, computed on the
+    int64 nanosecond values. Equivalent to timestamps.diff().dt.total_seconds() / 60,
+    or to (timestamps - previous).dt.total_seconds() / 60 when previous, aligned
+    with timestamps, is given.
+    """
+    epoch_ns = timestamps.to_numpy(dtype='datetime64[ns]').view('int64')
+    missing = timestamps.isna().to_numpy()
+    if previous is not None:
+        minutes = (epoch_ns - previous.to_numpy(dtype='datetime64[ns]').view('int64')) / 1e9 / 60
+        minutes[missing | previous.isna().to_numpy()] = np.nan
+        return Series(minutes, index=timestamps.index)
+
+    minutes = np.full(len(epoch_ns), np.nan)
+    minutes[1:] = np.diff(epoch_ns) / 1e9 / 60
+
+    minutes[missing] = np.nan
+    minutes[1:][missing[:-1]] = np.nan
+    return Series(minutes, index=timestamps.index)
@@ -1,6 +1,9 @@
+import os
 import pandas as pd
-from pandas import DataFrame
+from pandas import DataFrame, Series
 from pathlib import Path
+from typing import List, Optional, Union
+from process_roc.profiling import profiled
 
 BASE_DIR = Path(__file__).resolve().parent
 
@@ -15,6 +18,7 @@ def validate_columns(df: DataFrame, required_columns: list) -> None:
     if missing:
         raise ValueError(f"Missing columns: {missing}")
 
+@profiled
 def log_discarded_events(case_id: str, discarded_rows: DataFrame, reason: str = "Duplicated delta_x and delta_y", output_filename: str = "discarded_events.csv") -> None:
     """
     Logs discarded events to a CSV file for traceability.
@@ -32,9 +36,143 @@ def log_discarded_events(case_id: str, discarded_rows: DataFrame, reason: str =
     discarded_rows['discard_reason'] = reason
     discarded_rows['discard_case_id'] = case_id
 
-    output_path = BASE_DIR / output_filename
+    _append_csv(discarded_rows, BASE_DIR / output_filename)
 
+def _append_csv(rows: DataFrame, output_path: Path) -> None:
+    """
+    Appends rows to a CSV file under its existing header.
+
+    Runs keep different event columns, so rows are aligned to the header by name; if they
+    bring columns the header lacks, the file is rewritten once under the union of both.
+    """
     if not output_path.exists():
-        discarded_rows.to_csv(output_path, index=False)
-    else:
-        discarded_rows.to_csv(output_path, mode='a', header=False, index=False)
+        rows.to_csv(output_path, index=False)
+        return
+
+    header = list(pd.read_csv(output_path, nrows=0).columns)
+    new_columns = [column for column in rows.columns if column not in header]
+    if not new_columns:
+        rows.reindex(columns=header).to_csv(output_path, mode='a', header=False, index=False)
+        return
+
+    # Read back as text so the existing values are rewritten unchanged.
+    existing = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+    temporary_path = output_path.with_name(f".{output_path.name}.tmp")
+    pd.concat([existing, rows], ignore_index=True).reindex(columns=header + new_columns).to_csv(temporary_path, index=False)
+    os.replace(temporary_path, output_path)
+
+
+class DiscardedEventsCollector:
+    """
+    Gathers discarded events in memory and writes them to disk in bulk.
+
+    Rows are buffered until max_rows is reached or the collector is closed,
+    so a run touches the output file once per flush instead of once per trace.
+    CSV output is appended to an existing file; Parquet output is rewritten
+    by every collector. Rows are aligned to the columns already written by name,
+    and a flush bringing new columns rewrites the file under the union of both.
+
+    Args:
+        file_format (str): "csv" (default), "parquet" or "none" to disable discard logging.
+        output_filename (Optional[str]): File name inside the package folder.
+            Defaults to discarded_events.<file_format>.
+        max_rows (int): Number of buffered rows that triggers a flush.
+    """
+
+    FORMATS = ("csv", "parquet", "none")
+
+    def __init__(self, file_format: str = "csv", output_filename: Optional[str] = None, max_rows: int = 100_000) -> None:
+        if file_format not in self.FORMATS:
+            raise ValueError(f"Unknown discarded events format: {file_format}")
+
+        self.file_format = file_format
+        self.output_path = BASE_DIR / (output_filename or f"discarded_events.{file_format}")
+        self.max_rows = max_rows
+        self._buffer: List[DataFrame] = []
+        self._buffered_rows = 0
+        self._parquet_writer = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.file_format != "none"
+
+    @profiled
+    def add(self, case_id: Union[str, Series], discarded_rows: DataFrame, reason: str = "Duplicated delta_x and delta_y") -> None:
+        """
+        Buffers discarded events, flushing when the size cap is reached.
+
+        Args:
+            case_id (Union[str, Series]): The case ID of the rows, or a per-row Series of case IDs.
+            discarded_rows (DataFrame): DataFrame containing the discarded events.
+            reason (str): Reason why these events were discarded.
+        """
+        if not self.enabled or discarded_rows.empty:
+            return
+
+        discarded_rows = discarded_rows.copy()
+        discarded_rows['discard_reason'] = reason
+        discarded_rows['discard_case_id'] = case_id
+
+        self._buffer.append(discarded_rows)
+        self._buffered_rows += len(discarded_rows)
+
+        if self._buffered_rows >= self.max_rows:
+            self.flush()
+
+    @profiled
+    def flush(self) -> None:
+        """
+        Writes all buffered rows to the output file in a single write.
+        """
+        if not self._buffer:
+            return
+
+        discarded_rows = pd.concat(self._buffer, ignore_index=True)
+        self._buffer = []
+        self._buffered_rows = 0
+
+        if self.file_format == "csv":
+            _append_csv(discarded_rows, self.output_path)
+        else:
+            self._write_parquet(discarded_rows)
+
+    def close(self) -> None:
+        """
+        Flushes the remaining rows and releases the output file.
+        """
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def _write_parquet(self, discarded_rows: DataFrame) -> None:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Writing discarded events as Parquet requires pyarrow.") from exc
+
+        if self._parquet_writer is not None:
+            names = self._parquet_writer.schema.names
+            if all(column in names for column in discarded_rows.columns):
+                missing = {column: Series(None, index=discarded_rows.index, dtype=object)
+                           for column in names if column not in discarded_rows.columns}
+                table = pa.Table.from_pandas(discarded_rows.assign(**missing)[names],
+                                             schema=self._parquet_writer.schema, preserve_index=False)
+                self._parquet_writer.write_table(table)
+                return
+
+            # New columns: the writer's schema is fixed, so rewrite the file under the union of both.
+            self._parquet_writer.close()
+            self._parquet_writer = None
+            discarded_rows = pd.concat([pq.read_table(self.output_path).to_pandas(), discarded_rows], ignore_index=True)
+
+        table = pa.Table.from_pandas(discarded_rows, preserve_index=False)
+        self._parquet_writer = pq.ParquetWriter(self.output_path, table.schema)
+        self._parquet_writer.write_table(table)
+
+    def __enter__(self) -> "DiscardedEventsCollector":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
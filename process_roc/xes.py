@@ -0,0 +1,122 @@
+import gzip
+import xml.etree.ElementTree as ET
+import pandas as pd
+from pandas import DataFrame
+from typing import Dict, Iterator, List, Optional
+from process_roc.profiling import profiled
+from process_roc.timestamps import parse_timestamps
+
+XES_NAMESPACE = "{http://www.xes-standard.org/}"
+
+ATTRIBUTE_TYPES = ("string", "date", "int", "float", "boolean", "id")
+
+def _local_name(tag: str) -> str:
+    return tag[len(XES_NAMESPACE):] if tag.startswith(XES_NAMESPACE) else tag
+
+def _open_log(log_file: str):
+    if str(log_file).endswith('.gz'):
+        return gzip.open(log_file, 'rb')
+    return open(log_file, 'rb')
+
+def _to_frame(columns: Dict[str, List[Optional[str]]], column_types: Dict[str, str]) -> DataFrame:
+    """
+    Builds a DataFrame from raw XES attribute values, converting them by their XES type.
+    """
+    df = DataFrame(columns)
+    for column, attribute_type in column_types.items():
+        if attribute_type == "date":
+            df[column] = parse_timestamps(df[column])
+        elif attribute_type == "int":
+            df[column] = pd.to_numeric(df[column])
+        elif attribute_type == "float":
+            df[column] = df[column].astype('float64')
+        elif attribute_type == "boolean":
+            df[column] = df[column].map({'true': True, 'false': False})
+    return df
+
+def iter_xes_chunks(log_file: str, chunk_size: int = 100_000) -> Iterator[DataFrame]:
+    """
+    Streams an XES log as DataFrames of at most chunk_size events.
+
+    The file is read incrementally with iterparse. Event attributes become columns
+    named after their key and trace attributes are flattened into every event of the
+    trace with a 'case:' prefix, matching the CSV exports in logs/. Processed
+    traces are cleared so memory stays bounded by the chunk size.
+
+    Args:
+        log_file (str): Path to the XES file, optionally gzip-compressed (.xes.gz).
+        chunk_size (int): Maximum number of events per yielded DataFrame.
+
+    Yields:
+        DataFrame: One row per event.
+    """
+    columns: Dict[str, List[Optional[str]]] = {}
+    column_types: Dict[str, str] = {}
+    rows = 0
+
+    trace_attributes: Dict[str, str] = {}
+    event_attributes: Optional[Dict[str, str]] = None
+    depth = 0
+
+    with _open_log(log_file) as source:
+        context = ET.iterparse(source, events=("start", "end"))
+        _, root = next(context)
+
+        for event, elem in context:
+            tag = _local_name(elem.tag)
+
+            if event == "start":
+                depth += 1
+                if tag == "trace":
+                    trace_attributes = {}
+                elif tag == "event":
+                    event_attributes = {}
+                elif tag in ATTRIBUTE_TYPES:
+                    # Only direct children of <trace>/<event> are kept; log-level and nested attributes are skipped.
+                    key = elem.get('key')
+                    if depth == 3 and event_attributes is not None:
+                        event_attributes[key] = elem.get('value')
+                        column_types.setdefault(key, tag)
+                    elif depth == 2 and event_attributes is None:
+                        trace_attributes[f"case:{key}"] = elem.get('value')
+                        column_types.setdefault(f"case:{key}", tag)
+                continue
+
+            depth -= 1
+
+            if tag == "event":
+                event_attributes.update(trace_attributes)
+                for key in event_attributes:
+                    if key not in columns:
+                        columns[key] = [None] * rows
+                for key, values in columns.items():
+                    values.append(event_attributes.get(key))
+                rows += 1
+                event_attributes = None
+                elem.clear()
+
+                if rows >= chunk_size:
+                    yield _to_frame(columns, column_types)
+                    columns = {key: [] for key in columns}
+                    rows = 0
+
+            elif tag == "trace":
+                elem.clear()
+                root.clear()
+
+    if rows:
+        yield _to_frame(columns, column_types)
+
+@profiled
+def read_xes(log_file: str, chunk_size: int = 100_000) -> DataFrame:
+    """
+    Reads an XES log into a DataFrame with the same schema as the CSV logs.
+
+    Args:
+        log_file (str): Path to the XES file, optionally gzip-compressed (.xes.gz).
+        chunk_size (int): Number of events parsed into each intermediate DataFrame.
+
+    Returns:
+        DataFrame: One row per event, with trace attributes as 'case:' columns.
+    """
+    return pd.concat(iter_xes_chunks(log_file, chunk_size), ignore_index=True)